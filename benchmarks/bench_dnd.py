@@ -0,0 +1,220 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: bench_dnd.py
+#       Drag-and-drop benchmark. Builds a scene (see bench_scene.py), drags widgets
+#       across it with synthetic touches, and reports:
+#       - latency of each on_touch_move, and of each on_touch_up (the drop)
+#       - memory allocated per move and per drop (with tracemalloc, in a second pass,
+#         so that tracing doesn't skew the timings)
+#       - the size of the library's registries afterwards
+#       - with --stats, the kivydnd.stats counters for the timed drags
+#       --trace FILE writes a Chrome trace (see kivydnd/tracing.py) of the timed drags.
+#
+#       Run from the top of the repository, for example:
+#           PYTHONPATH=. python benchmarks/bench_dnd.py --destinations 1000 --groups 4
+#       Add --json to get the numbers in a form that's easy to compare between runs.
+#       The scene is put in a kivydnd.testing.FakeWindow, so no display is needed;
+#       --real-window uses Kivy's Window instead.
+from __future__ import print_function
+
+import argparse
+import json
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from bench_scene import Scene
+
+from kivydnd import stats, tracing
+from kivydnd.leak_audit import registry_sizes
+from kivydnd.testing import use_fake_window
+from kivydnd.window_provider import get_window
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(samples):
+    """
+    :param samples: list of durations in seconds
+    :return: dictionary of statistics, in microseconds
+    """
+    values = sorted(samples)
+    count = len(values)
+    return {
+        "count": count,
+        "mean_us": (sum(values) / count if count else 0.0) * 1e6,
+        "p50_us": percentile(values, 0.50) * 1e6,
+        "p95_us": percentile(values, 0.95) * 1e6,
+        "max_us": (values[-1] if values else 0.0) * 1e6,
+    }
+
+
+def run_drags(scene, drags, moves, move_hook=None, drop_hook=None):
+    """
+    Drag draggables, round robin, to targets in their group.
+    :param move_hook: function(draggable, touch, point) that performs one move
+    :param drop_hook: function(draggable, touch) that performs the drop
+    """
+    move_hook = move_hook or scene.touch_move
+    drop_hook = drop_hook or scene.touch_up
+    for i in range(drags):
+        draggable = scene.draggables[i % len(scene.draggables)]
+        scene.put_back(draggable)
+        points = scene.path(draggable, scene.target_for(draggable), moves)
+        touch = scene.touch_down(draggable, points[0])
+        for point in points[1:]:
+            move_hook(draggable, touch, point)
+        drop_hook(draggable, touch)
+
+
+def time_pass(scene, drags, moves):
+    move_times = []
+    drop_times = []
+
+    def timed_move(draggable, touch, point):
+        start = default_timer()
+        scene.touch_move(draggable, touch, point)
+        move_times.append(default_timer() - start)
+
+    def timed_drop(draggable, touch):
+        start = default_timer()
+        scene.touch_up(draggable, touch)
+        drop_times.append(default_timer() - start)
+
+    run_drags(scene, drags, moves, timed_move, timed_drop)
+    return (summarize(move_times), summarize(drop_times))
+
+
+def allocation_pass(scene, drags, moves):
+    """
+    :return: dictionary of allocation figures, or None without tracemalloc
+    """
+    if tracemalloc is None:
+        return None
+    sizes = {"move_bytes": 0, "move_blocks": 0, "drop_bytes": 0, "drop_blocks": 0}
+
+    def measure(which, func, *args):
+        before = tracemalloc.take_snapshot()
+        func(*args)
+        after = tracemalloc.take_snapshot()
+        for stat in after.compare_to(before, "filename"):
+            if stat.size_diff > 0:
+                sizes[which + "_bytes"] += stat.size_diff
+                sizes[which + "_blocks"] += max(stat.count_diff, 0)
+
+    tracemalloc.start()
+    try:
+        run_drags(scene, drags, moves,
+                  lambda draggable, touch, point: measure("move", scene.touch_move,
+                                                          draggable, touch, point),
+                  lambda draggable, touch: measure("drop", scene.touch_up, draggable, touch))
+    finally:
+        tracemalloc.stop()
+    total_moves = float(max(drags * moves, 1))
+    return {
+        "bytes_per_move": sizes["move_bytes"] / total_moves,
+        "blocks_per_move": sizes["move_blocks"] / total_moves,
+        "bytes_per_drop": sizes["drop_bytes"] / float(max(drags, 1)),
+        "blocks_per_drop": sizes["drop_blocks"] / float(max(drags, 1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kivydnd drags and drops.")
+    parser.add_argument("--draggables", type=int, default=10)
+    parser.add_argument("--destinations", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=1,
+                        help="how many containers deep the destinations are nested")
+    parser.add_argument("--drags", type=int, default=50)
+    parser.add_argument("--moves", type=int, default=30, help="moves per drag")
+    parser.add_argument("--warmup", type=int, default=5, help="drags before timing starts")
+    parser.add_argument("--no-allocations", action="store_true",
+                        help="skip the tracemalloc pass")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--stats", action="store_true",
+                        help="collect kivydnd.stats counters during the timed drags")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="write a Chrome trace of the timed drags to FILE")
+    parser.add_argument("--real-window", action="store_true",
+                        help="use Kivy's Window (needs a display) instead of a FakeWindow")
+    args = parser.parse_args()
+
+    window = get_window() if args.real_window else use_fake_window()
+    scene = Scene(window, args.draggables, args.destinations, args.groups, args.depth)
+    run_drags(scene, args.warmup, args.moves)
+    if args.stats:
+        stats.reset()
+        stats.enable()
+    if args.trace:
+        tracing.enable(capacity=args.drags * (args.moves + 10))
+    (move_stats, drop_stats) = time_pass(scene, args.drags, args.moves)
+    if args.trace:
+        tracing.disable()
+        tracing.export(args.trace)
+    counters = None
+    if args.stats:
+        stats.disable()
+        counters = stats.snapshot()
+    allocations = None
+    if not args.no_allocations:
+        allocations = allocation_pass(scene, max(args.drags // 5, 1), args.moves)
+    results = {
+        "scene": {"draggables": args.draggables, "destinations": args.destinations,
+                  "groups": args.groups, "depth": args.depth,
+                  "drags": args.drags, "moves": args.moves},
+        "move": move_stats,
+        "drop": drop_stats,
+        "allocations": allocations,
+        "registries": registry_sizes(),
+        "stats": counters,
+    }
+    scene.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    print("scene: %(draggables)d draggables, %(destinations)d destinations, %(groups)d groups, "
+          "depth %(depth)d; %(drags)d drags of %(moves)d moves" % results["scene"])
+    for name in ("move", "drop"):
+        summary = results[name]
+        print("%-5s  n=%-6d mean %9.1f us  p50 %9.1f us  p95 %9.1f us  max %9.1f us" % (
+            name, summary["count"], summary["mean_us"], summary["p50_us"], summary["p95_us"],
+            summary["max_us"]))
+    if allocations is not None:
+        print("alloc  %.0f bytes / %.1f blocks per move, %.0f bytes / %.1f blocks per drop" % (
+            allocations["bytes_per_move"], allocations["blocks_per_move"],
+            allocations["bytes_per_drop"], allocations["blocks_per_drop"]))
+    if counters is not None:
+        print("stats: " + ", ".join("%s=%d" % (name, value) for (name, value) in
+                                    sorted(counters["counters"].items())))
+        for (name, timing) in sorted(counters["timings"].items()):
+            print("       %s: %d calls, mean %.1f us, max %.1f us" % (
+                name, timing["calls"], timing["mean_us"], timing["max_us"]))
+    print("registries: " + ", ".join("%s=%d" % (name, size) for (name, size) in
+                                     sorted(results["registries"].items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: bench_import.py
+#       Import-time benchmark. Imports each kivydnd module in a fresh interpreter,
+#       several times, and reports how long the import took and whether it pulled in
+#       Kivy, Kivy's Window or NumPy. Importing a module should never create a window.
+#
+#       Run from the top of the repository:
+#           PYTHONPATH=. python benchmarks/bench_import.py
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+MODULES = [
+    "kivydnd",
+    "kivydnd.dnd_storage_singletons",
+    "kivydnd.geometry",
+    "kivydnd.scheduler",
+    "kivydnd.dropdestination",
+    "kivydnd.dragndropwidget",
+]
+
+# What the child interpreter runs. It prints one line of JSON.
+PROBE = """
+import json, sys
+from timeit import default_timer
+start = default_timer()
+import %s
+elapsed = default_timer() - start
+print(json.dumps({"seconds": elapsed,
+                  "kivy": "kivy" in sys.modules,
+                  "window": "kivy.core.window" in sys.modules,
+                  "numpy": "numpy" in sys.modules}))
+"""
+
+
+def time_import(module, repeat):
+    """
+    :return: dictionary with the fastest and median import times in milliseconds,
+    and what the import pulled in
+    """
+    environment = dict(os.environ)
+    environment.setdefault("KIVY_NO_ARGS", "1")
+    environment.setdefault("KIVY_NO_CONSOLELOG", "1")
+    runs = []
+    for i in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", PROBE % module],
+                                         env=environment)
+        # Kivy may print to stdout before our line.
+        runs.append(json.loads(output.decode("utf-8").strip().splitlines()[-1]))
+    times = sorted(run["seconds"] * 1000.0 for run in runs)
+    return {
+        "min_ms": times[0],
+        "median_ms": times[len(times) // 2],
+        "kivy": runs[-1]["kivy"],
+        "window": runs[-1]["window"],
+        "numpy": runs[-1]["numpy"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark importing kivydnd.")
+    parser.add_argument("--repeat", type=int, default=5, help="imports of each module")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    results = dict((module, time_import(module, args.repeat)) for module in args.modules)
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    print("%-34s %9s %9s  %s" % ("module", "min ms", "median ms", "pulls in"))
+    for module in args.modules:
+        result = results[module]
+        pulled_in = [name for name in ("kivy", "window", "numpy") if result[name]]
+        print("%-34s %9.1f %9.1f  %s" % (module, result["min_ms"], result["median_ms"],
+                                         ", ".join(pulled_in)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: bench_replay.py
+#       Replay benchmark. Plays a recording (see kivydnd/recording.py) back in a
+#       FakeWindow several times, and reports the latency of each kind of event.
+#       Turns a recording of a slow drag into a benchmark case:
+#           PYTHONPATH=. python benchmarks/bench_replay.py slow_drag.jsonl
+#
+#       --record FILE first makes a recording of synthetic drags across a scene from
+#       bench_scene.py (the same options as bench_dnd.py), then replays that.
+from __future__ import print_function
+
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import argparse
+import json
+import sys
+from timeit import default_timer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from kivydnd.recording import Recorder, Replayer
+from kivydnd.testing import use_fake_window
+
+from bench_dnd import summarize
+from bench_scene import Scene
+
+EVENT_KINDS = ["pos", "down", "move", "up"]
+
+
+def record_scene(path, args):
+    """
+    Record args.drags synthetic drags, sent through the window, into path.
+    """
+    window = use_fake_window()
+    scene = Scene(window, args.draggables, args.destinations, args.groups, args.depth)
+    recorder = Recorder(path)
+    recorder.start(window)
+    for i in range(args.drags):
+        draggable = scene.draggables[i % len(scene.draggables)]
+        points = scene.path(draggable, scene.target_for(draggable), args.moves)
+        scene.driver.drag(window, points)
+        scene.put_back(draggable)
+    recorder.stop()
+    scene.close()
+
+
+def replay(replayer, repeat):
+    """
+    :return: dictionary[event kind] = list of seconds
+    """
+    times = dict((kind, []) for kind in EVENT_KINDS)
+    for i in range(repeat):
+        if i:
+            replayer.close()
+            replayer.build()
+        for event in replayer.events:
+            start = default_timer()
+            replayer.step(event)
+            times[event[1]].append(default_timer() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark replaying a kivydnd recording.")
+    parser.add_argument("recording", nargs="?", help="the recording to replay")
+    parser.add_argument("--repeat", type=int, default=5, help="replays to time")
+    parser.add_argument("--animations", action="store_true",
+                        help="keep drop animations and inertia as recorded")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record synthetic drags into FILE, and replay that")
+    parser.add_argument("--draggables", type=int, default=10)
+    parser.add_argument("--destinations", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=1)
+    parser.add_argument("--drags", type=int, default=20)
+    parser.add_argument("--moves", type=int, default=30, help="moves per drag")
+    args = parser.parse_args()
+    if args.record:
+        record_scene(args.record, args)
+        args.recording = args.record
+    if not args.recording:
+        parser.error("give a recording, or --record FILE")
+
+    replayer = Replayer(args.recording, animations=args.animations)
+    times = replay(replayer, args.repeat)
+    replayer.close()
+    results = dict((kind, summarize(times[kind])) for kind in EVENT_KINDS if times[kind])
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+        return
+    print("%s: %d widgets, %d events, %d replays" % (
+        args.recording, len(replayer.scene["widgets"]), len(replayer.events), args.repeat))
+    for kind in EVENT_KINDS:
+        if kind not in results:
+            continue
+        summary = results[kind]
+        print("%-5s  n=%-6d mean %9.1f us  p50 %9.1f us  p95 %9.1f us  max %9.1f us" % (
+            kind, summary["count"], summary["mean_us"], summary["p50_us"], summary["p95_us"],
+            summary["max_us"]))
+
+
+if __name__ == "__main__":
+    main()
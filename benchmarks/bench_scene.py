@@ -0,0 +1,144 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: bench_scene.py
+#       Scenes of DragNDropWidgets and DropDestinations for the benchmarks, dragged
+#       around with kivydnd.testing's TouchDriver.
+#
+#       The touches go through the widgets' real on_touch_down, on_touch_move and
+#       on_touch_up, and each move also sets the window's mouse_pos, so the on_motion
+#       bindings run as they would under a mouse. No events come from the display.
+from __future__ import print_function
+
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import random
+
+from kivy.uix.widget import Widget
+
+from kivydnd.dragndropwidget import DragNDropWidget
+from kivydnd.dropdestination import DropDestination
+from kivydnd.testing import TouchDriver
+
+# The scene is laid out in a square this many pixels across, whatever the size of
+# the Window.
+SCENE_SIZE = 1000
+
+
+class BenchDraggable(DragNDropWidget):
+    text = "draggable"
+
+
+class BenchDestination(DropDestination):
+    pass
+
+
+class Scene(object):
+    def __init__(self, window, draggables=10, destinations=100, groups=1, depth=1, seed=1):
+        """
+        :param window: Kivy's Window, or a kivydnd.testing.FakeWindow
+        :param draggables: number of DragNDropWidgets, in one source container
+        :param destinations: number of DropDestinations, laid out in a grid
+        :param groups: number of drop groups; widget i is in group i % groups
+        :param depth: how many containers deep the destinations are nested
+        :param seed: for the choice of drop targets
+        """
+        self.random = random.Random(seed)
+        self.window = window
+        self.driver = TouchDriver(window)
+        self.root = Widget(pos=(0, 0), size=(SCENE_SIZE, SCENE_SIZE))
+        window.add_widget(self.root)
+        self.group_names = ["group%d" % i for i in range(max(groups, 1))]
+
+        self.source = Widget(pos=(0, 0), size=(SCENE_SIZE, 100))
+        self.root.add_widget(self.source)
+        self.draggables = []
+        width = SCENE_SIZE / float(max(draggables, 1))
+        for i in range(draggables):
+            draggable = BenchDraggable(pos=(i * width, 0), size=(width * 0.8, 80),
+                                       size_hint=(None, None))
+            draggable.drop_group = self.group_names[i % len(self.group_names)]
+            draggable.drop_ok_do_animation = False
+            draggable.not_drop_ok_do_animation = False
+            self.source.add_widget(draggable)
+            self.draggables.append(draggable)
+        self.home = dict((draggable, tuple(draggable.pos)) for draggable in self.draggables)
+
+        container = self.root
+        for level in range(max(depth, 1)):
+            inner = Widget(pos=(0, 100), size=(SCENE_SIZE, SCENE_SIZE - 100))
+            container.add_widget(inner)
+            container = inner
+        self.destinations = []
+        self.destinations_by_group = dict((name, []) for name in self.group_names)
+        columns = max(int(destinations ** 0.5), 1)
+        rows = (destinations + columns - 1) // columns
+        cell_width = SCENE_SIZE / float(columns)
+        cell_height = (SCENE_SIZE - 100) / float(max(rows, 1))
+        for j in range(destinations):
+            (column, row) = (j % columns, j // columns)
+            destination = BenchDestination(
+                pos=(column * cell_width, 100 + row * cell_height),
+                size=(cell_width * 0.8, cell_height * 0.8), size_hint=(None, None))
+            name = self.group_names[j % len(self.group_names)]
+            destination.drop_group = name
+            container.add_widget(destination)
+            self.destinations.append(destination)
+            self.destinations_by_group[name].append(destination)
+
+    def close(self):
+        for destination in self.destinations:
+            destination.close()
+        for draggable in self.draggables:
+            draggable.close()
+        self.window.remove_widget(self.root)
+
+    def target_for(self, draggable):
+        """
+        :return: a destination in the draggable's drop group, or None
+        """
+        candidates = self.destinations_by_group.get(draggable.drop_group)
+        if not candidates:
+            return None
+        return self.random.choice(candidates)
+
+    def put_back(self, draggable):
+        # A successful drop leaves the widget without a parent.
+        if draggable.parent is None:
+            self.source.add_widget(draggable)
+        draggable.pos = self.home[draggable]
+
+    def path(self, draggable, target, moves):
+        """
+        :return: list of moves + 1 points from the draggable's center to the target's
+        center (or straight up, if there is no target), Window coordinates
+        """
+        (x0, y0) = draggable.center
+        if target is None:
+            (x1, y1) = (x0, SCENE_SIZE - 10)
+        else:
+            (x1, y1) = target.to_window(*target.center)
+        return [(x0 + (x1 - x0) * i / float(moves), y0 + (y1 - y0) * i / float(moves))
+                for i in range(moves + 1)]
+
+    def touch_down(self, draggable, point):
+        return self.driver.down(draggable, point[0], point[1])
+
+    def touch_move(self, draggable, touch, point):
+        self.driver.move(draggable, touch, point[0], point[1])
+
+    def touch_up(self, draggable, touch):
+        self.driver.up(draggable, touch)
@@ -0,0 +1,141 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: async_drop.py
+#       Drop handlers that finish later.
+#
+#       A drop_func may return a Future (anything with add_done_callback, such as a
+#       concurrent.futures.Future or an asyncio Future) or an awaitable (a coroutine),
+#       or the widget may run its handlers on a thread pool (drop_in_thread). Either
+#       way the touch up handler returns at once; when_done() calls back on the Kivy
+#       main thread, through the Clock, once the result is in.
+#
+#       Coroutines are run on the asyncio event loop if one is running in the main
+#       thread (an app started with async_runTouchApp); otherwise each gets its own
+#       event loop in a pool thread.
+#
+#       asyncio and concurrent.futures are imported when first needed: most apps never
+#       return anything but True or False from a drop handler.
+from __future__ import print_function
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+# Threads in the pool that is made the first time one is needed.
+DROP_THREADS = 4
+
+_executor = [None]
+
+
+def drop_executor():
+    """
+    :return: the executor that drop handlers run on. Made on first use, unless
+    set_drop_executor() has supplied one.
+    """
+    if _executor[0] is None:
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError:
+            raise RuntimeError("kivydnd: drop_in_thread needs concurrent.futures "
+                               "(pip install futures, on Python 2)")
+        _executor[0] = ThreadPoolExecutor(max_workers=DROP_THREADS)
+    return _executor[0]
+
+
+def set_drop_executor(executor):
+    """
+    Use your own executor (anything with a submit() method returning a Future) for
+    drop handlers.
+    """
+    _executor[0] = executor
+
+
+def is_deferred(result):
+    """
+    :param result: what a drop handler returned
+    :return: True if it's a Future or an awaitable, rather than a finished result
+    """
+    return result is not None and \
+        (hasattr(result, "add_done_callback") or hasattr(result, "__await__"))
+
+
+def run_in_thread(func, *args):
+    """
+    :return: a Future for func(*args), run on the drop executor
+    """
+    return drop_executor().submit(func, *args)
+
+
+def _run_awaitable(awaitable):
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(awaitable)
+    finally:
+        loop.close()
+
+
+def _running_loop():
+    try:
+        import asyncio
+        return asyncio.get_running_loop()
+    except (ImportError, AttributeError, RuntimeError):
+        return None
+
+
+def as_future(result):
+    """
+    :param result: a Future or an awaitable
+    :return: a Future for it. An awaitable is started on the running asyncio loop, or
+    on its own loop in a pool thread.
+    """
+    if hasattr(result, "add_done_callback"):
+        return result
+    loop = _running_loop()
+    if loop is not None:
+        import asyncio
+        return asyncio.ensure_future(result, loop=loop)
+    return run_in_thread(_run_awaitable, result)
+
+
+def when_done(result, callback=None):
+    """
+    Call callback(ok, value) on the main thread once the result is in. ok is False if
+    the handler raised an exception, was cancelled, or returned False; value is what it
+    returned, or the exception. Exceptions are logged.
+    :param result: a Future or an awaitable, from a drop handler
+    :param callback: function of two arguments, or None to just log failures
+    """
+    future = as_future(result)
+
+    def done(future):
+        if future.cancelled():
+            (ok, value) = (False, None)
+        else:
+            try:
+                value = future.result()
+                if is_deferred(value):
+                    # A scheduled handler that itself returned a Future or awaitable.
+                    when_done(value, callback)
+                    return
+                ok = value is not False
+            except Exception as exception:
+                Logger.error("kivydnd: drop handler failed: %r" % (exception,))
+                (ok, value) = (False, exception)
+        if callback is not None:
+            # Futures may finish on any thread; get back to Kivy's.
+            Clock.schedule_once(lambda dt: callback(ok, value), 0)
+
+    future.add_done_callback(done)
@@ -0,0 +1,205 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: bound_regions.py
+#       Where a DragNDropWidget may be dragged to, given its bound_zone_objects and
+#       bound_polygons.
+#
+#       The regions are worked out in Window coordinates and kept until something they
+#       depend on changes: a bound object's pos or size, the dragged widget's size, the
+#       properties themselves, or geometry.invalidate_geometry(). Each region is stored
+#       as the set of positions the widget's origin may take inside it, so clamping a
+#       move is a containment test against the region the widget was last in, and only
+#       falls back to looking at the others when it leaves that one.
+from __future__ import print_function
+
+from kivydnd.geometry import (
+    window_rect, rects_intersect, polygon_contains, nearest_point_on_polygon,
+    geometry_generation)
+
+# Values of bound_zone_mode.
+BOUND_ZONE_MODES = ["bounding_box", "union"]
+# In "union" mode, overlapping or touching rects are combined into larger ones so the
+# widget can straddle the seam. Stop combining after this many.
+MAX_MERGED_RECTS = 64
+
+RECT = 0
+POLYGON = 1
+
+
+def _rect_within(inner, outer):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and \
+        inner[0] + inner[2] <= outer[0] + outer[2] and inner[1] + inner[3] <= outer[1] + outer[3]
+
+
+def _merges(rect_a, rect_b):
+    # The rects inside the union of two touching rects that are wider or taller than
+    # either of them.
+    if not rects_intersect(rect_a, rect_b):
+        return []
+    merged = []
+    bottom = max(rect_a[1], rect_b[1])
+    top = min(rect_a[1] + rect_a[3], rect_b[1] + rect_b[3])
+    if top > bottom:
+        left = min(rect_a[0], rect_b[0])
+        right = max(rect_a[0] + rect_a[2], rect_b[0] + rect_b[2])
+        merged.append((left, bottom, right - left, top - bottom))
+    left = max(rect_a[0], rect_b[0])
+    right = min(rect_a[0] + rect_a[2], rect_b[0] + rect_b[2])
+    if right > left:
+        bottom = min(rect_a[1], rect_b[1])
+        top = max(rect_a[1] + rect_a[3], rect_b[1] + rect_b[3])
+        merged.append((left, bottom, right - left, top - bottom))
+    return merged
+
+
+def union_rects(rects):
+    """
+    :param rects: list of rects
+    :return: list of rects with the same union, including the larger rects made by
+    combining any that overlap or touch. Rects that lie inside another are dropped.
+    """
+    rects = list(rects)
+    i = 0
+    while i < len(rects) and len(rects) < MAX_MERGED_RECTS:
+        for j in range(i):
+            for merged in _merges(rects[i], rects[j]):
+                if not any(_rect_within(merged, rect) for rect in rects):
+                    rects.append(merged)
+        i += 1
+    rects.sort(key=lambda rect: rect[2] * rect[3], reverse=True)
+    kept = []
+    for rect in rects:
+        if not any(_rect_within(rect, other) for other in kept):
+            kept.append(rect)
+    return kept
+
+
+def bounding_rect(rects):
+    left = min(rect[0] for rect in rects)
+    bottom = min(rect[1] for rect in rects)
+    right = max(rect[0] + rect[2] for rect in rects)
+    top = max(rect[1] + rect[3] for rect in rects)
+    return (left, bottom, right - left, top - bottom)
+
+
+class BoundRegions(object):
+    def __init__(self, widget):
+        """
+        :param widget: the DragNDropWidget whose bounds these are
+        """
+        self.widget = widget
+        # The bound_zone_objects we are bound to.
+        self.objects = []
+        # list of (RECT, (min_x, min_y, max_x, max_y)) or (POLYGON, points), in Window
+        # coordinates, for the widget's origin. None if they need working out again.
+        self.regions = None
+        self._generation = geometry_generation()
+        self._last = None
+        widget.bind(bound_zone_objects=self.rebind, bound_polygons=self.invalidate,
+                    bound_zone_mode=self.invalidate, size=self.invalidate)
+        self.rebind()
+
+    def rebind(self, *args):
+        for obj in self.objects:
+            obj.unbind(pos=self.invalidate, size=self.invalidate)
+        self.objects = list(self.widget.bound_zone_objects)
+        for obj in self.objects:
+            obj.bind(pos=self.invalidate, size=self.invalidate)
+        self.invalidate()
+
+    def unbind_all(self):
+        for obj in self.objects:
+            obj.unbind(pos=self.invalidate, size=self.invalidate)
+        self.objects = []
+        self.invalidate()
+
+    def invalidate(self, *args):
+        self.regions = None
+        self._last = None
+
+    def current(self):
+        generation = geometry_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self.regions = None
+        if self.regions is None:
+            self.regions = self._build()
+            self._last = None
+        return self.regions
+
+    def _build(self):
+        widget = self.widget
+        (width, height) = widget.size
+        rects = [window_rect(obj) for obj in self.objects]
+        if rects:
+            if widget.bound_zone_mode == "union":
+                rects = union_rects(rects)
+            else:
+                rects = [bounding_rect(rects)]
+        regions = []
+        for rect in rects:
+            # If the widget is bigger than the rect, pin it to the left or bottom edge.
+            regions.append((RECT, (rect[0], rect[1],
+                                   max(rect[0], rect[0] + rect[2] - width),
+                                   max(rect[1], rect[1] + rect[3] - height))))
+        for points in widget.bound_polygons:
+            # Polygons bound the widget's center.
+            shifted = [value - (width if i % 2 == 0 else height) / 2.0
+                       for (i, value) in enumerate(points)]
+            regions.append((POLYGON, shifted))
+        return regions
+
+    def clamp(self, x, y):
+        """
+        :param x: x of the widget's origin, Window coordinates
+        :param y: y of the widget's origin, Window coordinates
+        :return: (x, y) moved to the nearest position inside the regions, or unchanged
+        if it's already inside one or there are no regions.
+        """
+        regions = self.current()
+        if not regions:
+            return (x, y)
+        last = self._last
+        if last is not None and _contains(last, x, y):
+            return (x, y)
+        for region in regions:
+            if _contains(region, x, y):
+                self._last = region
+                return (x, y)
+        best = None
+        best_distance = None
+        for region in regions:
+            (px, py) = _nearest(region, x, y)
+            distance = (px - x) * (px - x) + (py - y) * (py - y)
+            if best is None or distance < best_distance:
+                best = (px, py)
+                best_distance = distance
+                self._last = region
+        return best
+
+
+def _contains(region, x, y):
+    (kind, shape) = region
+    if kind == RECT:
+        return shape[0] <= x <= shape[2] and shape[1] <= y <= shape[3]
+    return polygon_contains(shape, x, y)
+
+
+def _nearest(region, x, y):
+    (kind, shape) = region
+    if kind == RECT:
+        return (min(max(x, shape[0]), shape[2]), min(max(y, shape[1]), shape[3]))
+    return nearest_point_on_polygon(shape, x, y)
@@ -20,8 +20,19 @@
 #       ...that's a joke.
 #
 #       This only works with kivy. That's not a joke.
+#
+#       When debugging is off it should cost nothing. So:
+#       - print() returns at once unless this Debug object could print anything at all
+#         (its "active" attribute, kept up to date when debug_flag or register change).
+#       - Arguments that are expensive to work out can be wrapped in lazy(); they are
+#         only worked out if the line is actually printed.
+#       - Around a block of debug output, or one with costly arguments, check
+#         debug.enabled(level) first.
+#       - The caller's file, line and method come from its frame, not from a walk of
+#         the whole stack.
 
 from __future__ import print_function
+import os
 import traceback
 import sys
 
@@ -38,17 +49,54 @@ def set_debug_flag(flag):
     debug_flag = flag
 
 
+class Lazy(object):
+    """
+    An argument to debug.print() that is only worked out if it's printed.
+    """
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __call__(self):
+        return self.func(*self.args)
+
+
+def lazy(func, *args):
+    """
+    For example: debug.print("at:", lazy(widget.to_window, widget.x, widget.y))
+    :return: a Lazy, which debug.print() replaces with func(*args)
+    """
+    return Lazy(func, *args)
+
+
+def _resolve(args):
+    return [arg() if isinstance(arg, Lazy) else arg for arg in args]
+
+
+def _caller(depth):
+    """
+    :param depth: how many frames up from our caller to look
+    :return: "file.py:line method()" of that frame, padded
+    """
+    try:
+        frame = sys._getframe(depth + 1)
+        (filename, line, method) = (frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name)
+    except (AttributeError, ValueError):
+        # No sys._getframe (not CPython) or not that deep.
+        trace = traceback.extract_stack()
+        entry = trace[max(len(trace) - depth - 2, 0)]
+        (filename, line, method) = (entry[0], entry[1], entry[2])
+    basename = "%-10s" % os.path.basename(filename)
+    return basename + ":" + str(line), "%-15s" % (method + "()")
+
+
 def debug_print(*args, **kwargs):
     if not debug_flag:
         return
-    trace = traceback.extract_stack()
-    # print (len(trace))
-    this_entry=trace[len(trace)-2]
-    basename = this_entry[0].split('/')
-    basename = "%-10s" % basename[len(basename)-1]
-    method = this_entry[2] + "()"
-    method = "%-15s" % method
-    print (basename + ":" + str(this_entry[1]), method, *args, **kwargs)
+    (where, method) = _caller(1)
+    print (where, method, *_resolve(args), **kwargs)
 
 
 def debug_widget_title(widget):
@@ -59,7 +107,7 @@ def debug_widget_title(widget):
     return title
 
 
-class Debug():
+class Debug(object):
     """
     Instantiate this bad boy in your file, and you can turn it on and off as you
     wish in your file. Then you can print debug messages, like so:
@@ -95,23 +143,53 @@ class Debug():
         debug = Debug(register=0x01)
         """
         global debug_flag
-        self.debug_flag=debug_flag
+        self._debug_flag = debug_flag
+        self._register = 0x00
         for arg in args:
-            self.debug_flag = arg
+            self._debug_flag = arg
         self.register = kwargs.pop("register", 0x00)
         file = kwargs.pop("file", None)
         err = kwargs.pop("err", None)
         if file is not None:
-            self.out_fp = open(file)
+            self.out_fp = open(file, "a")
         else:
             self.out_fp = sys.stdout
         if err is not None:
-            self.err_fp = open(file)
+            self.err_fp = open(err, "a")
         else:
             self.err_fp = sys.stderr
 
+    def _update_active(self):
+        # False if nothing but a "definitely" print can get through.
+        self.active = bool(self._debug_flag or self._register)
+
+    @property
+    def debug_flag(self):
+        return self._debug_flag
+
+    @debug_flag.setter
+    def debug_flag(self, value):
+        self._debug_flag = value
+        self._update_active()
+
+    @property
+    def register(self):
+        return self._register
 
-    def _print(self, *args, **kwargs):
+    @register.setter
+    def register(self, value):
+        self._register = value
+        self._update_active()
+
+    def enabled(self, level=0x00):
+        """
+        :param level: a debug level, as given to print()
+        :return: True if print() with that level would print. Check it before
+        building debug output that costs something.
+        """
+        return bool(self._debug_flag or (level & self._register))
+
+    def _print(self, args, kwargs, fp):
         """
         If the debug_flag is False this will not print. However, this can be overridden
         by either:
@@ -125,31 +203,22 @@ class Debug():
         """
         definitely = kwargs.pop('definitely', False)
         level = kwargs.pop('level', 0x00)
-        fp = kwargs.pop('fp')
         if not definitely:
-            if not (level & self.register):
-                if not self.debug_flag:
+            if not (level & self._register):
+                if not self._debug_flag:
                     return
-        trace = traceback.extract_stack()
-        # print ("DEBUG debug_print: LEN trace: ", len(trace))
-        # print ("DEBUG debug_print: type trace: ", type(trace))
-        # for entry in trace:
-        #     print ("DEBUG debug_print entry: ", entry)
-        #
-        # The last one is this method, which is called by the print method,
-        # which was called by the actual program under debug. Hence: len - 3
-        this_entry = trace[len(trace) - 3]
-        basename = this_entry[0].split('/')
-        basename = "%-10s" % basename[len(basename) - 1]
-        method = this_entry[2] + "()"
-        method = "%-15s" % method
-        print(basename + ":" + str(this_entry[1]), method, args, kwargs, file=fp)
+        # We're called by print or err_print, which was called by the program under
+        # debug. Hence: two frames up.
+        (where, method) = _caller(2)
+        print(where, method, *_resolve(args), file=fp, **kwargs)
 
     def print(self, *args, **kwargs):
-        self._print(*args, fp=self.out_fp, **kwargs)
+        if self.active or kwargs.get('definitely'):
+            self._print(args, kwargs, self.out_fp)
 
     def err_print(self, *args, **kwargs):
-        self._print(*args, fp=self.err_fp, **kwargs)
+        if self.active or kwargs.get('definitely'):
+            self._print(args, kwargs, self.err_fp)
 
     def print_trace(self, *args, **kwargs):
         definitely = kwargs.pop('definitely', False)
@@ -161,7 +230,7 @@ class Debug():
         traceback.print_stack()
 
     def print_widget_ancestry(self, widget, *args, **kwargs):
-        import kivy.core.window._window_sdl2
+        from kivydnd.window_provider import get_window
 
         definitely = kwargs.get('definitely',False)
         if not definitely:
@@ -169,7 +238,8 @@ class Debug():
                 return
         self.print ("ancestry:", widget, definitely=definitely)
         i=0
-        while not isinstance(widget, kivy.core.window.window_sdl2.WindowSDL):
+        window = get_window()
+        while widget is not window and widget.parent is not None:
             print ("ancestry:", widget.parent)
             widget=widget.parent
             i = i + 1
@@ -1,5 +1,24 @@
+from kivydnd.spatial_index import DestinationIndex
+
 # This looks like:
 # dictionary[drag_group][widget] = true
 
 drag_destinations_dict = {}
 draggables_dict = {}
+# Every DropDestination that has joined a drop group, regardless of group. Matching
+# against a DragNDropWidget is done with drop_group_mask (see drop_groups.py).
+# dictionary[widget] = true
+drop_destinations = {}
+# The DropDestinations in drop_destinations that have a while_dragging_func, so a
+# move only looks at those.
+# dictionary[widget] = true
+while_dragging_destinations = {}
+# The same DropDestinations, in a grid by their position in the Window. Used to
+# find the nearest destination, and for magnetic snapping.
+destination_index = DestinationIndex()
+
+# Widgets whose motion_tracking is "drag". They are bound to Window.mouse_pos only
+# while at least one widget in active_draggables is being dragged.
+# dictionary[widget] = true
+drag_motion_listeners = {}
+active_draggables = {}
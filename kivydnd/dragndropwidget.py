@@ -21,16 +21,30 @@
 from __future__ import print_function
 
 # import copy
+import math
 
 from kivy.animation import Animation
-from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.properties import (
-    ListProperty, NumericProperty, BooleanProperty, ObjectProperty, StringProperty)
+    ListProperty, NumericProperty, BooleanProperty, ObjectProperty, StringProperty, OptionProperty)
 from kivy.uix.widget import Widget
 # from kivydnd import dnd_storage_singletons
 
-from kivydnd.dnd_storage_singletons import draggables_dict, drag_destinations_dict
-from kivydnd.debug_print import Debug, debug_widget_title
+from kivydnd import hooks, stats, tracing
+from kivydnd.dnd_storage_singletons import (
+    draggables_dict, drag_destinations_dict, destination_index, while_dragging_destinations)
+from kivydnd.geometry import (
+    window_rect, rect_center, rect_contains, rect_distance, rects_intersect, overlap_areas)
+from kivydnd.pointer_history import PointerHistory, DEFAULT_SIZE as POINTER_HISTORY_SIZE
+from kivydnd.bound_regions import BoundRegions, BOUND_ZONE_MODES
+from kivydnd.async_drop import is_deferred, run_in_thread, when_done
+from kivydnd.scheduler import (
+    frame_scheduler, ScheduledCall, call_or_post, PRIORITY_HIGH, PRIORITY_LOW)
+from kivydnd.drop_groups import group_names, group_mask, register_in_groups, unregister_from_groups
+from kivydnd.motion_binding import (
+    MOTION_TRACKING_MODES, track_motion, untrack_motion, drag_started, drag_finished)
+from kivydnd.window_provider import get_window
+from kivydnd.debug_print import Debug, debug_widget_title, lazy
 
 debug = Debug()  # Is False by default.
 DEBUG_TOUCH_UP = 0x00
@@ -47,6 +61,11 @@ debug.register = DEBUG_TOUCH_UP | DEBUG_TOUCH_MOVE | DEBUG_DRAG_START | DEBUG_CO
                  DEBUG_DRAG_FINISH | DEBUG_UNROOT_ME | DEBUG_REBORN | DEBUG_SUCCESSFUL_DROP |\
                  DEBUG_POST_SUCCESSFUL_ANIM
 
+# Longest time step of an inertial glide, in seconds.
+INERTIA_MAX_STEP = 1 / 30.0
+# Values of drag_start_policy. See on_touch_down.
+DRAG_START_POLICIES = ["long_press", "distance", "immediate"]
+
 
 # draggables_dict = dnd_storage_singletons.draggables_dict
 # drag_destinations_dict = dnd_storage_singletons.drag_destinations_dict
@@ -57,6 +76,8 @@ class DragNDropWidget(Widget):
     # properties
     droppable_zone_objects = ListProperty([])
     bound_zone_objects = ListProperty([])
+    bound_zone_mode = OptionProperty("bounding_box", options=BOUND_ZONE_MODES)
+    bound_polygons = ListProperty([])
     drag_opacity = NumericProperty(1.0)
     drop_func = ObjectProperty(None)
     drop_args = ListProperty([])
@@ -78,8 +99,29 @@ class DragNDropWidget(Widget):
     drag_start_args = ListProperty([])
     can_drop_into_parent = BooleanProperty(False)
     drop_group = StringProperty("_palm_default")
+    drop_groups = ListProperty([])
+    drag_kind = StringProperty("")
+    drop_resolution = OptionProperty("point", options=["point", "overlap", "nearest"])
+    snap_radius = NumericProperty(30)
+    magnetic_snap = BooleanProperty(False)
+    snap_target = ObjectProperty(None, allownone=True)
+    pointer_history_size = NumericProperty(POINTER_HISTORY_SIZE)
+    approach_horizon = NumericProperty(0)
+    inertial_release = BooleanProperty(False)
+    inertia_friction = NumericProperty(4.0)
+    inertia_min_speed = NumericProperty(20)
+    inertia_capture = BooleanProperty(False)
+    drag_start_policy = OptionProperty("long_press", options=DRAG_START_POLICIES)
+    drag_start_delay = NumericProperty(0.2)
+    drag_start_distance = NumericProperty(10)
+    drop_in_thread = BooleanProperty(False)
+    drop_pending = BooleanProperty(False)
+    drop_pending_opacity = NumericProperty(0.5)
+    defer_drop_dispatch = BooleanProperty(False)
+    schedule_callbacks = BooleanProperty(False)
     rebirth_failed_drop = BooleanProperty(True)
     close_on_fail = BooleanProperty(False)
+    motion_tracking = OptionProperty("always", options=MOTION_TRACKING_MODES)
     # This is not a Property
     widget_entered = None
 
@@ -99,6 +141,9 @@ class DragNDropWidget(Widget):
         self.copy = False
         self.touch_offset_x = 0
         self.touch_offset_y = 0
+        # Where the touch that may start a drag went down, in our parent's coordinates.
+        self.touch_down_x = 0
+        self.touch_down_y = 0
         self.drop_recipients = []
         self.am_touched = False
         self.double_tap_drag = False
@@ -107,15 +152,30 @@ class DragNDropWidget(Widget):
         self.bind(motion_over_widget_func=self.bind_mouse_motion)
         self.bind(motion_flee_widget_func=self.bind_mouse_motion)
         self.bind(motion_outside_widget_func=self.bind_mouse_motion)
+        self.bind(motion_tracking=self.bind_mouse_motion)
         self.bind(drop_group=self.bind_drop_group)
+        self.bind(drop_groups=self.bind_drop_group)
+        self.drop_group_names = []
+        self.drop_group_mask = 0
         self.found_drop_recipients_ok_dict = {}
-        self.min_x = -1
-        self.min_y = -1
-        self.max_x = -1
-        self.max_y = -1
+        # Where we may be dragged to. See bound_regions.py.
+        self.bound_regions = BoundRegions(self)
         self.move_counter = 0
         self.touch_up_event_start = 0
         self._up_event_count = 0
+        # Pointer samples of the current drag, for velocity. See pointer_history.py.
+        self.pointer_history = PointerHistory(self.pointer_history_size)
+        # DropDestinations that have been sent on_drag_approach and that we're still
+        # heading for. dictionary[destination] = True
+        self._approached = {}
+        # Inertial release: the Clock event stepping the glide, and the velocity.
+        self._inertia_event = None
+        self._inertia_velocity = (0.0, 0.0)
+        # Drop handlers still running, and whether all that have finished succeeded.
+        self._pending_handlers = 0
+        self._pending_handlers_ok = True
+        # Drop recipients whose drop_func took the drop, to be told if it's rolled back.
+        self._accepted_by = []
 
     def close(self):
         """
@@ -125,10 +185,14 @@ class DragNDropWidget(Widget):
         self.dispatch("on_close")
 
     def on_close(self):
+        # A glide in progress would keep moving us on the Clock.
+        self.stop_inertia(resolve=False)
         self.unbind(motion_over_widget_func=self.bind_mouse_motion)
         self.unbind(motion_flee_widget_func=self.bind_mouse_motion)
         self.unbind(motion_outside_widget_func=self.bind_mouse_motion)
+        self.unbind(motion_tracking=self.bind_mouse_motion)
         self.unbind(drop_group=self.bind_drop_group)
+        self.unbind(drop_groups=self.bind_drop_group)
         self.unregister_event_types("on_drag_start")
         self.unregister_event_types("on_being_dragged")
         self.unregister_event_types("on_drag_finish")
@@ -136,21 +200,94 @@ class DragNDropWidget(Widget):
         self.unregister_event_types("on_motion_flee")
         self.unregister_event_types("on_motion_outside")
         self.unregister_event_types("on_close")
-        if self.motion_is_bound_to_window:
-            Window.unbind(mouse_pos=self.on_motion)
-            self.motion_is_bound_to_window = False
+        untrack_motion(self)
+        drag_finished(self)
+        unregister_from_groups(draggables_dict, self)
+        self.bound_regions.unbind_all()
 
     def bind_drop_group(self, arg1, arg2):
-        if self.drop_group not in draggables_dict:
-            draggables_dict[self.drop_group] = {}
-        draggables_dict[self.drop_group][self] = True
+        names = group_names(self)
+        register_in_groups(draggables_dict, self, names)
+        self.drop_group_names = names
+        self.drop_group_mask = group_mask(names)
+
+    def drop_candidates(self):
+        """
+        :return: list of the widgets this widget could be dropped onto: every
+        DropDestination that shares a drop group with us, followed by our
+        droppable_zone_objects.
+        """
+        candidates = []
+        seen = {}
+        # Only the destinations in our own groups are looked at.
+        for name in self.drop_group_names:
+            for drop_recipient in drag_destinations_dict.get(name, ()):
+                if drop_recipient not in seen:
+                    candidates.append(drop_recipient)
+                    seen[drop_recipient] = True
+        for obj in self.droppable_zone_objects:
+            if obj not in seen:
+                candidates.append(obj)
+                seen[obj] = True
+        if stats.enabled:
+            stats.count("candidates_examined", len(candidates))
+        return candidates
+
+    def drop_candidates_near(self, rect, rescan=False):
+        """
+        Like drop_candidates(), but only those whose bounding box touches rect. Drop
+        group destinations come from the destination index, so the ones far away are
+        never looked at; droppable_zone_objects are checked one by one.
+        :param rect: (x, y, width, height) in Window coordinates; use a width and
+        height of 0 for a point
+        :param rescan: if the index has no drop group destination there, re-read
+        every destination's place and look again (see DestinationIndex.rescan())
+        :return: list of widgets
+        """
+        candidates = []
+        seen = {}
+        mask = self.drop_group_mask
+        if mask:
+            # A layout may have moved them since they were indexed.
+            found = destination_index.query_rect(rect, revalidate=True)
+            if rescan and not any(obj.drop_group_mask & mask for obj in found) \
+                    and destination_index.rescan():
+                # Something moved there that no binding saw, such as the content
+                # of a ScrollView that has been scrolled.
+                found = destination_index.query_rect(rect)
+            for drop_recipient in found:
+                if drop_recipient.drop_group_mask & mask:
+                    candidates.append(drop_recipient)
+                    seen[drop_recipient] = True
+        for obj in self.droppable_zone_objects:
+            if obj not in seen:
+                if obj in destination_index:
+                    near = rects_intersect(destination_index.rect(obj), rect)
+                else:
+                    near = rects_intersect(window_rect(obj), rect)
+                if near:
+                    candidates.append(obj)
+                    seen[obj] = True
+        if stats.enabled:
+            stats.count("candidates_examined", len(candidates))
+        return candidates
 
     run_already = False
 
     def bind_mouse_motion(self, the_widget, which_function):
-        if self.motion_is_bound_to_window is False:
-            Window.bind(mouse_pos=self.on_motion)
-        self.motion_is_bound_to_window = True
+        """
+        Called when any motion_..._func or the motion_tracking Property is set. With
+        motion_tracking "always" the widget is bound to Window.mouse_pos right away; with
+        "drag" it is bound only while some DragNDropWidget is being dragged.
+        """
+        if self.motion_over_widget_func is None and self.motion_flee_widget_func is None \
+                and self.motion_outside_widget_func is None:
+            return
+        track_motion(self, self.motion_tracking)
+
+    def on_motion_tracking_stopped(self):
+        if DragNDropWidget.widget_entered is self:
+            self.dispatch("on_motion_flee", get_window().mouse_pos)
 
     def set_draggable(self, value):
         self._draggable = value
@@ -169,12 +306,18 @@ class DragNDropWidget(Widget):
         self._old__opacity = self.opacity
         self.opacity = self.drag_opacity
         self.set_bound_axis_positions()
+        if self.pointer_history.size != int(self.pointer_history_size):
+            self.pointer_history = PointerHistory(self.pointer_history_size)
+        else:
+            self.pointer_history.clear()
+        self._approached = {}
         self._old_drag_pos = self.pos
         self._old_parent = self.parent
         self._old_parent_children_reversed_list = self.parent.children[:]
         self._old_parent_children_reversed_list.reverse()
         self._dragged = True
         DragNDropWidget.widget_entered = None
+        drag_started(self)
         if self.copy:
             self._old_index = -1
         else:
@@ -190,6 +333,8 @@ class DragNDropWidget(Widget):
         self.move_counter = 0
         self._up_event_count = 0
         self.am_touched = False
+        self.snap_target = None
+        self.drop_pending = False
         # TODO: If I was the copy, I need to not be a copy :-). Set it to false...
         # TODO: (after current debugging on 6/17/17)
         if set_opacity:
@@ -197,20 +342,120 @@ class DragNDropWidget(Widget):
         debug.print(" ****************** DRAG N DROP TOTALLY DONE *********************", self, level=DEBUG_DRAG_FINISH)
 
     def set_bound_axis_positions(self):
-        for obj in self.bound_zone_objects:
-            if self.min_x == -1:
-                self.max_x = obj.x + obj.size[0] - self.size[0]
-                self.max_y = obj.y + obj.size[1] - self.size[1]
-                self.min_x = obj.x
-                self.min_y = obj.y
-            if self.max_y < obj.y+obj.size[1]-self.size[1]:
-                self.max_y = obj.y+obj.size[1]-self.size[1]
-            if self.max_x < obj.x+obj.size[0]-self.size[0]:
-                self.max_x = obj.x + obj.size[0]-self.size[0]
-            if self.min_y > obj.y:
-                self.min_y = obj.y
-            if self.min_x > obj.x:
-                self.min_x = obj.x
+        """
+        Have the bounds worked out again before the next move. They follow the
+        bound_zone_objects on their own; this is for when something they can't see
+        has changed.
+        """
+        self.bound_regions.invalidate()
+
+    def clamp_position(self, x, y):
+        """
+        :param x: proposed x, in our parent's coordinates
+        :param y: proposed y, in our parent's coordinates
+        :return: (x, y) moved inside the bounds given by bound_zone_objects and
+        bound_polygons, if any.
+        """
+        if not self.bound_regions.current():
+            return (x, y)
+        if stats.enabled:
+            stats.count("to_window_calls")
+        (origin_x, origin_y) = self.to_window(0, 0)
+        (window_x, window_y) = (x + origin_x, y + origin_y)
+        (clamped_x, clamped_y) = self.bound_regions.clamp(window_x, window_y)
+        if clamped_x == window_x and clamped_y == window_y:
+            return (x, y)
+        return (clamped_x - origin_x, clamped_y - origin_y)
+
+    def start_inertia(self, mouse_motion_event):
+        """
+        inertial_release: rather than dropping where the touch came up, let the widget
+        glide on at its release velocity, slowed by inertia_friction. A single Clock
+        callback moves it once per frame (see inertia_step); when it comes to rest, the
+        drop is resolved there.
+        :param mouse_motion_event: the touch up event, passed on to on_drag_finish
+        :return:
+        """
+        self._inertia_velocity = self.pointer_history.velocity()
+        self._inertia_touch = mouse_motion_event
+        # The glide carries us off whatever we were snapped to.
+        self.snap_target = None
+        self._inertia_event = Clock.schedule_interval(self.inertia_step, 0)
+
+    def clamp_to_window(self, x, y):
+        """
+        :param x: proposed x, in our parent's coordinates
+        :param y: proposed y, in our parent's coordinates
+        :return: (x, y) moved so that all of us is inside the window, as far as we fit
+        """
+        window = get_window()
+        if stats.enabled:
+            stats.count("to_window_calls")
+        (origin_x, origin_y) = self.to_window(0, 0)
+        clamped_x = min(max(x + origin_x, 0), window.width - self.width) - origin_x
+        clamped_y = min(max(y + origin_y, 0), window.height - self.height) - origin_y
+        return (clamped_x, clamped_y)
+
+    def inertia_step(self, dt):
+        """
+        One frame of an inertial glide. The velocity decays exponentially at
+        inertia_friction per second, and a bound_zone_objects edge stops motion along
+        that axis. The glide ends when the speed drops below inertia_min_speed, when
+        we reach the edge of the window or, with inertia_capture, as soon as the touch
+        point is over a destination that will take us.
+        :param dt: seconds since the last frame, from the Clock
+        :return: False to stop the Clock callback
+        """
+        # After a stall (or on the first frame) dt can be large; don't jump across the
+        # screen because of it.
+        dt = min(dt, INERTIA_MAX_STEP)
+        (vx, vy) = self._inertia_velocity
+        x = self.x + vx * dt
+        y = self.y + vy * dt
+        (clamped_x, clamped_y) = self.clamp_position(x, y)
+        if clamped_x != x:
+            vx = 0.0
+        if clamped_y != y:
+            vy = 0.0
+        (x, y) = (clamped_x, clamped_y)
+        (clamped_x, clamped_y) = self.clamp_to_window(x, y)
+        at_edge = clamped_x != x or clamped_y != y
+        self.pos = (clamped_x, clamped_y)
+        self.touch_x = clamped_x + self.touch_offset_x
+        self.touch_y = clamped_y + self.touch_offset_y
+        decay = math.exp(-self.inertia_friction * dt)
+        self._inertia_velocity = (vx * decay, vy * decay)
+        at_rest = at_edge or math.hypot(vx, vy) * decay < self.inertia_min_speed
+        if not at_rest and self.inertia_capture:
+            at_rest = self.drop_recipient_at(self.touch_x, self.touch_y) is not None
+        if at_rest:
+            self.stop_inertia()
+            return False
+
+    def stop_inertia(self, resolve=True):
+        """
+        End an inertial glide where the widget is now, and resolve the drop there.
+        :param resolve: False to just stop, as when the widget is closed
+        """
+        if self._inertia_event is None:
+            return
+        self._inertia_event.cancel()
+        self._inertia_event = None
+        self._inertia_velocity = (0.0, 0.0)
+        if resolve:
+            self.dispatch("on_drag_finish", self._inertia_touch)
+
+    def drop_recipient_at(self, x, y):
+        """
+        :param x: x of a point, Window coordinates
+        :param y: y of a point, Window coordinates
+        :return: the first of our drop candidates under the point that would take us,
+        or None.
+        """
+        for obj in self.drop_candidates_near((x, y, 0, 0)):
+            if self.widget_absolute_collide_point(obj, x, y) and self.drop_recipient_ok(obj):
+                return obj
+        return None
 
     def on_touch_down(self, touch):
         """
@@ -222,9 +467,12 @@ class DragNDropWidget(Widget):
         lingers.
         TODO: Understand that mechanism.
 
-        on_touch_down contains a numerical value. If the object is touched for a period longer
-        than this value then we may be entering a drag operation. The value should probably be
-        made configurable. As a matter of fact, I'm sure it should be. ...TODO.
+        How a drag gets going depends on drag_start_policy:
+        - "long_press": the touch must have been held for longer than drag_start_delay
+          seconds (or be a double tap), then the drag starts on the next move.
+        - "distance": the drag starts on the first move that takes the touch more than
+          drag_start_distance pixels from where it went down. There is no delay.
+        - "immediate": the drag starts on the first move, however small.
 
         Note that if you hold down the touch, then after a short time the event will
         be dispatched and touch.time_end will be -1.
@@ -235,17 +483,26 @@ class DragNDropWidget(Widget):
         :param touch:
         :return:
         """
-        # TODO: make the drag delay configurable
         # if self.text == "Me in relief.JPG":
         #    debug.print ("touch down Me in relief", definitely=True)
+        if self._inertia_event is not None or self.drop_pending:
+            # Still gliding from the last drag, or waiting to hear how it went.
+            return
         if self.collide_point(touch.x, touch.y) and self._draggable:
-            # detect if the touch is "long"... (if not, dispatch drag)
-            if (abs(touch.time_end - touch.time_start) > 0.2) or touch.is_double_tap:
-                self.touch_offset_x = touch.x - self.x
-                self.touch_offset_y = touch.y - self.y
-                self.am_touched = True
-                if touch.is_double_tap:
-                    self.is_double_tap = True
+            if self.drag_start_policy == "long_press":
+                # detect if the touch is "long"... (if not, dispatch drag)
+                if (abs(touch.time_end - touch.time_start) <= self.drag_start_delay) and \
+                        not touch.is_double_tap:
+                    return
+            self.touch_offset_x = touch.x - self.x
+            self.touch_offset_y = touch.y - self.y
+            self.touch_down_x = touch.x
+            self.touch_down_y = touch.y
+            self.am_touched = True
+            if tracing.enabled:
+                tracing.instant("touch_down", {"widget": tracing.widget_label(self)})
+            if touch.is_double_tap:
+                self.is_double_tap = True
 
     def on_touch_up(self, mouse_motion_event):
         """
@@ -274,6 +531,10 @@ class DragNDropWidget(Widget):
         if self.touch_up_event_start == mouse_motion_event.time_start:
             return
         self.touch_up_event_start = mouse_motion_event.time_start
+        if self._inertia_event is not None or self.drop_pending:
+            # Another touch, while the last drag is still gliding or waiting to hear
+            # how its drop went; see on_touch_down.
+            return
         if not self.am_touched:
             # Only respond to long touches.
             debug.print(self, "NOT touched", level=DEBUG_TOUCH_UP)
@@ -300,6 +561,13 @@ class DragNDropWidget(Widget):
             # NOTE: If I don't do this, then I can click on a finished, fading widget.
             self._dragged = False
             # NOTE: ...that would cause an Attribute Error
+            # The release is a sample too: if the touch was held still before it came
+            # up, the moves are too old to count and the release velocity is zero.
+            self.pointer_history.append(
+                mouse_motion_event.time_end, mouse_motion_event.x, mouse_motion_event.y)
+            if self.inertial_release and self.pointer_history.speed() >= self.inertia_min_speed:
+                self.start_inertia(mouse_motion_event)
+                return
             self.dispatch("on_drag_finish", mouse_motion_event)
             return
             # TODO: Is this right? How do I send on_touch_up after
@@ -321,61 +589,92 @@ class DragNDropWidget(Widget):
 
     # TODO: Need to set         Window.bind(mouse_pos=self.on_motion)
     # TODO: The functions are Properties, so I can do this when they're set!!!
+    def drag_start_threshold_passed(self, touch):
+        """
+        :param touch: a move of the touch that went down on us, in parent coordinates
+        :return: True if the move is far enough from where the touch went down for
+        the drag to start.
+        """
+        if self.drag_start_policy != "distance":
+            return True
+        dx = touch.x - self.touch_down_x
+        dy = touch.y - self.touch_down_y
+        return dx * dx + dy * dy > self.drag_start_distance * self.drag_start_distance
+
     def on_touch_move(the_widget, mouse_motion_event):
         """
         As per the Kivy docs (under Widget), mouse_motion_event
         is in parent coordinates.
 
+        Kivy sends every move to every widget, so only the widget the touch went down
+        on goes any further.
         :param mouse_motion_event:
         :return:
         """
-        global DEBUG_TOUCH_MOVE
-        if the_widget.am_touched:
-            debug.print("MOVING", the_widget.text, level=DEBUG_TOUCH_MOVE)
-            if not the_widget._dragged:
-                the_widget.dispatch("on_drag_start", mouse_motion_event)
-        else:
+        if not the_widget.am_touched:
             # debug.print("Not touched:", the_widget.text, level=DEBUG_TOUCH_MOVE)
             return
+        if the_widget._inertia_event is not None or the_widget.drop_pending:
+            # am_touched is left over from the last drag; see on_touch_down.
+            return
+        the_widget.touched_move(mouse_motion_event)
+
+    @stats.timed("on_touch_move")
+    @tracing.traced("move")
+    def touched_move(the_widget, mouse_motion_event):
+        """
+        A move of the touch that went down on us: start the drag once the touch has
+        gone far enough, and then move with it.
+        """
+        global DEBUG_TOUCH_MOVE
+        debug.print("MOVING", lazy(getattr, the_widget, "text", the_widget), level=DEBUG_TOUCH_MOVE)
+        if not the_widget._dragged:
+            if not the_widget.drag_start_threshold_passed(mouse_motion_event):
+                return
+            the_widget.dispatch("on_drag_start", mouse_motion_event)
         if not the_widget._dragged:
             return
         the_widget._move_counter += 1
+        the_widget.pointer_history.append(
+            mouse_motion_event.time_update, mouse_motion_event.x, mouse_motion_event.y)
         if the_widget._draggable and the_widget._dragged:
             # if the_widget._dragged and the_widget._draggable:
             x = mouse_motion_event.x - the_widget.touch_offset_x
             y = mouse_motion_event.y - the_widget.touch_offset_y
             # TODO: Correct this debug_flag temporary print.
-            debug.print ("widget pos:", x, y, "parent:", the_widget.parent,
-                         "window:", Window.mouse_pos[0], Window.mouse_pos[1], level=DEBUG_TOUCH_MOVE)
-
-            if the_widget.min_x != -1:
-                if x <= the_widget.min_x:
-                    x = the_widget.min_x
-                if x > the_widget.max_x:
-                    x = the_widget.max_x
-                if y <= the_widget.min_y:
-                    y = the_widget.min_y
-                if y > the_widget.max_y:
-                    y = the_widget.max_y
+            if debug.enabled(DEBUG_TOUCH_MOVE):
+                debug.print ("widget pos:", x, y, "parent:", the_widget.parent,
+                             "window:", get_window().mouse_pos, level=DEBUG_TOUCH_MOVE)
+
+            (x, y) = the_widget.clamp_position(x, y)
+            if the_widget.magnetic_snap:
+                (x, y) = the_widget.snap_position(x, y)
             the_widget.pos = (x, y)
             # SPECIAL! Takes a herky-jerky GUI and makes it smoooooth....
             the_widget.canvas.ask_update()
+            if the_widget.approach_horizon > 0:
+                the_widget.predict_approach()
             # Execute widget's while_dragging_func while dragging the widget
             if the_widget.while_dragging_func is not None:
-                the_widget.while_dragging_func(the_widget, mouse_motion_event)
+                call_or_post(the_widget.schedule_callbacks, the_widget.while_dragging_func,
+                             (the_widget, mouse_motion_event), key=(the_widget, "while_dragging"))
             # Execute while_dragging_func for all drag destinations that are in the same
             # drop group as the widget, that the widget passes over.
-            for drop_group in draggables_dict:
-                if draggables_dict[drop_group].get(the_widget):
-                    if drag_destinations_dict.get(drop_group) is not None:
-                        for drag_destination in drag_destinations_dict.get(drop_group):
-                            if drag_destination.while_dragging_func is not None:
-                                if drag_destination.absolute_collide_point(Window.mouse_pos[0], Window.mouse_pos[1]):
-                                    debug.print("Window mouse:", Window.mouse_pos[0], Window.mouse_pos[1],
-                                                "Touch pos to Window:",
-                                                the_widget.to_window(mouse_motion_event.x, mouse_motion_event.y),
-                                                level=DEBUG_TOUCH_MOVE)
-                                    drag_destination.while_dragging_func(the_widget, mouse_motion_event)
+            mask = the_widget.drop_group_mask
+            if mask and while_dragging_destinations:
+                (mouse_x, mouse_y) = get_window().mouse_pos
+                for drag_destination in list(while_dragging_destinations):
+                    if drag_destination.drop_group_mask & mask:
+                        if drag_destination.absolute_collide_point(mouse_x, mouse_y):
+                            debug.print("Window mouse:", mouse_x, mouse_y,
+                                        "Touch pos to Window:",
+                                        lazy(the_widget.to_window, mouse_motion_event.x,
+                                             mouse_motion_event.y),
+                                        level=DEBUG_TOUCH_MOVE)
+                            call_or_post(the_widget.schedule_callbacks,
+                                         drag_destination.while_dragging_func,
+                                         (the_widget, mouse_motion_event),
+                                         key=(drag_destination, "while_dragging"))
 
     # DEPRECATED.................................................................
     # No longer used. ...But what is the purpose of bind_functions? Pavel wrote
@@ -391,7 +690,7 @@ class DragNDropWidget(Widget):
             arguments = []
         if bind_functions is None:
             bind_functions = []
-        Window.bind(mouse_pos=self.on_motion)
+        get_window().bind(mouse_pos=self.on_motion)
         self.easy_access_dnd_function_over = function_to_do_over
         self.easy_access_dnd_function_flee = function_to_do_flee
         self.easy_access_dnd_function_outside = function_to_do_outside
@@ -418,6 +717,8 @@ n                  (This means it left that widget without dispatching on_motion
         """
         if self._dragged:
             return
+        if stats.enabled:
+            stats.count("collision_tests")
         if self.collide_point(*self.to_widget(motion_xy_tuple[0], motion_xy_tuple[1])):
             if DragNDropWidget.widget_entered is not self:
                 if DragNDropWidget.widget_entered is not None:
@@ -441,7 +742,9 @@ n                  (This means it left that widget without dispatching on_motion
         :return:
         """
         if self.motion_flee_widget_func is not None:
-            self.motion_flee_widget_func(self, self.motion_flee_widget_args)
+            call_or_post(self.schedule_callbacks, self.motion_flee_widget_func,
+                         (self, self.motion_flee_widget_args), PRIORITY_HIGH,
+                         key=(self, "flee"), annihilates=(self, "over"))
             # TODO: WAS... adding this binds. Not sure why.
             # self.easy_access_dnd_function_binds)
         else:
@@ -455,7 +758,9 @@ n                  (This means it left that widget without dispatching on_motion
         :return:
         """
         if self.motion_over_widget_func is not None:
-            self.motion_over_widget_func(self, self.motion_over_widget_args)
+            call_or_post(self.schedule_callbacks, self.motion_over_widget_func,
+                         (self, self.motion_over_widget_args), PRIORITY_HIGH,
+                         key=(self, "over"), annihilates=(self, "flee"))
             # self.easy_access_dnd_function_binds)
         else:
             pass
@@ -464,7 +769,9 @@ n                  (This means it left that widget without dispatching on_motion
     def on_motion_outside(self, motion_xy_tuple):
         try:
             if self.motion_outside_widget_func is not None:
-                self.motion_outside_widget_func(self, self.motion_outside_widget_args)
+                call_or_post(self.schedule_callbacks, self.motion_outside_widget_func,
+                             (self, self.motion_outside_widget_args), PRIORITY_LOW,
+                             key=(self, "outside"))
             else:
                 pass
                 # debug.print "FUNCTION OUT NONE"
@@ -476,6 +783,8 @@ n                  (This means it left that widget without dispatching on_motion
         copy_of_self.parent = self.parent
         copy_of_self.droppable_zone_objects = self.droppable_zone_objects
         copy_of_self.bound_zone_objects = self.bound_zone_objects
+        copy_of_self.bound_zone_mode = self.bound_zone_mode
+        copy_of_self.bound_polygons = self.bound_polygons
         copy_of_self.drag_opacity = self.drag_opacity
         copy_of_self.drop_func = self.drop_func
         copy_of_self.drop_args = self.drop_args
@@ -492,6 +801,28 @@ n                  (This means it left that widget without dispatching on_motion
         copy_of_self.touch_offset_y = self.touch_offset_y
         copy_of_self.drop_recipients = self.drop_recipients
         copy_of_self.drop_group = self.drop_group
+        copy_of_self.drop_groups = self.drop_groups
+        copy_of_self.drop_group_names = self.drop_group_names
+        copy_of_self.drop_group_mask = self.drop_group_mask
+        copy_of_self.drag_kind = self.drag_kind
+        copy_of_self.drop_resolution = self.drop_resolution
+        copy_of_self.snap_radius = self.snap_radius
+        copy_of_self.magnetic_snap = self.magnetic_snap
+        copy_of_self.pointer_history_size = self.pointer_history_size
+        copy_of_self.approach_horizon = self.approach_horizon
+        copy_of_self.inertial_release = self.inertial_release
+        copy_of_self.inertia_friction = self.inertia_friction
+        copy_of_self.inertia_min_speed = self.inertia_min_speed
+        copy_of_self.inertia_capture = self.inertia_capture
+        copy_of_self.drag_start_policy = self.drag_start_policy
+        copy_of_self.drag_start_delay = self.drag_start_delay
+        copy_of_self.drag_start_distance = self.drag_start_distance
+        copy_of_self.drop_in_thread = self.drop_in_thread
+        copy_of_self.drop_pending_opacity = self.drop_pending_opacity
+        copy_of_self.defer_drop_dispatch = self.defer_drop_dispatch
+        copy_of_self.schedule_callbacks = self.schedule_callbacks
+        copy_of_self.touch_down_x = self.touch_down_x
+        copy_of_self.touch_down_y = self.touch_down_y
         copy_of_self.am_touched = self.am_touched
         copy_of_self._dragged = self._dragged
         copy_of_self.is_double_tap = self.is_double_tap
@@ -499,7 +830,9 @@ n                  (This means it left that widget without dispatching on_motion
         copy_of_self.can_drop_into_parent = self.can_drop_into_parent
         copy_of_self.rebirth_failed_drop = self.rebirth_failed_drop
         copy_of_self.close_on_fail = self.close_on_fail
+        copy_of_self.motion_tracking = self.motion_tracking
 
+    @tracing.traced("drag_start")
     def on_drag_start(self, mouse_motion_event):
         """
         When a drag starts, the widget is removed from its parent and added to the root window.
@@ -514,18 +847,22 @@ n                  (This means it left that widget without dispatching on_motion
             return
         debug.print("STARTING DRAG. Remove?", self.remove_on_drag, level=DEBUG_DRAG_START)
         debug.print("is_double_tap:", self.is_double_tap, level=DEBUG_DRAG_START)
-        debug.print("What about class", self, "drag_start_func?:", str(self.drag_start_func), level=DEBUG_DRAG_START)
+        debug.print("What about class", self, "drag_start_func?:", self.drag_start_func, level=DEBUG_DRAG_START)
         debug.print("Event:", mouse_motion_event, level=DEBUG_DRAG_START)
         if self.remove_on_drag:
             self.set_drag_start_state()
-            debug.print("remove_on_drag, What about class", self, "drag_start_func?:", str(self.drag_start_func), level=DEBUG_DRAG_START)
+            debug.print("remove_on_drag, What about class", self, "drag_start_func?:", self.drag_start_func, level=DEBUG_DRAG_START)
             if self.drag_start_func is not None:
-                self.drag_start_func(self.drag_start_args)
+                if stats.enabled:
+                    stats.count("callbacks_dispatched")
+                hooks.call_hook("drag_start_func", self, self.drag_start_func,
+                                self.drag_start_args)
             self.root_window = self.parent.get_root_window()
             self.root_parent(self)
         else:
             #create copy of object to drag
-            debug.print("Create copy, kivydnd copy of: ", self.text, self, level=DEBUG_DRAG_START)
+            debug.print("Create copy, kivydnd copy of: ", lazy(getattr, self, "text", ""), self,
+                        level=DEBUG_DRAG_START)
             # copy_of_self = copy.deepcopy(self)
             copy_of_self = self.kivydnd_copy()
             # We'll handle those variables that are common to ALL d-n-d
@@ -536,7 +873,10 @@ n                  (This means it left that widget without dispatching on_motion
             self._up_event_count = 0
             copy_of_self.set_drag_start_state()
             if copy_of_self.drag_start_func is not None:
-                copy_of_self.drag_start_func(copy_of_self.drag_start_args, copy=copy_of_self)
+                if stats.enabled:
+                    stats.count("callbacks_dispatched")
+                hooks.call_hook("drag_start_func", copy_of_self, copy_of_self.drag_start_func,
+                                copy_of_self.drag_start_args, copy=copy_of_self)
             copy_of_self.root_window = self.parent.get_root_window()
             # the final child class MUST implement __deepcopy__
             # IF self.remove_on_drag == False !!! In this case this is
@@ -545,16 +885,22 @@ n                  (This means it left that widget without dispatching on_motion
             # self._old_parent.add_widget(copy_of_self, index=self._old_index)
             copy_of_self.root_parent(copy_of_self)
             copy_of_self.pos = self.pos
-            debug.print("kivydnd copy: ", copy_of_self.text, copy_of_self, level=DEBUG_DRAG_START)
+            debug.print("kivydnd copy: ", lazy(getattr, copy_of_self, "text", ""), copy_of_self,
+                        level=DEBUG_DRAG_START)
 
     def absolute_collide_point(self, event_x, event_y):
         global DEBUG_COLLIDE_POINT
+        if stats.enabled:
+            stats.count("collision_tests")
+            stats.count("to_window_calls")
         (my_x, my_y)=self.to_window(self.x, self.y)
         # debug.print "absolute_collide_point:", self, "x,y,w,h:", my_x, my_y, self.right + my_x, my_y + self.top
-        if event_x != Window.mouse_pos[0] or event_y != Window.mouse_pos[1]:
+        if debug.enabled(DEBUG_COLLIDE_POINT) and (event_x, event_y) != tuple(get_window().mouse_pos):
             debug.print ("absolute_collide_point:", self, "x,y,w,h:", my_x, my_y, self.right + my_x, my_y + self.top, level=DEBUG_COLLIDE_POINT)
         return my_x <= event_x <= (self.width + my_x) and my_y <= event_y <= (my_y + self.height)
 
+    @stats.timed("on_drag_finish")
+    @tracing.traced("drop_resolution")
     def on_drag_finish(self, mouse_motion_event):
         global DEBUG_DRAG_FINISH
         # Don't worry, opacity will be properly set in set_drag_finish_state()
@@ -564,10 +910,12 @@ n                  (This means it left that widget without dispatching on_motion
         debug.print ("self:", self, "is_double_tap?", self.is_double_tap, level=DEBUG_DRAG_FINISH)
         debug.print ("Dragged?", self._dragged, "Draggable?", self._draggable, level=DEBUG_DRAG_FINISH)
         debug.print ("================================================================", level=DEBUG_DRAG_FINISH)
+        drag_finished(self)
         self.opacity = 1.0
-        drag_destination_list = []
         self.found_drop_recipients_ok_dict = {}
         # del self.drop_recipients[:]
+        if stats.enabled:
+            stats.count("to_window_calls")
         (touch_window_x, touch_window_y) = self.to_window(self.touch_x, self.touch_y)
         # -------------------------------------------------------------------------
         # --- assemble list of possible drag destinations
@@ -575,27 +923,25 @@ n                  (This means it left that widget without dispatching on_motion
         # they've been added to droppable_zone_objects
         # debug.print "on_drag_finish: DRAGGABLES_DICT:", draggables_dict
         debug.print("draggables_dict:", draggables_dict, level=DEBUG_DRAG_FINISH)
-        for drop_group in draggables_dict:
-            if draggables_dict[drop_group].get(self):
-                if drop_group in drag_destinations_dict:
-                    for drop_recipient in drag_destinations_dict[drop_group]:
-                        if not drop_recipient in drag_destination_list:
-                            drag_destination_list.append(drop_recipient)
         debug.print("drag_destinations_dict:", drag_destinations_dict, level=DEBUG_DRAG_FINISH)
         # ..>Debugging only
-        for drop_group in drag_destinations_dict:
-            for obj in drag_destinations_dict[drop_group]:
-                debug.print("Contents: Title", debug_widget_title(obj), "object", obj, level=DEBUG_DRAG_FINISH)
+        if debug.enabled(DEBUG_DRAG_FINISH):
+            for drop_group in drag_destinations_dict:
+                for obj in drag_destinations_dict[drop_group]:
+                    debug.print("Contents: Title", debug_widget_title(obj), "object", obj, level=DEBUG_DRAG_FINISH)
         # ..<debugging
-        for drop_group in drag_destinations_dict:
-            if draggables_dict[drop_group].get(self):
-                for drop_recipient in drag_destinations_dict[drop_group]:
-                    if not drop_recipient in drag_destination_list:
-                        drag_destination_list.append(drop_recipient)
         debug.print("droppable_zone_objects:", self.droppable_zone_objects, level=DEBUG_DRAG_FINISH)
-        for obj in self.droppable_zone_objects:
-            if not obj in drag_destination_list:
-                drag_destination_list.append(obj)
+        hit_test_start = tracing.now_us() if tracing.enabled else None
+        # With magnetic_snap, the user sees us sitting on snap_target; drop there,
+        # wherever the touch came up.
+        snapped_to = self.snap_target if self.magnetic_snap else None
+        if snapped_to is not None:
+            drag_destination_list = [snapped_to]
+        elif self.drop_resolution == "overlap":
+            drag_destination_list = self.drop_candidates_near(window_rect(self))
+        else:
+            drag_destination_list = self.drop_candidates_near(
+                (touch_window_x, touch_window_y, 0, 0), rescan=self.drop_resolution == "point")
         # for obj in drag_destination_list:
         #    debug.print ("Possible drop destination:", obj.text)
         # --- end of assemble list
@@ -603,39 +949,22 @@ n                  (This means it left that widget without dispatching on_motion
         # -------------------------------------------------------------------------
         # --- check which object(s) did receive this drop.
         debug.print("drag_destination_list:", drag_destination_list, level=DEBUG_DRAG_FINISH)
-        for obj in drag_destination_list:
-
-            debug.print("Title:", debug_widget_title(self), level=DEBUG_DRAG_FINISH)
-            debug.print("Touch position:", self.touch_x, self.touch_y,
-                        "in-Window position:", touch_window_x, touch_window_y,
-                        "Window:", Window.mouse_pos[0], Window.mouse_pos[1],
-                        level=DEBUG_DRAG_FINISH)
-            debug.print("Check if drop ok: touch:", touch_window_x, touch_window_y,
-                        "Drag Destination Object:", obj, end=" ",
-                        level=DEBUG_DRAG_FINISH)
-            debug.print("Position in Window:",
-                        obj.to_window(obj.x, obj.y), "WxH:", obj.width, obj.height, end=" ",
-                        level=DEBUG_DRAG_FINISH)
-            # TODO: IF object does not subclass DropDestination, it won't have this
-            # TODO: method defined!
-            if self.widget_absolute_collide_point(obj, touch_window_x, touch_window_y):
-                debug.print("COLLIDE: True", end=" ", level=DEBUG_DRAG_FINISH)
-                if hasattr(obj, 'is_drop_eligible'):
-                    if obj.is_drop_eligible is False:
-                        debug.print("ELIGIBLE?", obj.is_drop_eligible, obj, level=DEBUG_DRAG_FINISH)
-                        self.found_drop_recipients_ok_dict[obj] = False
-                        continue
-                    #else:
-                    #    pass
-                if obj is self._old_parent and not self.can_drop_into_parent:
-                    self.found_drop_recipients_ok_dict[obj] = False
-                    debug.print("OK: False", level=DEBUG_DRAG_FINISH)
-                else:
-                    self.found_drop_recipients_ok_dict[obj] = True
-                    debug.print("OK: True", level=DEBUG_DRAG_FINISH)
-            else:
-                debug.print("COLLIDE: False", level=DEBUG_DRAG_FINISH)
-                pass
+        if snapped_to is not None:
+            self.found_drop_recipients_ok_dict[snapped_to] = self.drop_recipient_ok(snapped_to)
+        elif self.drop_resolution == "overlap":
+            self.find_drop_recipients_by_overlap(drag_destination_list)
+        elif self.drop_resolution == "nearest":
+            drop_recipient = self.nearest_drop_recipient(touch_window_x, touch_window_y, self.snap_radius)
+            debug.print("NEAREST:", drop_recipient, level=DEBUG_DRAG_FINISH)
+            if drop_recipient is not None:
+                self.found_drop_recipients_ok_dict[drop_recipient] = True
+        else:
+            self.find_drop_recipients_at_point(drag_destination_list, touch_window_x, touch_window_y)
+        if hit_test_start is not None:
+            tracing.complete("hit_test", hit_test_start,
+                             {"widget": tracing.widget_label(self),
+                              "candidates": len(drag_destination_list),
+                              "recipients": len(self.found_drop_recipients_ok_dict)})
         # --- end of check
 
         # -------------------------------------------------------------------------
@@ -668,6 +997,27 @@ n                  (This means it left that widget without dispatching on_motion
 
         if not got_one_drop_not_parent:
             drop_ok_do_animation = False
+        if self.defer_drop_dispatch:
+            # The result is decided; tell everyone about it on a coming frame, and
+            # let go of the touch now.
+            self.drop_pending = True
+            frame_scheduler.schedule(self.dispatch_drop_result, got_one_successful_drop,
+                                     drop_ok_do_animation, not_drop_ok_do_animation)
+            return
+        self.dispatch_drop_result(got_one_successful_drop, drop_ok_do_animation,
+                                  not_drop_ok_do_animation)
+
+    @tracing.traced("drop_dispatch")
+    def dispatch_drop_result(self, got_one_successful_drop, drop_ok_do_animation,
+                             not_drop_ok_do_animation):
+        """
+        The second half of on_drag_finish: the drop recipients have been found (in
+        found_drop_recipients_ok_dict); run the drop functions and animations.
+        With defer_drop_dispatch this runs from the frame scheduler, a frame or more
+        after the touch came up.
+        """
+        global DEBUG_DRAG_FINISH
+        self.drop_pending = False
         # -------------------------------------------------------------------------
         # Perform after-drop functions
         if got_one_successful_drop:
@@ -690,9 +1040,193 @@ n                  (This means it left that widget without dispatching on_motion
 
         debug.print ("THE END. Drag finished, me:", self, "parent:", self.parent, level=DEBUG_DRAG_FINISH)
 
+    def find_drop_recipients_at_point(self, drag_destination_list, touch_window_x, touch_window_y):
+        """
+        drop_resolution "point": every destination under the point where the touch came
+        up is a drop recipient, if it will take us.
+        :param drag_destination_list: the candidates, from drop_candidates()
+        :param touch_window_x: x of the touch, in Window coordinates
+        :param touch_window_y: y of the touch, in Window coordinates
+        :return: nothing; fills in self.found_drop_recipients_ok_dict
+        """
+        global DEBUG_DRAG_FINISH
+        debugging = debug.enabled(DEBUG_DRAG_FINISH)
+        for obj in drag_destination_list:
+            if debugging:
+                debug.print("Title:", debug_widget_title(self), level=DEBUG_DRAG_FINISH)
+                debug.print("Touch position:", self.touch_x, self.touch_y,
+                            "in-Window position:", touch_window_x, touch_window_y,
+                            "Window:", get_window().mouse_pos,
+                            level=DEBUG_DRAG_FINISH)
+                debug.print("Check if drop ok: touch:", touch_window_x, touch_window_y,
+                            "Drag Destination Object:", obj, end=" ",
+                            level=DEBUG_DRAG_FINISH)
+                debug.print("Position in Window:",
+                            obj.to_window(obj.x, obj.y), "WxH:", obj.width, obj.height, end=" ",
+                            level=DEBUG_DRAG_FINISH)
+            # TODO: IF object does not subclass DropDestination, it won't have this
+            # TODO: method defined!
+            if self.widget_absolute_collide_point(obj, touch_window_x, touch_window_y):
+                debug.print("COLLIDE: True", end=" ", level=DEBUG_DRAG_FINISH)
+                self.found_drop_recipients_ok_dict[obj] = self.drop_recipient_ok(obj)
+                debug.print("OK:", self.found_drop_recipients_ok_dict[obj], level=DEBUG_DRAG_FINISH)
+            else:
+                debug.print("COLLIDE: False", level=DEBUG_DRAG_FINISH)
+                pass
+
+    def find_drop_recipients_by_overlap(self, drag_destination_list):
+        """
+        drop_resolution "overlap": instead of looking at the point where the touch came
+        up, pick the destination that the dragged widget covers the most. Destinations
+        are tried from the largest intersection down; those that won't take us are
+        recorded as failed, and the first that will is the single drop recipient.
+        :param drag_destination_list: the candidates, from drop_candidates()
+        :return: nothing; fills in self.found_drop_recipients_ok_dict
+        """
+        rects = [destination_index.rect(obj) if obj in destination_index else window_rect(obj)
+                 for obj in drag_destination_list]
+        areas = overlap_areas(window_rect(self), rects)
+        order = sorted(range(len(areas)), key=lambda i: areas[i], reverse=True)
+        for i in order:
+            if areas[i] <= 0:
+                break
+            obj = drag_destination_list[i]
+            dropped_ok = self.drop_recipient_ok(obj)
+            debug.print("OVERLAP:", areas[i], obj, "OK:", dropped_ok, level=DEBUG_DRAG_FINISH)
+            self.found_drop_recipients_ok_dict[obj] = dropped_ok
+            if dropped_ok:
+                break
+
+    def nearest_drop_recipient(self, x, y, radius):
+        """
+        Find the destination nearest to a point that will take us. Drop group
+        destinations are found through the destination index, so only those near the
+        point are looked at; droppable_zone_objects are checked one by one.
+        :param x: x of the point, Window coordinates
+        :param y: y of the point, Window coordinates
+        :param radius: maximum distance from the point to the edge of the destination
+        :return: the destination, or None
+        """
+        best = None
+        best_distance = radius
+        mask = self.drop_group_mask
+        if mask:
+            found = destination_index.nearest(
+                x, y, radius,
+                accept=lambda obj: obj is not self and obj.drop_group_mask & mask and
+                self.drop_recipient_ok(obj), revalidate=True)
+            if found is not None:
+                (best, best_distance) = found
+        for obj in self.droppable_zone_objects:
+            distance = rect_distance(window_rect(obj), x, y)
+            if distance <= best_distance and (best is None or distance < best_distance):
+                if self.drop_recipient_ok(obj):
+                    best = obj
+                    best_distance = distance
+        return best
+
+    def predict_approach(self):
+        """
+        Extrapolate the pointer approach_horizon seconds ahead at its current velocity,
+        and dispatch on_drag_approach to each DropDestination in our drop groups that
+        the predicted path enters. A destination hears about it once, until we stop
+        heading for it.
+        :return:
+        """
+        latest = self.pointer_history.latest()
+        mask = self.drop_group_mask
+        if latest is None or not mask:
+            return
+        (t, x, y) = latest
+        (vx, vy) = self.pointer_history.velocity()
+        horizon = self.approach_horizon
+        approaching = {}
+        for (destination, t_enter, t_exit) in destination_index.query_segment(
+                x, y, x + vx * horizon, y + vy * horizon):
+            # t_enter 0: the pointer is already there, and on_motion_over has it covered.
+            if t_enter <= 0 or destination is self or not destination.drop_group_mask & mask:
+                continue
+            approaching[destination] = True
+            if destination not in self._approached:
+                destination.dispatch("on_drag_approach", self, t_enter * horizon)
+        self._approached = approaching
+
+    def snap_position(self, x, y):
+        """
+        magnetic_snap: if a destination that would take us is within snap_radius of
+        our center, pull our center onto its center and remember it in snap_target
+        (bind to snap_target to highlight it).
+        :param x: the x we're about to move to, in our parent's coordinates
+        :param y: the y we're about to move to, in our parent's coordinates
+        :return: (x, y) to move to instead, in our parent's coordinates
+        """
+        if stats.enabled:
+            stats.count("to_window_calls")
+        (origin_x, origin_y) = self.to_window(0, 0)
+        center_x = x + origin_x + self.width / 2.0
+        center_y = y + origin_y + self.height / 2.0
+        target = self.nearest_drop_recipient(center_x, center_y, self.snap_radius)
+        self.snap_target = target
+        if target is None:
+            return (x, y)
+        if target in destination_index:
+            (anchor_x, anchor_y) = rect_center(destination_index.rect(target))
+        else:
+            (anchor_x, anchor_y) = rect_center(window_rect(target))
+        return (anchor_x - self.width / 2.0 - origin_x, anchor_y - self.height / 2.0 - origin_y)
+
+    def drop_recipient_ok(self, obj):
+        """
+        Decide whether a widget we were dropped onto will take us.
+        DropDestinations answer through their accepts() method, which memoizes its
+        answer per drag_type_key(). Other widgets are checked for an
+        is_drop_eligible attribute. Dropping back onto our old parent requires
+        can_drop_into_parent.
+        :param obj: the drop recipient
+        :return: True or False
+        """
+        accepts = getattr(obj, "accepts", None)
+        if accepts is not None:
+            if not accepts(self):
+                debug.print("ACCEPTS? False", obj, level=DEBUG_DRAG_FINISH)
+                return False
+        elif getattr(obj, "is_drop_eligible", True) is False:
+            debug.print("ELIGIBLE? False", obj, level=DEBUG_DRAG_FINISH)
+            return False
+        if obj is self._old_parent and not self.can_drop_into_parent:
+            return False
+        return True
+
+    def drag_type_key(self):
+        """
+        :return: the key under which DropDestination.accepts() caches its answer for
+        this widget: drag_kind if it is set, else the widget's class.
+        """
+        if self.drag_kind:
+            return self.drag_kind
+        return self.__class__
+
     def widget_absolute_collide_point(self, widget, x, y):
-        (widget_x, widget_y) = widget.to_window(widget.x, widget.y)
-        return widget_x <= x <= (widget.width + widget_x) and widget_y <= y <= (widget_y + widget.height)
+        """
+        :param widget: a drop destination
+        :param x: x of a point, Window coordinates
+        :param y: y of a point, Window coordinates
+        :return: True if the point is over the widget. The widget's bounding box is
+        checked first (from the destination index, if it's there); only if the point is
+        inside it does a DropDestination get to test its hit_shape.
+        """
+        if stats.enabled:
+            stats.count("collision_tests")
+        if widget in destination_index:
+            rect = destination_index.rect(widget)
+        else:
+            rect = window_rect(widget)
+        if not rect_contains(rect, x, y):
+            return False
+        hit_test = getattr(widget, "hit_test", None)
+        if hit_test is None:
+            return True
+        return hit_test(x - rect[0], y - rect[1])
 
     def un_root_me(self, widget="dumb", anim="dumb2"):
         global DEBUG_UNROOT_ME
@@ -743,6 +1277,8 @@ n                  (This means it left that widget without dispatching on_motion
         anim = Animation(pos=self._old_drag_pos,
                          duration=self.not_drop_ok_animation_time, t="in_quad")
         anim.bind(on_complete=self.post_unsuccessful_animation)
+        if tracing.enabled:
+            tracing.begin_async("animation", id(self), {"widget": tracing.widget_label(self)})
         anim.start(self)
 
     def un_root_and_close(self, animation_object=None, same_as_self=None):
@@ -760,13 +1296,17 @@ n                  (This means it left that widget without dispatching on_motion
         if animation is True:
             self.animate_failed_drop()
         if self.failed_drop_func is not None:
-            self.failed_drop_func(self, *self.failed_drop_args)
+            if stats.enabled:
+                stats.count("callbacks_dispatched")
+            hooks.call_hook("failed_drop_func", self, self.failed_drop_func,
+                            self, *self.failed_drop_args)
         # TODO: CHECK THIS MIKE
         if animation is not True: # The animation will call this, so only call here if not animating
             self.post_unsuccessful_animation()  # Simply resets some flags; opacity will be set after the animation
         # TODO: PERFORM THIS HERE? Moved from post_unsuccessful_animation
         # self.set_drag_finish_state(False)
 
+    @tracing.traced("post_drop")
     def post_unsuccessful_animation(self, animation=None, widget=None):
         """
         A bit of a misnomer, this is called to clean up after any unsuccessful drop,
@@ -776,6 +1316,8 @@ n                  (This means it left that widget without dispatching on_motion
         :param widget: the widget that this is run from, or nothing (not used)
         :return: nothing
         """
+        if animation is not None and tracing.enabled:
+            tracing.end_async("animation", id(self))
         if self.remove_on_drag:
             if self.rebirth_failed_drop:  # True by default
                 self.reborn()
@@ -806,25 +1348,130 @@ n                  (This means it left that widget without dispatching on_motion
         debug.print ("on_successful_drop 1, Parent:", self.parent, "object: ", self, "copy?", self.copy, level=DEBUG_SUCCESSFUL_DROP)
         debug.print ("object:", self, "added args:", *self.drop_args, level=DEBUG_SUCCESSFUL_DROP)
         debug.print ("is_double_tap?", self.is_double_tap, level=DEBUG_SUCCESSFUL_DROP)
-        if animation is True:
-            anim = Animation(opacity=0, duration=self.drop_ok_animation_time, t="in_quad")
-            anim.bind(on_complete=self.post_successful_animation)
-            anim.start(self)
         # traceback.debug.print_stack()
+        # list of (widget whose drop_func it is, what call_drop_handler returned)
+        pending = []
         if self.drop_func is not None:
             debug.print (hex(id(self)), "Calling drop_func...", level=DEBUG_SUCCESSFUL_DROP)
             debug.print ("With args:", self, *self.drop_args, level=DEBUG_SUCCESSFUL_DROP)
-            self.drop_func(self, *self.drop_args)
+            pending.append((self, self.call_drop_handler("drop_func", self, self.drop_func,
+                                                         self, *self.drop_args)))
         for found_drop_recipient, dropped_ok in self.found_drop_recipients_ok_dict.items():
             if dropped_ok:
                 if getattr(found_drop_recipient, "drop_func", None) is not None:
                     debug.print (hex(id(self)), "Calling recipient's drop_func", level=DEBUG_SUCCESSFUL_DROP)
-                    found_drop_recipient.drop_func(self)
+                    pending.append((found_drop_recipient,
+                                    self.call_drop_handler("drop_func", found_drop_recipient,
+                                                           found_drop_recipient.drop_func, self)))
+        failed = any(result is False for (widget, result) in pending)
+        self._accepted_by = [widget for (widget, result) in pending
+                             if result is None and widget is not self]
+        pending = [(widget, result) for (widget, result) in pending
+                   if result is not None and result is not False]
+        if pending:
+            self.wait_for_drop_handlers(pending, animation, not failed)
+        elif failed:
+            self.roll_back_drop()
+        else:
+            self.finish_successful_drop(animation)
+        debug.print ("on_successful_drop: === end ========================================================", level=DEBUG_SUCCESSFUL_DROP)
+
+    def finish_successful_drop(self, animation=True):
+        """
+        The drop handlers are done and happy: fade out (if animation), then clean up in
+        post_successful_animation.
+        """
+        self._accepted_by = []
         # self.set_drag_finish_state(False) # Opacity will be set after the animation.
-        if animation is not True:
+        if animation is True:
+            anim = Animation(opacity=0, duration=self.drop_ok_animation_time, t="in_quad")
+            anim.bind(on_complete=self.post_successful_animation)
+            if tracing.enabled:
+                tracing.begin_async("animation", id(self), {"widget": tracing.widget_label(self)})
+            anim.start(self)
+        else:
             self.post_successful_animation(None, self)
-        debug.print ("on_successful_drop: === end ========================================================", level=DEBUG_SUCCESSFUL_DROP)
 
+    def call_drop_handler(self, hook, widget, func, *args):
+        """
+        Run a drop_func or post_drop_func. With drop_in_thread it runs on the drop
+        thread pool (see async_drop.py), so it must not touch any widgets. With
+        defer_drop_dispatch it's queued on the frame scheduler.
+        A handler that returns False has failed, whichever way it ran: called here,
+        the False is handed back; run later, when_done() reports it as a failure.
+        :param hook: "drop_func" or "post_drop_func", for hooks.py
+        :param widget: the widget whose handler it is
+        :return: a Future or awaitable if the handler hasn't finished yet, False if it
+        finished and failed, else None.
+        """
+        if stats.enabled:
+            stats.count("callbacks_dispatched")
+        if self.drop_in_thread:
+            return run_in_thread(hooks.call_hook, hook, widget, func, *args)
+        if self.defer_drop_dispatch:
+            # One handler per turn of the frame scheduler, so several heavy ones
+            # are spread over frames.
+            return frame_scheduler.schedule(hooks.call_hook, hook, widget, func, *args)
+        result = hooks.call_hook(hook, widget, func, *args)
+        if is_deferred(result) or result is False:
+            return result
+        return None
+
+    def wait_for_drop_handlers(self, pending, animation, ok=True):
+        """
+        Some drop handlers are still running. Stay where we were dropped, with
+        drop_pending set and at drop_pending_opacity, until they have all finished.
+        If any of them fails (raises, or returns False) the drop is rolled back as
+        a failed drop: we go back to where we came from, and failed_drop_func is
+        called. Otherwise the drop goes ahead.
+        :param pending: list of (widget whose drop_func it is, Future or awaitable)
+        :param animation: whether to animate the successful drop
+        :param ok: False if a handler that has already finished failed
+        """
+        self.drop_pending = True
+        self._pending_handlers = len(pending)
+        self._pending_handlers_ok = ok
+        # Handlers that are only waiting their turn in the frame scheduler will be
+        # done in a frame or two; don't flicker for them.
+        if any(not isinstance(result, ScheduledCall) for (widget, result) in pending):
+            self.opacity = self.drop_pending_opacity
+        for (widget, result) in pending:
+            when_done(result, lambda ok, value, widget=widget:
+                      self.drop_handler_done(ok, animation, widget))
+
+    def drop_handler_done(self, ok, animation, widget=None):
+        """
+        :param widget: the widget whose drop_func has finished
+        """
+        self._pending_handlers -= 1
+        if not ok:
+            self._pending_handlers_ok = False
+        elif widget is not None and widget is not self:
+            self._accepted_by.append(widget)
+        if self._pending_handlers > 0:
+            return
+        self.drop_pending = False
+        if self._pending_handlers_ok:
+            self.finish_successful_drop(animation)
+        else:
+            self.roll_back_drop()
+
+    def roll_back_drop(self):
+        """
+        A drop handler failed, so the drop fails. The recipients whose drop_func did
+        take the drop are told first, through their drop_rolled_back_func(self), if
+        they have one.
+        """
+        debug.print("Drop handler failed, rolling back", self, level=DEBUG_SUCCESSFUL_DROP)
+        accepted_by = self._accepted_by
+        self._accepted_by = []
+        for recipient in accepted_by:
+            if getattr(recipient, "drop_rolled_back_func", None) is not None:
+                hooks.call_hook("drop_rolled_back_func", recipient,
+                                recipient.drop_rolled_back_func, self)
+        self.on_unsuccessful_drop(animation=self.not_drop_ok_do_animation)
+
+    @tracing.traced("post_drop")
     def post_successful_animation(self, animation, widget):
         """
         This is called to clean up after any successful drop's animation, but it's
@@ -835,6 +1482,8 @@ n                  (This means it left that widget without dispatching on_motion
         :return:
         """
         global DEBUG_POST_SUCCESSFUL_ANIM
+        if animation is not None and tracing.enabled:
+            tracing.end_async("animation", id(self))
         debug.print ("post_successful_animation 1, Parent:", self.parent, "object: ", self, "copy?", self.copy, level=DEBUG_POST_SUCCESSFUL_ANIM)
         self.un_root_me()
         debug.print ("post_successful_animation 2, Parent:", self.parent, "object: ", self, "copy?", self.copy, level=DEBUG_POST_SUCCESSFUL_ANIM)
@@ -842,5 +1491,9 @@ n                  (This means it left that widget without dispatching on_motion
         for found_drop_recipient, dropped_ok in self.found_drop_recipients_ok_dict.items():
             if dropped_ok:
                 if getattr(found_drop_recipient, "post_drop_func", None) is not None:
-                    found_drop_recipient.post_drop_func(self)
+                    # Nothing left to roll back here; just don't wait for it.
+                    result = self.call_drop_handler("post_drop_func", found_drop_recipient,
+                                                    found_drop_recipient.post_drop_func, self)
+                    if is_deferred(result):
+                        when_done(result)
         self.set_drag_finish_state()
@@ -0,0 +1,83 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: drop_groups.py
+#       Drop group names are interned to single bits. A widget's groups are kept as
+#       one integer (its drop_group_mask), so a DragNDropWidget can be dropped onto a
+#       DropDestination when draggable.drop_group_mask & destination.drop_group_mask
+#       is non-zero. Python ints have no size limit, so there is no limit on the number
+#       of groups.
+
+# This looks like:
+# dictionary[group_name] = bit
+_group_bits = {}
+
+
+def group_bit(name):
+    """
+    :param name: a drop group name
+    :return: the bit assigned to this name. Bits are handed out the first time a
+    name is seen, and never change for the life of the program.
+    """
+    bit = _group_bits.get(name)
+    if bit is None:
+        bit = 1 << len(_group_bits)
+        _group_bits[name] = bit
+    return bit
+
+
+def group_names(widget):
+    """
+    :param widget: a DragNDropWidget or DropDestination
+    :return: list of all the groups the widget belongs to: its drop_group followed by
+    its drop_groups, without duplicates.
+    """
+    names = [widget.drop_group]
+    for name in widget.drop_groups:
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def group_mask(names):
+    mask = 0
+    for name in names:
+        mask |= group_bit(name)
+    return mask
+
+
+def groups_compatible(widget_a, widget_b):
+    return (widget_a.drop_group_mask & widget_b.drop_group_mask) != 0
+
+
+def register_in_groups(registry, widget, names):
+    """
+    Put the widget into registry[name] for each name, and take it out of any group
+    it is no longer a member of.
+    :param registry: draggables_dict or drag_destinations_dict
+    """
+    for name in registry:
+        if name not in names and widget in registry[name]:
+            del registry[name][widget]
+    for name in names:
+        if name not in registry:
+            registry[name] = {}
+        registry[name][widget] = True
+
+
+def unregister_from_groups(registry, widget):
+    for name in registry:
+        if widget in registry[name]:
+            del registry[name][widget]
@@ -23,13 +23,21 @@ from __future__ import print_function
 import copy
 
 from kivy.animation import Animation
-from kivy.core.window import Window
 from kivy.properties import (
-	ListProperty, NumericProperty, BooleanProperty, ObjectProperty, StringProperty)
+	ListProperty, NumericProperty, BooleanProperty, ObjectProperty, StringProperty, OptionProperty)
 from kivy.uix.widget import Widget
 
 from .debug_print import Debug
-from kivydnd.dnd_storage_singletons import draggables_dict, drag_destinations_dict
+from kivydnd import hooks, stats
+from kivydnd.dnd_storage_singletons import (
+    draggables_dict, drag_destinations_dict, drop_destinations, destination_index,
+    while_dragging_destinations)
+from kivydnd.geometry import polygon_contains
+from kivydnd.drop_groups import group_names, group_mask, register_in_groups, unregister_from_groups
+from kivydnd.motion_binding import MOTION_TRACKING_MODES, track_motion, untrack_motion
+from kivydnd.motion_sweep import sweep_hub
+from kivydnd.scheduler import call_or_post, PRIORITY_HIGH, PRIORITY_LOW
+from kivydnd.window_provider import get_window
 
 debug = Debug() # Is False by default.
 DEBUG_COLLIDE_POINT=0x00
@@ -45,21 +53,35 @@ debug.register = DEBUG_COLLIDE_POINT | DEBUG_BIND_DROP_GROUP |\
                  DEBUG_BIND_MOUSE_MOTION | DEBUG_ON_MOTION | DEBUG_ON_MOTION_FLEE |\
                  DEBUG_ON_MOTION_OVER | DEBUG_ON_MOTION_OUTSIDE | DEBUG_ON_MOTION_INSIDE
 
+# Values of hit_shape. See hit_test().
+HIT_SHAPES = ["rect", "circle", "polygon"]
+
 # draggables_dict=dnd_storage_singletons.draggables_dict
 # drag_destinations_dict=dnd_storage_singletons.drag_destinations_dict
 
 class DropDestination(Widget):
-    motion_over_widget_func = ObjectProperty(None)
+    motion_over_widget_func = ObjectProperty(None, allownone=True)
     motion_over_widget_args = ListProperty([])
-    motion_flee_widget_func = ObjectProperty(None)
+    motion_flee_widget_func = ObjectProperty(None, allownone=True)
     motion_flee_widget_args = ListProperty([])
-    motion_outside_widget_func = ObjectProperty(None)
+    motion_outside_widget_func = ObjectProperty(None, allownone=True)
     motion_outside_widget_args = ListProperty([])
-    motion_inside_widget_func = ObjectProperty(None)
+    motion_inside_widget_func = ObjectProperty(None, allownone=True)
     motion_inside_widget_args = ListProperty([])
-    while_dragging_func = StringProperty(None)
+    drag_approach_func = ObjectProperty(None)
+    drag_approach_args = ListProperty([])
+    while_dragging_func = ObjectProperty(None, allownone=True)
     is_drop_eligible = BooleanProperty(True)
+    accept_func = ObjectProperty(None)
     drop_group = StringProperty("_kivy_dnd_default")
+    drop_groups = ListProperty([])
+    motion_tracking = OptionProperty("always", options=MOTION_TRACKING_MODES)
+    motion_sweep = BooleanProperty(False)
+    hit_shape = OptionProperty("rect", options=HIT_SHAPES)
+    hit_radius = NumericProperty(0)
+    hit_polygon = ListProperty([])
+    hit_test_func = ObjectProperty(None)
+    schedule_callbacks = BooleanProperty(False)
     widget_entered = None
 
     def __init__(self, **kw):
@@ -68,14 +90,23 @@ class DropDestination(Widget):
         self.register_event_type("on_motion_flee")
         self.register_event_type("on_motion_outside")
         self.register_event_type("on_motion_inside")
+        self.register_event_type("on_drag_approach")
         self.register_event_type("on_close")
         self.bind(motion_over_widget_func=self.bind_mouse_motion)
         self.bind(motion_flee_widget_func=self.bind_mouse_motion)
         self.bind(motion_outside_widget_func=self.bind_mouse_motion)
         self.bind(motion_inside_widget_func=self.bind_mouse_motion)
+        self.bind(motion_tracking=self.bind_mouse_motion)
+        self.bind(motion_sweep=self.bind_mouse_motion)
         self.motion_is_bound_to_window = False
         self.bind(drop_group=self.bind_drop_group)
+        self.bind(drop_groups=self.bind_drop_group)
+        self.drop_group_mask = 0
         self.in_me = False
+        self._accepts_cache = {}
+        self.bind(is_drop_eligible=self.invalidate_accepts_cache)
+        self.bind(accept_func=self.invalidate_accepts_cache)
+        self.bind(while_dragging_func=self.update_while_dragging)
 
     def close(self):
         """
@@ -89,34 +120,114 @@ class DropDestination(Widget):
         self.unbind(motion_flee_widget_func=self.bind_mouse_motion)
         self.unbind(motion_outside_widget_func=self.bind_mouse_motion)
         self.unbind(motion_inside_widget_func=self.bind_mouse_motion)
+        self.unbind(motion_tracking=self.bind_mouse_motion)
+        self.unbind(motion_sweep=self.bind_mouse_motion)
         self.unbind(drop_group=self.bind_drop_group)
+        self.unbind(drop_groups=self.bind_drop_group)
+        self.unbind(is_drop_eligible=self.invalidate_accepts_cache)
+        self.unbind(accept_func=self.invalidate_accepts_cache)
+        self.unbind(while_dragging_func=self.update_while_dragging)
         self.unregister_event_types("on_motion_over")
         self.unregister_event_types("on_motion_flee")
         self.unregister_event_types("on_motion_outside")
         self.unregister_event_types("on_motion_inside")
+        self.unregister_event_types("on_drag_approach")
         self.unregister_event_types("on_close")
-        if self.motion_is_bound_to_window:
-            Window.unbind(mouse_pos=self.on_motion)
-            self.motion_is_bound_to_window = False
+        untrack_motion(self)
+        sweep_hub.remove(self)
 
-        for drop_group in drag_destinations_dict:
-            if drag_destinations_dict[drop_group].get(self):
-                del drag_destinations_dict[drop_group][self]
+        unregister_from_groups(drag_destinations_dict, self)
+        if self in drop_destinations:
+            del drop_destinations[self]
+        while_dragging_destinations.pop(self, None)
+        destination_index.remove(self)
         # TODO: close all children (they have bound properties, too!
 
     def bind_drop_group(self, arg1, arg2):
         global DEBUG_BIND_DROP_GROUP
-        debug.print ("BINDING DROP GROUP", self.drop_group, level=DEBUG_BIND_DROP_GROUP)
-        if self.drop_group not in drag_destinations_dict:
-            drag_destinations_dict[self.drop_group]={}
-        drag_destinations_dict[self.drop_group][self]=True
+        debug.print ("BINDING DROP GROUP", self.drop_group, self.drop_groups, level=DEBUG_BIND_DROP_GROUP)
+        names = group_names(self)
+        register_in_groups(drag_destinations_dict, self, names)
+        self.drop_group_mask = group_mask(names)
+        drop_destinations[self] = True
+        destination_index.add(self)
+        self.update_while_dragging()
+
+    def update_while_dragging(self, *args):
+        """
+        Keep while_dragging_destinations up to date with our while_dragging_func.
+        """
+        if self.while_dragging_func is not None and self in drop_destinations:
+            while_dragging_destinations[self] = True
+        else:
+            while_dragging_destinations.pop(self, None)
+
+    def has_motion_funcs(self):
+        return self.motion_over_widget_func is not None or \
+            self.motion_flee_widget_func is not None or \
+            self.motion_outside_widget_func is not None or \
+            self.motion_inside_widget_func is not None
+
+    def accepts(self, draggable):
+        """
+        Whether a drop of the draggable is welcome here. If is_drop_eligible is False the
+        answer is always no. Otherwise accept_func(self, draggable) is asked, if set.
+
+        The answer is remembered per draggable.drag_type_key() (its drag_kind, or its
+        class), so an expensive accept_func runs once per kind of draggable rather
+        than once per drop. The memory is cleared when is_drop_eligible or accept_func
+        changes; if your accept_func depends on anything else, call
+        invalidate_accepts_cache() when that changes.
+        :param draggable: a DragNDropWidget
+        :return: True or False
+        """
+        key = draggable.drag_type_key()
+        try:
+            return self._accepts_cache[key]
+        except KeyError:
+            pass
+        if not self.is_drop_eligible:
+            ok = False
+        elif self.accept_func is not None:
+            ok = bool(self.accept_func(self, draggable))
+        else:
+            ok = True
+        self._accepts_cache[key] = ok
+        return ok
+
+    def invalidate_accepts_cache(self, *args):
+        self._accepts_cache.clear()
 
     def bind_mouse_motion(self, instance, value):
+        """
+        Called when any motion_..._func or the motion_tracking Property is set. With
+        motion_tracking "always" the widget is bound to Window.mouse_pos right away; with
+        "drag" it is bound only while a DragNDropWidget is being dragged. Once the last
+        motion_..._func is set back to None, the widget stops tracking motion.
+        """
         global DEBUG_BIND_MOUSE_MOTION
         # debug.print ("DropDestination: BINDNG WIDGETS to Mouse Motion!", instance, value, level=DEBUG_BIND_MOUSE_MOTION
-        if self.motion_is_bound_to_window is False:
-            Window.bind(mouse_pos=self.on_motion)
-        self.motion_is_bound_to_window = True
+        if not self.has_motion_funcs():
+            sweep_hub.remove(self)
+            untrack_motion(self)
+            return
+        if self.motion_sweep:
+            # The sweep hub does the tracking for us.
+            untrack_motion(self)
+            sweep_hub.add(self)
+        else:
+            sweep_hub.remove(self)
+            track_motion(self, self.motion_tracking)
+
+    def on_motion_tracking_stopped(self):
+        """
+        Called when the widget is unbound from Window.mouse_pos at the end of a drag
+        (motion_tracking "drag"). If the pointer was inside us, we'd never see it leave,
+        so flee now.
+        """
+        if self.in_me:
+            self.in_me = False
+            self.dispatch("on_motion_flee", get_window().mouse_pos)
 
     def on_motion(self, top_level_window, motion_xy_tuple):
         """
@@ -177,19 +288,57 @@ class DropDestination(Widget):
         :return: True or False
         """
         global DEBUG_COLLIDE_POINT
+        if stats.enabled:
+            stats.count("collision_tests")
+            stats.count("to_window_calls")
         (my_x, my_y)=self.to_window(self.x, self.y)
-        if Window.mouse_pos[0] != x or Window.mouse_pos[1] != y:
+        if debug.enabled(DEBUG_COLLIDE_POINT) and (x, y) != tuple(get_window().mouse_pos):
+            mouse_pos = get_window().mouse_pos
             try:
                 debug.print("Title:", self.title(), "==========================", level=DEBUG_COLLIDE_POINT)
             except:
                 pass
             debug.print("point, x,y:       ", x, y, level=DEBUG_COLLIDE_POINT)
-            debug.print("Window mouse pos:", Window.mouse_pos, level=DEBUG_COLLIDE_POINT)
+            debug.print("Window mouse pos:", mouse_pos, level=DEBUG_COLLIDE_POINT)
             debug.print("me:", self, level=DEBUG_COLLIDE_POINT)
             debug.print("x,y,r,t:", my_x, my_y, self.width + my_x, my_y + self.height,
                         level=DEBUG_COLLIDE_POINT)
         #debug.print_widget_ancestry(self, level=DEBUG_COLLIDE_POINT)
-        return my_x <= x <= (self.width + my_x) and my_y <= y <= (my_y + self.height)
+        if not (my_x <= x <= (self.width + my_x) and my_y <= y <= (my_y + self.height)):
+            return False
+        return self.hit_test(x - my_x, y - my_y)
+
+    def hit_is_rect(self):
+        """
+        :return: True if our hit area is just our bounding box.
+        """
+        return self.hit_test_func is None and self.hit_shape == "rect"
+
+    def hit_test(self, local_x, local_y):
+        """
+        The exact test of whether a point is over us. Callers check our bounding box
+        first, so this only runs for points already inside it.
+        - hit_test_func, if set, decides: hit_test_func(self, local_x, local_y).
+        - hit_shape "rect": the whole bounding box.
+        - hit_shape "circle": the circle at our center with radius hit_radius, or if
+          that is 0, the largest circle that fits.
+        - hit_shape "polygon": hit_polygon, a flat list [x1, y1, x2, y2, ...] relative
+          to our lower left corner.
+        :param local_x: x of the point, relative to our lower left corner
+        :param local_y: y of the point, relative to our lower left corner
+        :return: True or False
+        """
+        if self.hit_test_func is not None:
+            return bool(self.hit_test_func(self, local_x, local_y))
+        shape = self.hit_shape
+        if shape == "rect":
+            return True
+        if shape == "circle":
+            radius = self.hit_radius or min(self.width, self.height) / 2.0
+            dx = local_x - self.width / 2.0
+            dy = local_y - self.height / 2.0
+            return dx * dx + dy * dy <= radius * radius
+        return polygon_contains(self.hit_polygon, local_x, local_y)
 
     def on_motion_flee(self, motion_xy_tuple):
         """
@@ -199,7 +348,9 @@ class DropDestination(Widget):
         global DEBUG_ON_MOTION_FLEE
         # debug.print "DropDestination: MOTION flee"
         if self.motion_flee_widget_func is not None:
-            self.motion_flee_widget_func(self, self.motion_flee_widget_args)
+            call_or_post(self.schedule_callbacks, self.motion_flee_widget_func,
+                         (self, self.motion_flee_widget_args), PRIORITY_HIGH,
+                         key=(self, "flee"), annihilates=(self, "over"))
             # TODO: WAS... adding these binds. Not sure why.
             # self.easy_access_dnd_function_binds)
         else:
@@ -224,7 +375,9 @@ class DropDestination(Widget):
         global DEBUG_ON_MOTION_OVER
         # debug.print "DropDestination: MOTION over", motion_xy_tuple
         if self.motion_over_widget_func is not None:
-            self.motion_over_widget_func(self, self.motion_over_widget_args)
+            call_or_post(self.schedule_callbacks, self.motion_over_widget_func,
+                         (self, self.motion_over_widget_args), PRIORITY_HIGH,
+                         key=(self, "over"), annihilates=(self, "flee"))
             # self.easy_access_dnd_function_binds)
         # else:
         #    debug.print "FUNCTION MOTION OVER NONE"
@@ -234,7 +387,9 @@ class DropDestination(Widget):
         # debug.print "DropDestination: MOTION outside"
         try:
             if self.motion_outside_widget_func is not None:
-                self.motion_outside_widget_func(self, self.motion_outside_widget_args)
+                call_or_post(self.schedule_callbacks, self.motion_outside_widget_func,
+                             (self, self.motion_outside_widget_args), PRIORITY_LOW,
+                             key=(self, "outside"))
             else:
                 pass
                 # debug.print "FUNCTION OUT NONE"
@@ -246,9 +401,26 @@ class DropDestination(Widget):
         # debug.print "on_motion_inside: DropDestination INSIDE"
         try:
             if self.motion_inside_widget_func is not None:
-                self.motion_inside_widget_func(self, self.motion_inside_widget_args)
+                call_or_post(self.schedule_callbacks, self.motion_inside_widget_func,
+                             (self, self.motion_inside_widget_args), PRIORITY_LOW,
+                             key=(self, "inside"))
             else:
                 pass
                 # debug.print "FUNCTION OUT NONE"
         except AttributeError:
             pass
+
+    def on_drag_approach(self, draggable, eta):
+        """
+        Called when a dragged DragNDropWidget is heading our way and, at its current
+        velocity, will be over us within its approach_horizon. It's a hint, not a
+        promise: use it to warm up whatever motion_over_widget_func will need.
+        :param draggable: the DragNDropWidget being dragged
+        :param eta: seconds until the pointer is expected to enter us
+        :return:
+        """
+        if self.drag_approach_func is not None:
+            if stats.enabled:
+                stats.count("callbacks_dispatched")
+            hooks.call_hook("drag_approach_func", self, self.drag_approach_func,
+                            self, draggable, eta, self.drag_approach_args)
@@ -0,0 +1,189 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: geometry.py
+#       Rectangle math for drop resolution. A rect is a tuple (x, y, width, height)
+#       in Window coordinates.
+#
+#       NumPy is optional. If it is installed, batches of rects are handled as arrays;
+#       if not, the same answers come from plain Python. It's imported the first time
+#       a batch is big enough to use it.
+from __future__ import print_function
+
+from kivydnd import stats
+from kivydnd.optional_modules import load_numpy
+
+# Below this many rects, the cost of building arrays is more than what we save.
+NUMPY_MIN_BATCH = 32
+
+# Bumped whenever cached Window-space geometry may be wrong for reasons a widget's own
+# pos/size bindings can't see (a parent moved, a ScrollView scrolled...). Anything
+# that caches window_rect() results compares against this.
+_geometry_generation = [0]
+
+
+def geometry_generation():
+    return _geometry_generation[0]
+
+
+def invalidate_geometry():
+    """
+    Throw away all cached Window-space rects. Widgets' own pos, size and parent
+    changes are picked up without it, and drops re-read the rects of the destinations
+    they find. Call it yourself if destinations move without their own pos or size
+    changing (for instance inside a ScrollView) and you need hover events, snapping
+    and bound_zone_objects to be exact.
+    """
+    _geometry_generation[0] += 1
+
+
+def window_rect(widget):
+    """
+    :param widget: any Kivy Widget
+    :return: (x, y, width, height) of the widget in Window coordinates
+    """
+    if stats.enabled:
+        stats.count("to_window_calls")
+    (x, y) = widget.to_window(widget.x, widget.y)
+    return (x, y, widget.width, widget.height)
+
+
+def rect_center(rect):
+    return (rect[0] + rect[2] / 2.0, rect[1] + rect[3] / 2.0)
+
+
+def rect_contains(rect, x, y):
+    return rect[0] <= x <= rect[0] + rect[2] and rect[1] <= y <= rect[1] + rect[3]
+
+
+def rect_distance(rect, x, y):
+    """
+    :return: distance from the point to the nearest edge of rect; 0 if it's inside.
+    """
+    dx = max(rect[0] - x, 0, x - (rect[0] + rect[2]))
+    dy = max(rect[1] - y, 0, y - (rect[1] + rect[3]))
+    return (dx * dx + dy * dy) ** 0.5
+
+
+def rects_intersect(rect_a, rect_b):
+    return rect_a[0] <= rect_b[0] + rect_b[2] and rect_b[0] <= rect_a[0] + rect_a[2] and \
+        rect_a[1] <= rect_b[1] + rect_b[3] and rect_b[1] <= rect_a[1] + rect_a[3]
+
+
+def segment_rect_intersection(x0, y0, x1, y1, rect):
+    """
+    Clip the segment from (x0, y0) to (x1, y1) against rect (Liang-Barsky).
+    :return: (t_enter, t_exit), the fractions of the way along the segment where it
+    enters and leaves rect, with 0 <= t_enter <= t_exit <= 1; or None if the segment
+    misses rect. A segment that starts inside has t_enter 0; one that ends inside has
+    t_exit 1.
+    """
+    t_enter = 0.0
+    t_exit = 1.0
+    dx = x1 - x0
+    dy = y1 - y0
+    for (p, q) in ((-dx, x0 - rect[0]), (dx, rect[0] + rect[2] - x0),
+                   (-dy, y0 - rect[1]), (dy, rect[1] + rect[3] - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        t = float(q) / p
+        if p < 0:
+            if t > t_exit:
+                return None
+            if t > t_enter:
+                t_enter = t
+        else:
+            if t < t_enter:
+                return None
+            if t < t_exit:
+                t_exit = t
+    return (t_enter, t_exit)
+
+
+def overlap_area(rect_a, rect_b):
+    width = min(rect_a[0] + rect_a[2], rect_b[0] + rect_b[2]) - max(rect_a[0], rect_b[0])
+    if width <= 0:
+        return 0
+    height = min(rect_a[1] + rect_a[3], rect_b[1] + rect_b[3]) - max(rect_a[1], rect_b[1])
+    if height <= 0:
+        return 0
+    return width * height
+
+
+def overlap_areas(rect, rects):
+    """
+    :param rect: the rect to test, usually the dragged widget
+    :param rects: sequence of rects
+    :return: list with the area of intersection of rect with each of rects (0 if they
+    do not intersect), in the same order as rects.
+    """
+    numpy = load_numpy() if len(rects) >= NUMPY_MIN_BATCH else None
+    if numpy is None:
+        return [overlap_area(rect, other) for other in rects]
+    boxes = numpy.asarray(rects, dtype=float)
+    left = numpy.maximum(boxes[:, 0], rect[0])
+    right = numpy.minimum(boxes[:, 0] + boxes[:, 2], rect[0] + rect[2])
+    bottom = numpy.maximum(boxes[:, 1], rect[1])
+    top = numpy.minimum(boxes[:, 1] + boxes[:, 3], rect[1] + rect[3])
+    areas = numpy.clip(right - left, 0, None) * numpy.clip(top - bottom, 0, None)
+    return areas.tolist()
+
+
+def polygon_contains(points, x, y):
+    """
+    Even-odd test.
+    :param points: flat list of vertices [x1, y1, x2, y2, ...], as for Kivy's Line
+    :return: True if the point is inside the polygon
+    """
+    inside = False
+    count = len(points) // 2
+    j = count - 1
+    for i in range(count):
+        xi = points[2 * i]
+        yi = points[2 * i + 1]
+        xj = points[2 * j]
+        yj = points[2 * j + 1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / float(yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def nearest_point_on_polygon(points, x, y):
+    """
+    :param points: flat list of vertices [x1, y1, x2, y2, ...]
+    :return: (x, y) of the point on the polygon's outline nearest the given point
+    """
+    best = None
+    best_distance = None
+    count = len(points) // 2
+    j = count - 1
+    for i in range(count):
+        (x0, y0, x1, y1) = (points[2 * j], points[2 * j + 1], points[2 * i], points[2 * i + 1])
+        dx = x1 - x0
+        dy = y1 - y0
+        length = dx * dx + dy * dy
+        t = 0.0
+        if length > 0:
+            t = min(max(((x - x0) * dx + (y - y0) * dy) / float(length), 0.0), 1.0)
+        (px, py) = (x0 + t * dx, y0 + t * dy)
+        distance = (px - x) * (px - x) + (py - y) * (py - y)
+        if best is None or distance < best_distance:
+            best = (px, py)
+            best_distance = distance
+        j = i
+    return best
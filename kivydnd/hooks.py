@@ -0,0 +1,187 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: hooks.py
+#       Finding the app callback that makes drags stutter.
+#
+#       When enabled, every call the library makes to an app's hook (drop_func,
+#       failed_drop_func, drag_start_func, while_dragging_func, post_drop_func,
+#       drop_rolled_back_func and the motion_..._funcs) is timed. Each hook gets a
+#       histogram of its call times, and a call that takes longer than the threshold
+#       is logged with the hook's name, the widget and the function, kept in
+#       slow_calls, and passed to any listeners.
+#
+#           from kivydnd import hooks
+#           hooks.enable(threshold=0.008)
+#           hooks.add_listener(lambda call: print(call))
+#           ...
+#           print(hooks.snapshot())
+#
+#       Off by default; when off, the library calls the hooks directly. Hooks run on
+#       the drop thread pool (drop_in_thread) are timed there, so listeners may be
+#       called from that thread, and the histograms are updated under a lock.
+from __future__ import print_function
+
+import threading
+from collections import deque
+from timeit import default_timer
+
+from kivy.logger import Logger
+
+# A call slower than this many seconds is reported. Half a frame, at 60 frames per
+# second.
+DEFAULT_THRESHOLD = 0.008
+# Upper bounds of the histogram buckets, in milliseconds. The last bucket takes the rest.
+HISTOGRAM_BOUNDS_MS = [0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128]
+# Slow calls kept in slow_calls.
+SLOW_CALLS_KEPT = 100
+# The hook behind each kind of key given to scheduler.call_or_post().
+CALLBACK_KINDS = {
+    "while_dragging": "while_dragging_func",
+    "over": "motion_over_widget_func",
+    "flee": "motion_flee_widget_func",
+    "outside": "motion_outside_widget_func",
+    "inside": "motion_inside_widget_func",
+}
+
+enabled = False
+threshold = DEFAULT_THRESHOLD
+# dictionary[hook name] = [calls, total seconds, longest seconds, slow calls, bucket counts]
+histograms = {}
+# The latest slow calls: dictionaries with hook, widget, func and ms.
+slow_calls = deque(maxlen=SLOW_CALLS_KEPT)
+_listeners = []
+# Held while histograms and slow_calls are read or changed: record() is called from
+# the drop threads as well as the main thread.
+_lock = threading.Lock()
+
+
+def enable(threshold=None):
+    """
+    :param threshold: seconds; calls that take longer are reported
+    """
+    global enabled
+    if threshold is not None:
+        set_threshold(threshold)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def set_threshold(seconds):
+    global threshold
+    threshold = seconds
+
+
+def add_listener(listener):
+    """
+    :param listener: function of one argument, called with the dictionary describing
+    each slow call (see slow_calls)
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def _function_name(func):
+    name = getattr(func, "__qualname__", None) or getattr(func, "__name__", None)
+    if name is None:
+        return repr(func)
+    module = getattr(func, "__module__", None)
+    return "%s.%s" % (module, name) if module else name
+
+
+def _bucket(ms):
+    for (i, bound) in enumerate(HISTOGRAM_BOUNDS_MS):
+        if ms <= bound:
+            return i
+    return len(HISTOGRAM_BOUNDS_MS)
+
+
+def record(hook, widget, func, seconds):
+    """
+    Add a call to the hook's histogram, and report it if it was slow.
+    """
+    ms = seconds * 1e3
+    slow = seconds > threshold
+    with _lock:
+        histogram = histograms.get(hook)
+        if histogram is None:
+            histogram = histograms[hook] = [0, 0.0, 0.0, 0, [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)]
+        histogram[0] += 1
+        histogram[1] += seconds
+        if seconds > histogram[2]:
+            histogram[2] = seconds
+        histogram[4][_bucket(ms)] += 1
+        if slow:
+            histogram[3] += 1
+    if not slow:
+        return
+    call = {"hook": hook, "widget": repr(widget), "func": _function_name(func), "ms": ms}
+    with _lock:
+        slow_calls.append(call)
+    # Outside the lock: a listener may well call snapshot().
+    Logger.warning("kivydnd: slow %s: %s on %s took %.1f ms" %
+                   (hook, call["func"], call["widget"], ms))
+    for listener in _listeners[:]:
+        listener(call)
+
+
+def call_hook(hook, widget, func, *args, **kwargs):
+    """
+    Call func(*args, **kwargs), timing it if hooks are enabled.
+    :param hook: the name of the hook, e.g. "drop_func"
+    :param widget: the widget the hook belongs to
+    :return: what func returns
+    """
+    if not enabled:
+        return func(*args, **kwargs)
+    start = default_timer()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        record(hook, widget, func, default_timer() - start)
+
+
+def snapshot():
+    """
+    :return: dictionary[hook name] = dictionary of calls, mean_ms, max_ms, slow, and
+    buckets (a list of [upper bound in ms, count]; the last bound is None)
+    """
+    result = {}
+    bounds = HISTOGRAM_BOUNDS_MS + [None]
+    with _lock:
+        for (hook, (calls, total, longest, slow, buckets)) in histograms.items():
+            result[hook] = {
+                "calls": calls,
+                "mean_ms": total / calls * 1e3,
+                "max_ms": longest * 1e3,
+                "slow": slow,
+                "buckets": [[bound, count] for (bound, count) in zip(bounds, buckets)],
+            }
+    return result
+
+
+def reset():
+    with _lock:
+        histograms.clear()
+        slow_calls.clear()
@@ -0,0 +1,343 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: leak_audit.py
+#       Finding drag-n-drop widgets that were never close()d.
+#
+#       A DragNDropWidget or DropDestination that is taken off the screen without
+#       close() stays in the library's registries (see dnd_storage_singletons.py), and
+#       its on_motion stays bound to the Window's mouse_pos. The widget is never freed,
+#       and every pointer motion still runs its collision tests. In an app that runs
+#       for days, they pile up.
+#
+#       audit() looks once: at the size of each registry, at registered widgets that
+#       aren't in the window any more, and at mouse_pos bindings that shouldn't be
+#       there. LeakAuditor looks again and again: each check() says how the registries
+#       and (with tracemalloc) memory have grown since the first, and how many checks
+#       each detached widget has been seen at. It keeps weak references only, so it
+#       doesn't keep anything alive itself.
+#
+#           from kivydnd.leak_audit import LeakAuditor, audit
+#           assert not audit()["detached"]              # in a test
+#
+#           auditor = LeakAuditor()                     # in the app
+#           auditor.start(interval=600)                 # logs a report when something grew
+#
+#       Widgets that are being dragged, or that a drop has just taken out of their
+#       parent, are detached for a moment, so one sighting isn't a leak; one that's
+#       still detached a few checks later probably is.
+from __future__ import print_function
+
+import weakref
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from kivy.logger import Logger
+
+from kivydnd import dnd_storage_singletons
+from kivydnd.motion_sweep import sweep_hub
+from kivydnd.tracing import widget_label
+from kivydnd.window_provider import get_window
+
+# Lines of code reported for memory growth.
+DEFAULT_TOP = 10
+
+
+def registry_sizes():
+    """
+    :return: dictionary[registry name] = number of widgets in it
+    """
+    singletons = dnd_storage_singletons
+    return {
+        "draggables_dict": sum(len(group) for group in singletons.draggables_dict.values()),
+        "drag_destinations_dict": sum(len(group) for group in
+                                      singletons.drag_destinations_dict.values()),
+        "drop_destinations": len(singletons.drop_destinations),
+        "while_dragging_destinations": len(singletons.while_dragging_destinations),
+        "destination_index": len(singletons.destination_index),
+        "drag_motion_listeners": len(singletons.drag_motion_listeners),
+        "active_draggables": len(singletons.active_draggables),
+    }
+
+
+def registered_widgets():
+    """
+    :return: dictionary[widget] = list of the names of the registries it's in
+    """
+    singletons = dnd_storage_singletons
+    registries = [
+        ("draggables_dict", [widget for group in singletons.draggables_dict.values()
+                             for widget in group]),
+        ("drag_destinations_dict", [widget for group in singletons.drag_destinations_dict.values()
+                                    for widget in group]),
+        ("drop_destinations", singletons.drop_destinations),
+        ("while_dragging_destinations", singletons.while_dragging_destinations),
+        ("drag_motion_listeners", singletons.drag_motion_listeners),
+        ("active_draggables", singletons.active_draggables),
+    ]
+    widgets = {}
+    for (name, registry) in registries:
+        for widget in registry:
+            names = widgets.setdefault(widget, [])
+            if name not in names:
+                names.append(name)
+    return widgets
+
+
+def is_attached(widget, window=None):
+    """
+    :return: True if the window is among the widget's ancestors
+    """
+    window = window or get_window()
+    parent = getattr(widget, "parent", None)
+    while parent is not None:
+        if parent is window:
+            return True
+        parent = getattr(parent, "parent", None)
+    return False
+
+
+def detached_widgets(window=None):
+    """
+    :return: list of (widget, names of its registries) for registered widgets that
+    aren't in the window. The sweep hub, which listens for motion but isn't a widget,
+    is left out.
+    """
+    window = window or get_window()
+    return [(widget, names) for (widget, names) in registered_widgets().items()
+            if widget is not sweep_hub and not is_attached(widget, window)]
+
+
+def dangling_bindings(window=None):
+    """
+    Look at what is bound to the window's mouse_pos. A binding is dangling if it's the
+    on_motion of a widget that isn't in the window, or isn't in any registry (it was
+    taken out without being unbound), or that believes it isn't bound. The sweep hub
+    (see motion_sweep.py) isn't a widget: its binding is dangling if it holds
+    destinations that are gone, or is bound with nothing to track. Kivy holds
+    bound methods weakly, so a binding whose widget has been freed is dead: harmless,
+    but counted.
+    :return: (list of (widget, reason), number of dead bindings)
+    """
+    window = window or get_window()
+    registered = registered_widgets()
+    dangling = []
+    dead = 0
+    for observer in window.get_property_observers("mouse_pos"):
+        if hasattr(observer, "is_dead"):
+            if observer.is_dead():
+                dead += 1
+                continue
+            observer = observer()
+        owner = getattr(observer, "__self__", None)
+        if owner is None or not hasattr(owner, "motion_is_bound_to_window"):
+            # Not one of ours.
+            continue
+        if owner is sweep_hub:
+            dangling.extend(_sweep_hub_problems(window, registered))
+        elif not is_attached(owner, window):
+            dangling.append((owner, "not in the window"))
+        elif owner not in registered:
+            dangling.append((owner, "not registered"))
+        elif not owner.motion_is_bound_to_window:
+            dangling.append((owner, "bound, but motion_is_bound_to_window is False"))
+    return (dangling, dead)
+
+
+def _sweep_hub_problems(window, registered):
+    """
+    :return: list of (widget, reason) for what the bound sweep hub is tracking that it
+    shouldn't be, or [(sweep_hub, reason)] if it's tracking nothing
+    """
+    problems = []
+    tracked = list(sweep_hub.index.widgets)
+    for destination in sweep_hub.outside_listeners:
+        if destination not in sweep_hub.index:
+            tracked.append(destination)
+    if not tracked:
+        return [(sweep_hub, "sweep hub bound, but tracking nothing")]
+    for destination in tracked:
+        if not is_attached(destination, window):
+            problems.append((destination, "tracked by the sweep hub, not in the window"))
+        elif destination not in registered:
+            problems.append((destination, "tracked by the sweep hub, not registered"))
+    return problems
+
+
+def audit(window=None):
+    """
+    :return: dictionary of:
+    - registries: registry_sizes()
+    - detached: list of (widget label, registry names) for detached_widgets()
+    - dangling_bindings: list of (widget label, reason) for dangling_bindings()
+    - dead_bindings: the number of dead mouse_pos bindings
+    - mouse_pos_bindings: the number of mouse_pos bindings, of all kinds
+    Labels rather than widgets, so the result doesn't keep them alive.
+    """
+    window = window or get_window()
+    (dangling, dead) = dangling_bindings(window)
+    return {
+        "registries": registry_sizes(),
+        "detached": [(widget_label(widget), names)
+                     for (widget, names) in detached_widgets(window)],
+        "dangling_bindings": [(widget_label(widget), reason) for (widget, reason) in dangling],
+        "dead_bindings": dead,
+        "mouse_pos_bindings": len(window.get_property_observers("mouse_pos")),
+    }
+
+
+class LeakAuditor(object):
+    def __init__(self, window=None, trace_memory=True, frames=1, top=DEFAULT_TOP):
+        """
+        :param window: the window widgets should be in; get_window() if None
+        :param trace_memory: take tracemalloc snapshots, starting tracemalloc if it
+        isn't already (and stopping it in stop()). Ignored without tracemalloc.
+        :param frames: stack frames tracemalloc keeps for each allocation
+        :param top: lines of code to report memory growth for
+        """
+        self.window = window
+        self.trace_memory = trace_memory and tracemalloc is not None
+        self.frames = frames
+        self.top = top
+        self.checks = 0
+        self.baseline = None
+        self.previous = None
+        self._baseline_snapshot = None
+        self._started_tracemalloc = False
+        self._event = None
+        # dictionary[widget] = the check it was first seen detached at
+        self._detached_since = weakref.WeakKeyDictionary()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            self._started_tracemalloc = True
+
+    def _memory_snapshot(self):
+        if not self.trace_memory or not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot()
+        # Leave out tracemalloc's own allocations.
+        return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+    def check(self):
+        """
+        Look now, and compare with the first check.
+        :return: dictionary with what audit() returns, and:
+        - check: which check this is, from 1
+        - growth: dictionary[registry name] = growth since the first check
+        - growth_since_last: the same, since the last check
+        - detached_checks: dictionary[widget label] = how many checks it has been
+          detached for, counting this one
+        - memory_growth_bytes: growth of traced memory since the first check, or None
+        - memory_top: list of (file:line, bytes grown, blocks grown), the largest first
+        """
+        window = self.window or get_window()
+        self.checks += 1
+        report = audit(window)
+        sizes = report["registries"]
+        if self.baseline is None:
+            self.baseline = sizes
+            self.previous = sizes
+        report["check"] = self.checks
+        report["growth"] = dict((name, size - self.baseline.get(name, 0))
+                                for (name, size) in sizes.items())
+        report["growth_since_last"] = dict((name, size - self.previous.get(name, 0))
+                                           for (name, size) in sizes.items())
+        self.previous = sizes
+
+        detached_checks = {}
+        detached = [widget for (widget, names) in detached_widgets(window)]
+        # By identity, and in constant time: there may be thousands of them.
+        detached_ids = set(id(widget) for widget in detached)
+        for widget in list(self._detached_since.keys()):
+            if id(widget) not in detached_ids:
+                del self._detached_since[widget]
+        for widget in detached:
+            since = self._detached_since.setdefault(widget, self.checks)
+            detached_checks[widget_label(widget)] = self.checks - since + 1
+        report["detached_checks"] = detached_checks
+        del detached
+
+        report["memory_growth_bytes"] = None
+        report["memory_top"] = []
+        snapshot = self._memory_snapshot()
+        if snapshot is not None:
+            if self._baseline_snapshot is None:
+                self._baseline_snapshot = snapshot
+            differences = snapshot.compare_to(self._baseline_snapshot, "lineno")
+            report["memory_growth_bytes"] = sum(stat.size_diff for stat in differences)
+            report["memory_top"] = [
+                ("%s:%d" % (stat.traceback[0].filename, stat.traceback[0].lineno),
+                 stat.size_diff, stat.count_diff)
+                for stat in differences[:self.top] if stat.size_diff > 0]
+        return report
+
+    def start(self, interval=60.0):
+        """
+        check() every interval seconds on Kivy's Clock, and log the report as a
+        warning when a registry grew since the last check, or when there are detached
+        widgets or dangling bindings.
+        """
+        from kivy.clock import Clock
+        self.stop_checking()
+        self._event = Clock.schedule_interval(self._on_interval, interval)
+
+    def _on_interval(self, dt):
+        report = self.check()
+        if any(report["growth_since_last"].values()) or report["detached"] or \
+                report["dangling_bindings"]:
+            Logger.warning("kivydnd: leak audit: " + format_report(report).replace("\n", "; "))
+
+    def stop_checking(self):
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+
+    def stop(self):
+        """
+        Stop checking, and stop tracemalloc if this auditor started it.
+        """
+        self.stop_checking()
+        self._baseline_snapshot = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+def format_report(report):
+    """
+    :param report: from audit() or LeakAuditor.check()
+    :return: the report as lines of text
+    """
+    lines = ["registries: " + ", ".join(
+        "%s=%d%s" % (name, size, " (%+d)" % report["growth"][name]
+                     if report.get("growth", {}).get(name) else "")
+        for (name, size) in sorted(report["registries"].items()))]
+    lines.append("mouse_pos bindings: %d (%d dead)" % (report["mouse_pos_bindings"],
+                                                        report["dead_bindings"]))
+    detached_checks = report.get("detached_checks", {})
+    for (label, names) in report["detached"]:
+        checks = detached_checks.get(label)
+        lines.append("detached: %s in %s%s" % (label, ", ".join(names),
+                                               ", for %d checks" % checks if checks else ""))
+    for (label, reason) in report["dangling_bindings"]:
+        lines.append("dangling mouse_pos binding: %s, %s" % (label, reason))
+    if report.get("memory_growth_bytes") is not None:
+        lines.append("memory growth: %d bytes" % report["memory_growth_bytes"])
+        for (where, size, count) in report["memory_top"]:
+            lines.append("    %s: %+d bytes, %+d blocks" % (where, size, count))
+    return "\n".join(lines)
@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: motion_binding.py
+#       Decides when a widget's on_motion method is bound to Window.mouse_pos.
+#
+#       A "listener" is any object with an on_motion(window, motion_xy_tuple) method,
+#       a motion_is_bound_to_window attribute and an on_motion_tracking_stopped()
+#       method. DragNDropWidget and DropDestination are listeners.
+#
+#       motion_tracking "always": the listener is bound as soon as one of its
+#       motion_..._func Properties is set, and stays bound until close().
+#       motion_tracking "drag": the listener is bound when the first drag starts and
+#       unbound when the last drag finishes, so an idle app does no collision math.
+from __future__ import print_function
+
+from kivydnd.dnd_storage_singletons import drag_motion_listeners, active_draggables
+from kivydnd.window_provider import get_window
+
+MOTION_TRACKING_MODES = ["always", "drag"]
+
+
+def bind_window_motion(listener):
+    if listener.motion_is_bound_to_window is False:
+        get_window().bind(mouse_pos=listener.on_motion)
+    listener.motion_is_bound_to_window = True
+
+
+def unbind_window_motion(listener):
+    if listener.motion_is_bound_to_window:
+        get_window().unbind(mouse_pos=listener.on_motion)
+        listener.motion_is_bound_to_window = False
+
+
+def track_motion(listener, mode):
+    """
+    Subscribe the listener to pointer motion according to mode.
+    :param listener: a DragNDropWidget, DropDestination or similar object
+    :param mode: one of MOTION_TRACKING_MODES
+    :return:
+    """
+    if mode == "drag":
+        drag_motion_listeners[listener] = True
+        if active_draggables:
+            bind_window_motion(listener)
+        else:
+            unbind_window_motion(listener)
+    else:
+        if listener in drag_motion_listeners:
+            del drag_motion_listeners[listener]
+        bind_window_motion(listener)
+
+
+def untrack_motion(listener):
+    """
+    Stop all motion tracking for the listener. Called from close().
+    """
+    if listener in drag_motion_listeners:
+        del drag_motion_listeners[listener]
+    unbind_window_motion(listener)
+
+
+def drag_started(draggable):
+    """
+    Called when a DragNDropWidget starts being dragged. Binds the "drag" listeners
+    if this is the first active drag.
+    """
+    if not active_draggables:
+        for listener in list(drag_motion_listeners):
+            bind_window_motion(listener)
+    active_draggables[draggable] = True
+
+
+def drag_finished(draggable):
+    """
+    Called when a drag is released. Unbinds the "drag" listeners if no other drag
+    is active. Safe to call more than once for the same drag.
+    """
+    if draggable not in active_draggables:
+        return
+    del active_draggables[draggable]
+    if active_draggables:
+        return
+    for listener in list(drag_motion_listeners):
+        if listener.motion_is_bound_to_window:
+            unbind_window_motion(listener)
+            listener.on_motion_tracking_stopped()
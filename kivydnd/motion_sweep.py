@@ -0,0 +1,154 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: motion_sweep.py
+#       Hit detection for fast pointer motion.
+#
+#       A DropDestination normally tests only the point it is given by each
+#       Window.mouse_pos change. On a fast flick the pointer can jump clean over a small
+#       destination, which then never sees on_motion_over or on_motion_flee.
+#
+#       DropDestinations with motion_sweep set are not bound to the Window one by one.
+#       Instead the single SweepMotionHub is bound, and for each new pointer sample it
+#       asks its DestinationIndex which destinations the segment from the previous
+#       sample to this one passes through. Every destination entered or left along the
+#       way gets its events, in the order the pointer crossed them.
+from __future__ import print_function
+
+from kivydnd import stats
+from kivydnd.dnd_storage_singletons import active_draggables
+from kivydnd.geometry import rect_contains
+from kivydnd.motion_binding import track_motion, untrack_motion
+from kivydnd.spatial_index import DestinationIndex
+
+# When two events happen at the same point along the segment, leaving one
+# destination comes before entering the next. A destination that is passed clean
+# through leaves after it enters, even if it's so thin both happen at the same point.
+FLEE = 0
+OVER = 1
+PASS_THROUGH_FLEE = 2
+INSIDE = 3
+OUTSIDE = 4
+
+
+class SweepMotionHub(object):
+    def __init__(self):
+        self.index = DestinationIndex()
+        # dictionary[destination] = True
+        self.inside = {}
+        self.outside_listeners = {}
+        self.motion_is_bound_to_window = False
+        self.motion_tracking = "drag"
+        self.last_pos = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, destination):
+        """
+        Take over motion tracking for the destination, or pick up a change in its
+        motion_tracking.
+        """
+        self.index.add(destination)
+        if destination.motion_outside_widget_func is not None:
+            self.outside_listeners[destination] = True
+        else:
+            self.outside_listeners.pop(destination, None)
+        self._update_binding()
+
+    def remove(self, destination):
+        if destination in self.index:
+            self.index.remove(destination)
+            self.inside.pop(destination, None)
+            self.outside_listeners.pop(destination, None)
+            self._update_binding()
+
+    def _update_binding(self):
+        if not len(self.index):
+            untrack_motion(self)
+            self.last_pos = None
+            return
+        self.motion_tracking = "drag"
+        for destination in self.index.widgets:
+            if destination.motion_tracking == "always":
+                self.motion_tracking = "always"
+                break
+        track_motion(self, self.motion_tracking)
+
+    def on_motion_tracking_stopped(self):
+        for destination in list(self.inside):
+            del self.inside[destination]
+            destination.in_me = False
+            destination.dispatch("on_motion_flee", self.last_pos)
+        self.last_pos = None
+
+    def on_motion(self, top_level_window, motion_xy_tuple):
+        """
+        :param top_level_window: The top level kivy window
+        :param motion_xy_tuple: The coordinates of the mouse in the Window's coordinate system
+        :return:
+        """
+        (x1, y1) = (motion_xy_tuple[0], motion_xy_tuple[1])
+        if self.last_pos is None:
+            (x0, y0) = (x1, y1)
+        else:
+            (x0, y0) = self.last_pos
+        self.last_pos = (x1, y1)
+        dragging = bool(active_draggables)
+        events = []
+        touched = {}
+        for (destination, t_enter, t_exit) in self.index.query_segment(x0, y0, x1, y1):
+            if not dragging and destination.motion_tracking != "always":
+                continue
+            touched[destination] = True
+            if stats.enabled:
+                stats.count("candidates_examined")
+                stats.count("collision_tests")
+            rect = self.index.grid.rects[destination]
+            now_in = rect_contains(rect, x1, y1) and \
+                destination.hit_test(x1 - rect[0], y1 - rect[1])
+            if not destination.in_me and not now_in and not destination.hit_is_rect():
+                # The segment crossed the bounding box, but we only know the exact shape
+                # at the end points. Count it as a miss.
+                continue
+            if destination.in_me:
+                if now_in:
+                    events.append((1.0, INSIDE, "on_motion_inside", destination))
+                else:
+                    events.append((t_exit, FLEE, "on_motion_flee", destination))
+            else:
+                events.append((t_enter, OVER, "on_motion_over", destination))
+                if not now_in:
+                    events.append((t_exit, PASS_THROUGH_FLEE, "on_motion_flee", destination))
+        for destination in self.inside:
+            if destination not in touched:
+                # It moved out from under the pointer, or stopped tracking.
+                events.append((0.0, FLEE, "on_motion_flee", destination))
+        for destination in self.outside_listeners:
+            if destination not in touched and destination not in self.inside:
+                if dragging or destination.motion_tracking == "always":
+                    events.append((1.0, OUTSIDE, "on_motion_outside", destination))
+        events.sort(key=lambda event: (event[0], event[1]))
+        for (t, order, event_name, destination) in events:
+            if order == OVER:
+                destination.in_me = True
+                self.inside[destination] = True
+            elif order == FLEE or order == PASS_THROUGH_FLEE:
+                destination.in_me = False
+                self.inside.pop(destination, None)
+            destination.dispatch(event_name, motion_xy_tuple)
+
+
+sweep_hub = SweepMotionHub()
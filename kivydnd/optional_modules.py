@@ -0,0 +1,37 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: optional_modules.py
+#       Modules that are slow to import and that the library can do without, imported
+#       the first time they're needed rather than when kivydnd is imported. NumPy alone
+#       takes longer to import than the rest of kivydnd's own modules together.
+#
+#       Kivy's Window is dealt with the same way, in window_provider.py.
+from __future__ import print_function
+
+_numpy = []
+
+
+def load_numpy():
+    """
+    :return: the numpy module, or None if it isn't installed
+    """
+    if not _numpy:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy.append(numpy)
+    return _numpy[0]
@@ -0,0 +1,151 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: pointer_history.py
+#       The last few pointer samples of a drag, and the motion derived from them.
+#
+#       Samples go into fixed-size arrays that are allocated once, when the
+#       PointerHistory is created; the oldest sample is overwritten when it's full.
+#       Velocity is the least-squares slope over the recent samples, which smooths out
+#       the jitter you get from differencing just the last two.
+from __future__ import print_function
+
+from array import array
+
+DEFAULT_SIZE = 16
+# Velocity and acceleration look at the samples from the last VELOCITY_SPAN seconds.
+VELOCITY_SPAN = 0.1
+
+
+class PointerHistory(object):
+    def __init__(self, size=DEFAULT_SIZE):
+        size = max(int(size), 2)
+        self.size = size
+        self.times = array('d', [0.0] * size)
+        self.xs = array('d', [0.0] * size)
+        self.ys = array('d', [0.0] * size)
+        # Number of samples held, and where the next one goes.
+        self.count = 0
+        self.head = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.head = 0
+
+    def append(self, t, x, y):
+        """
+        :param t: time of the sample, in seconds (MotionEvent.time_update)
+        :param x: x of the pointer, Window coordinates
+        :param y: y of the pointer, Window coordinates
+        """
+        head = self.head
+        self.times[head] = t
+        self.xs[head] = x
+        self.ys[head] = y
+        self.head = (head + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def _index(self, age):
+        # age 0 is the newest sample.
+        return (self.head - 1 - age) % self.size
+
+    def latest(self):
+        """
+        :return: (t, x, y) of the newest sample, or None if there are none.
+        """
+        if not self.count:
+            return None
+        i = self._index(0)
+        return (self.times[i], self.xs[i], self.ys[i])
+
+    def samples(self):
+        """
+        :return: list of (t, x, y), oldest first. This allocates; it's for debugging
+        and recording, not for use on every event.
+        """
+        return [(self.times[i], self.xs[i], self.ys[i])
+                for i in (self._index(age) for age in range(self.count - 1, -1, -1))]
+
+    def _recent(self, span):
+        # How many of the newest samples fall within span seconds of the newest.
+        if not self.count:
+            return 0
+        newest = self.times[self._index(0)]
+        n = 1
+        while n < self.count and newest - self.times[self._index(n)] <= span:
+            n += 1
+        return n
+
+    def _fit(self, first_age, n):
+        # Least-squares slope of x and y against t over n samples, starting at
+        # first_age and going back in time. Returns (vx, vy, mean_t) or None.
+        if n < 2:
+            return None
+        sum_t = sum_x = sum_y = 0.0
+        for age in range(first_age, first_age + n):
+            i = self._index(age)
+            sum_t += self.times[i]
+            sum_x += self.xs[i]
+            sum_y += self.ys[i]
+        mean_t = sum_t / n
+        mean_x = sum_x / n
+        mean_y = sum_y / n
+        stt = stx = sty = 0.0
+        for age in range(first_age, first_age + n):
+            i = self._index(age)
+            dt = self.times[i] - mean_t
+            stt += dt * dt
+            stx += dt * (self.xs[i] - mean_x)
+            sty += dt * (self.ys[i] - mean_y)
+        if stt <= 0:
+            return None
+        return (stx / stt, sty / stt, mean_t)
+
+    def velocity(self, span=VELOCITY_SPAN):
+        """
+        :param span: use the samples from this many seconds before the newest
+        :return: (vx, vy) in pixels per second; (0, 0) if there is not enough data.
+        """
+        fit = self._fit(0, self._recent(span))
+        if fit is None:
+            return (0.0, 0.0)
+        return (fit[0], fit[1])
+
+    def speed(self, span=VELOCITY_SPAN):
+        (vx, vy) = self.velocity(span)
+        return (vx * vx + vy * vy) ** 0.5
+
+    def acceleration(self, span=VELOCITY_SPAN):
+        """
+        The change between the velocity of the older half of the recent samples and
+        that of the newer half.
+        :param span: use the samples from this many seconds before the newest
+        :return: (ax, ay) in pixels per second per second; (0, 0) if there is not
+        enough data.
+        """
+        n = self._recent(span)
+        half = n // 2
+        if half < 2:
+            return (0.0, 0.0)
+        newer = self._fit(0, half)
+        older = self._fit(n - half, half)
+        if newer is None or older is None or newer[2] == older[2]:
+            return (0.0, 0.0)
+        dt = newer[2] - older[2]
+        return ((newer[0] - older[0]) / dt, (newer[1] - older[1]) / dt)
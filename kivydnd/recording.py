@@ -0,0 +1,323 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: recording.py
+#       Recording a drag session in the app, and playing it back without a display.
+#
+#       Recorder binds to the window's touch events and mouse_pos, and writes what
+#       it sees to a JSON lines file. The first line describes the scene when the
+#       recording started: the window's size and, for each registered DragNDropWidget
+#       and DropDestination, its class, its rectangle in Window coordinates and the
+#       properties that decide how drags and drops go (RECORDED_PROPERTIES). Each line
+#       after that is one event, a list:
+#           [seconds, "down", touch, x, y, is_double_tap]
+#           [seconds, "move", touch, x, y]
+#           [seconds, "up", touch, x, y]
+#           [seconds, "pos", x, y]              (the window's mouse_pos)
+#       seconds count from the start of the recording; touch numbers the touch within
+#       the recording; x and y are in Window coordinates.
+#
+#           from kivydnd.recording import Recorder
+#           recorder = Recorder("slow_drag.jsonl")
+#           recorder.start()
+#           ...
+#           recorder.stop()
+#
+#       Replayer rebuilds the scene in a kivydnd.testing.FakeWindow, each widget at
+#       its recorded place in one flat layout, and sends the events through it as
+#       SyntheticTouches, with the recorded times. The app's functions (drop_func and
+#       the like) aren't recorded, so they don't run; pass your own widget classes to
+#       have them. Animations and inertia run on Kivy's Clock, which doesn't tick
+#       during a replay, so they are turned off unless animations=True. Calls queued
+#       on the frame scheduler are run after each event. So a replay goes the same way
+#       every time, and benchmarks/bench_replay.py turns a recording into a benchmark.
+#
+#           from kivydnd.recording import Replayer
+#           replayer = Replayer("slow_drag.jsonl")
+#           replayer.play()
+#           replayer.close()
+from __future__ import print_function
+
+import json
+from timeit import default_timer
+
+from kivy.uix.widget import Widget
+
+from kivydnd.dnd_storage_singletons import draggables_dict, drop_destinations
+from kivydnd.geometry import window_rect
+from kivydnd.scheduler import frame_scheduler
+from kivydnd.window_provider import get_window
+
+FORMAT_VERSION = 1
+# Properties of each kind of widget that are written to the recording and set on
+# the widgets of a replay.
+RECORDED_PROPERTIES = {
+    "draggable": [
+        "drop_group", "drop_groups", "drag_kind", "drop_resolution", "remove_on_drag",
+        "can_drop_into_parent", "drag_start_policy", "drag_start_delay",
+        "drag_start_distance", "snap_radius", "magnetic_snap", "approach_horizon",
+        "inertial_release", "drop_ok_do_animation", "not_drop_ok_do_animation",
+        "rebirth_failed_drop", "close_on_fail", "motion_tracking", "schedule_callbacks",
+        "pointer_history_size",
+    ],
+    "destination": [
+        "drop_group", "drop_groups", "is_drop_eligible", "motion_tracking",
+        "motion_sweep", "hit_shape", "hit_radius", "hit_polygon", "schedule_callbacks",
+    ],
+}
+# Decimal places kept of coordinates and of times.
+COORDINATE_PLACES = 2
+TIME_PLACES = 6
+
+
+def registered_widgets():
+    """
+    :return: list of (kind, widget) for the registered widgets that are in a window
+    """
+    draggables = {}
+    for group in draggables_dict.values():
+        draggables.update(group)
+    widgets = [("draggable", widget) for widget in draggables]
+    widgets.extend(("destination", widget) for widget in drop_destinations)
+    return [(kind, widget) for (kind, widget) in widgets
+            if widget.get_root_window() is not None]
+
+
+def describe_scene(window):
+    """
+    :return: the first line of a recording, as a dictionary
+    """
+    widgets = []
+    for (kind, widget) in registered_widgets():
+        properties = {}
+        for name in RECORDED_PROPERTIES[kind]:
+            value = getattr(widget, name, None)
+            if isinstance(value, (list, tuple)):
+                value = list(value)
+            properties[name] = value
+        widgets.append({
+            "kind": kind,
+            "class": widget.__class__.__name__,
+            "rect": [round(value, COORDINATE_PLACES) for value in window_rect(widget)],
+            "properties": properties,
+        })
+    return {"kivydnd_recording": FORMAT_VERSION, "window": list(window.size),
+            "widgets": widgets}
+
+
+class Recorder(object):
+    def __init__(self, path_or_file):
+        """
+        :param path_or_file: where to write the recording: a path, or a file open for
+        writing text
+        """
+        self.path_or_file = path_or_file
+        self.window = None
+        self.events = 0
+        self._file = None
+        self._start = None
+        # dictionary[touch uid] = touch number in the recording
+        self._touches = {}
+        self._next_touch = 0
+
+    def start(self, window=None):
+        """
+        Write the scene as it is now, and start recording events.
+        :param window: the window to record; get_window() if None
+        """
+        if self._file is not None:
+            return
+        self.window = window or get_window()
+        if hasattr(self.path_or_file, "write"):
+            self._file = self.path_or_file
+        else:
+            self._file = open(self.path_or_file, "w")
+        self._start = default_timer()
+        self._write(describe_scene(self.window))
+        self.window.bind(on_touch_down=self.on_window_touch_down,
+                         on_touch_move=self.on_window_touch_move,
+                         on_touch_up=self.on_window_touch_up,
+                         mouse_pos=self.on_window_mouse_pos)
+
+    def stop(self):
+        if self._file is None:
+            return
+        self.window.unbind(on_touch_down=self.on_window_touch_down,
+                           on_touch_move=self.on_window_touch_move,
+                           on_touch_up=self.on_window_touch_up,
+                           mouse_pos=self.on_window_mouse_pos)
+        if self._file is self.path_or_file:
+            self._file.flush()
+        else:
+            self._file.close()
+        self._file = None
+        self._touches.clear()
+
+    def _write(self, line):
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+
+    def _event(self, kind, *values):
+        self.events += 1
+        self._write([round(default_timer() - self._start, TIME_PLACES), kind] + list(values))
+
+    def _touch_number(self, touch, new=False):
+        uid = getattr(touch, "uid", None)
+        if uid is None:
+            uid = id(touch)
+        number = self._touches.get(uid)
+        if number is None or new:
+            number = self._touches[uid] = self._next_touch
+            self._next_touch += 1
+        return (uid, number)
+
+    def on_window_touch_down(self, window, touch):
+        (uid, number) = self._touch_number(touch, new=True)
+        self._event("down", number, round(touch.x, COORDINATE_PLACES),
+                    round(touch.y, COORDINATE_PLACES), bool(touch.is_double_tap))
+
+    def on_window_touch_move(self, window, touch):
+        (uid, number) = self._touch_number(touch)
+        self._event("move", number, round(touch.x, COORDINATE_PLACES),
+                    round(touch.y, COORDINATE_PLACES))
+
+    def on_window_touch_up(self, window, touch):
+        (uid, number) = self._touch_number(touch)
+        del self._touches[uid]
+        self._event("up", number, round(touch.x, COORDINATE_PLACES),
+                    round(touch.y, COORDINATE_PLACES))
+
+    def on_window_mouse_pos(self, window, pos):
+        self._event("pos", round(pos[0], COORDINATE_PLACES), round(pos[1], COORDINATE_PLACES))
+
+
+def load(path_or_file):
+    """
+    :param path_or_file: a path, or a file open for reading text
+    :return: (scene, events): the first line of the recording, and the list of events
+    """
+    if hasattr(path_or_file, "read"):
+        lines = path_or_file.read().splitlines()
+    else:
+        with open(path_or_file) as recording_file:
+            lines = recording_file.read().splitlines()
+    scene = json.loads(lines[0])
+    if scene.get("kivydnd_recording") != FORMAT_VERSION:
+        raise ValueError("Not a kivydnd recording, or not version %d" % FORMAT_VERSION)
+    events = [json.loads(line) for line in lines[1:] if line.strip()]
+    return (scene, events)
+
+
+class Replayer(object):
+    def __init__(self, path_or_file, window=None, draggable_class=None,
+                 destination_class=None, animations=False):
+        """
+        :param path_or_file: the recording: a path, or a file open for reading text
+        :param window: the window to replay in. If None, a FakeWindow of the recorded
+        size is made and the library is set to use it (see testing.use_fake_window).
+        :param draggable_class: class of the draggables; DragNDropWidget if None
+        :param destination_class: class of the destinations; DropDestination if None
+        :param animations: whether to leave drop animations and inertia as recorded
+        """
+        (self.scene, self.events) = load(path_or_file)
+        if window is None:
+            from kivydnd.testing import use_fake_window
+            (width, height) = self.scene["window"]
+            window = use_fake_window(width=width, height=height)
+        if draggable_class is None:
+            from kivydnd.dragndropwidget import DragNDropWidget
+            draggable_class = DragNDropWidget
+        if destination_class is None:
+            from kivydnd.dropdestination import DropDestination
+            destination_class = DropDestination
+        self.window = window
+        self.classes = {"draggable": draggable_class, "destination": destination_class}
+        self.animations = animations
+        self.root = None
+        self.widgets = []
+        # dictionary[touch number] = the SyntheticTouch
+        self.touches = {}
+        self.build()
+
+    def build(self):
+        """
+        Put the recorded widgets in the window. Done by __init__; do it again after
+        close() to replay from the start.
+        """
+        self.root = Widget(pos=(0, 0), size=self.window.size)
+        self.window.add_widget(self.root)
+        self.widgets = []
+        for description in self.scene["widgets"]:
+            (x, y, width, height) = description["rect"]
+            widget = self.classes[description["kind"]](pos=(x, y), size=(width, height),
+                                                       size_hint=(None, None))
+            for name in RECORDED_PROPERTIES[description["kind"]]:
+                value = description["properties"].get(name)
+                if value is not None and hasattr(widget, name):
+                    setattr(widget, name, value)
+            if not self.animations and description["kind"] == "draggable":
+                widget.drop_ok_do_animation = False
+                widget.not_drop_ok_do_animation = False
+                widget.inertial_release = False
+            self.root.add_widget(widget)
+            self.widgets.append(widget)
+
+    def close(self):
+        for widget in self.widgets:
+            widget.close()
+        self.widgets = []
+        self.touches.clear()
+        if self.root is not None:
+            self.window.remove_widget(self.root)
+            self.root = None
+
+    def step(self, event):
+        """
+        Send one recorded event to the window, then run what it queued on the frame
+        scheduler.
+        """
+        from kivydnd.testing import SyntheticTouch
+        (seconds, kind) = event[:2]
+        if kind == "pos":
+            self.window.mouse_pos = (event[2], event[3])
+        elif kind == "down":
+            (number, x, y, is_double_tap) = event[2:6]
+            touch = self.touches[number] = SyntheticTouch(x, y, seconds, is_double_tap)
+            self.window.dispatch("on_touch_down", touch)
+        elif kind == "move":
+            (number, x, y) = event[2:5]
+            touch = self.touches.get(number)
+            if touch is None:
+                return
+            touch.move(x, y, seconds)
+            self.window.dispatch("on_touch_move", touch)
+        elif kind == "up":
+            (number, x, y) = event[2:5]
+            touch = self.touches.pop(number, None)
+            if touch is None:
+                return
+            touch.move(x, y, seconds)
+            touch.up(seconds)
+            self.window.dispatch("on_touch_up", touch)
+        if len(frame_scheduler):
+            frame_scheduler.run_all()
+
+    def play(self):
+        """
+        Send all the recorded events.
+        :return: the number of events
+        """
+        for event in self.events:
+            self.step(event)
+        return len(self.events)
@@ -0,0 +1,122 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: rect_array.py
+#       Many rects in one block, tested all at once.
+#
+#       With NumPy, the rects are rows of a single (capacity, 4) float array holding
+#       left, bottom, right, top. A point or rect query is one vectorized comparison
+#       over the rows in use. Rows are overwritten in place when a rect moves, and a
+#       removed rect's row is filled with the last row, so the rows in use stay
+#       contiguous. Without NumPy the same structure is a list of tuples, scanned in
+#       plain Python.
+from __future__ import print_function
+
+from kivydnd.optional_modules import load_numpy
+
+INITIAL_CAPACITY = 64
+
+
+class RectArray(object):
+    def __init__(self, capacity=INITIAL_CAPACITY, use_numpy=True):
+        """
+        :param capacity: rows to allocate up front; the array doubles when it's full
+        :param use_numpy: set False to use plain Python even if NumPy is installed
+        """
+        # The numpy module, or None.
+        self.numpy = load_numpy() if use_numpy else None
+        self.use_numpy = self.numpy is not None
+        # keys[row] is the key whose rect is in that row.
+        self.keys = []
+        # dictionary[key] = row
+        self.rows = {}
+        if self.use_numpy:
+            self.boxes = self.numpy.empty((max(int(capacity), 1), 4), dtype=float)
+        else:
+            self.boxes = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def set(self, key, rect):
+        """
+        Add key with the given rect (x, y, width, height), or move it there.
+        """
+        box = (rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        row = self.rows.get(key)
+        if row is None:
+            row = len(self.keys)
+            self.rows[key] = row
+            self.keys.append(key)
+            if self.use_numpy:
+                if row == self.boxes.shape[0]:
+                    grown = self.numpy.empty((row * 2, 4), dtype=float)
+                    grown[:row] = self.boxes
+                    self.boxes = grown
+            else:
+                self.boxes.append(box)
+                return
+        self.boxes[row] = box
+
+    def remove(self, key):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last = len(self.keys) - 1
+        if row != last:
+            moved = self.keys[last]
+            self.keys[row] = moved
+            self.rows[moved] = row
+            self.boxes[row] = self.boxes[last]
+        self.keys.pop()
+        if not self.use_numpy:
+            self.boxes.pop()
+
+    def clear(self):
+        self.keys = []
+        self.rows.clear()
+        if not self.use_numpy:
+            self.boxes = []
+
+    def rect(self, key):
+        (left, bottom, right, top) = [float(value) for value in self.boxes[self.rows[key]]]
+        return (left, bottom, right - left, top - bottom)
+
+    def query_point(self, x, y):
+        """
+        :return: list of the keys whose rect contains the point
+        """
+        if self.use_numpy:
+            boxes = self.boxes[:len(self.keys)]
+            hits = (boxes[:, 0] <= x) & (x <= boxes[:, 2]) & (boxes[:, 1] <= y) & (y <= boxes[:, 3])
+            return [self.keys[row] for row in self.numpy.flatnonzero(hits)]
+        return [self.keys[row] for (row, box) in enumerate(self.boxes)
+                if box[0] <= x <= box[2] and box[1] <= y <= box[3]]
+
+    def query_rect(self, rect):
+        """
+        :return: list of the keys whose rect intersects the given rect
+        """
+        (left, bottom, right, top) = (rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        if self.use_numpy:
+            boxes = self.boxes[:len(self.keys)]
+            hits = (boxes[:, 0] <= right) & (left <= boxes[:, 2]) & \
+                (boxes[:, 1] <= top) & (bottom <= boxes[:, 3])
+            return [self.keys[row] for row in self.numpy.flatnonzero(hits)]
+        return [self.keys[row] for (row, box) in enumerate(self.boxes)
+                if box[0] <= right and left <= box[2] and box[1] <= top and bottom <= box[3]]
@@ -0,0 +1,245 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: scheduler.py
+#       Running callbacks a few at a time, on later frames.
+#
+#       FrameScheduler keeps a queue of calls and a single Clock trigger. Each frame it
+#       runs calls from the front of the queue until its time budget for the frame is
+#       spent, then leaves the rest for the next frame. At least one call runs every
+#       frame, so a call that takes longer than the budget still gets its turn.
+#
+#       schedule() returns a ScheduledCall, which looks enough like a Future (see
+#       async_drop.py) to be waited on with when_done().
+#
+#       post() adds what hover and drag callbacks need. Calls have a priority, and
+#       higher priority calls (lower numbers) run first. A call posted with a key
+#       replaces a call with the same key that hasn't run yet, keeping its place in
+#       the queue: only the newest while_dragging_func matters. A call posted with
+#       annihilates=other_key cancels a waiting call with that key, and is dropped
+#       itself: an on_motion_over followed by an on_motion_flee before either has run
+#       comes to nothing.
+from __future__ import print_function
+
+from collections import deque
+from timeit import default_timer
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+from kivydnd import hooks, stats
+
+# Seconds of each frame that scheduled calls may use. At 60 frames per second, a
+# frame is about 16 ms.
+DEFAULT_FRAME_BUDGET = 0.004
+
+# Priorities for post(). Lower runs first; schedule() uses PRIORITY_NORMAL.
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class ScheduledCall(object):
+    def __init__(self, func, args, key=None):
+        self.func = func
+        self.args = args
+        self.key = key
+        self._done = False
+        self._cancelled = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def run(self):
+        try:
+            self._result = self.func(*self.args)
+        except Exception as exception:
+            if not self._callbacks:
+                # Nobody is waiting to hear about it.
+                Logger.error("kivydnd: scheduled call %r failed: %r" % (self.func, exception))
+            self._exception = exception
+        self._finish()
+
+    def _finish(self):
+        self._done = True
+        callbacks = self._callbacks
+        self._callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def cancel(self):
+        """
+        Don't run the call, if it hasn't run yet.
+        :return: True if it was cancelled
+        """
+        if self._done:
+            return False
+        self._cancelled = True
+        self._finish()
+        return True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        """
+        :return: what the call returned. Raises what it raised.
+        """
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def add_done_callback(self, callback):
+        """
+        :param callback: function of one argument, this ScheduledCall. Called when the
+        call has run or been cancelled; at once if that has already happened.
+        """
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+
+class FrameScheduler(object):
+    def __init__(self, budget=DEFAULT_FRAME_BUDGET):
+        """
+        :param budget: seconds of each frame to spend on scheduled calls
+        """
+        self.budget = budget
+        # dictionary[priority] = deque of ScheduledCall
+        self.queues = {}
+        # Calls in the queues, counting cancelled ones that haven't been thrown away yet.
+        self.count = 0
+        # dictionary[key] = the ScheduledCall with that key that hasn't run yet
+        self.pending = {}
+        self._trigger = Clock.create_trigger(self.run_frame, 0)
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, func, *args):
+        """
+        Run func(*args) on a coming frame, after the calls already queued.
+        :return: a ScheduledCall
+        """
+        return self.post(func, args)
+
+    def post(self, func, args=(), priority=PRIORITY_NORMAL, key=None, annihilates=None):
+        """
+        Run func(*args) on a coming frame.
+        :param priority: PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW (or any integer;
+        lower runs first)
+        :param key: any hashable. If a call with this key is waiting, it is brought up
+        to date with func and args instead of queueing another.
+        :param annihilates: a key. If a call with that key is waiting, it is cancelled,
+        and this call is not queued.
+        :return: the ScheduledCall, or None if it annihilated another
+        """
+        if annihilates is not None:
+            other = self.pending.pop(annihilates, None)
+            if other is not None and other.cancel():
+                return None
+        if key is not None:
+            call = self.pending.get(key)
+            if call is not None and not call.cancelled():
+                call.func = func
+                call.args = args
+                return call
+        call = ScheduledCall(func, args, key)
+        if key is not None:
+            self.pending[key] = call
+        queue = self.queues.get(priority)
+        if queue is None:
+            queue = self.queues[priority] = deque()
+        queue.append(call)
+        self.count += 1
+        self._trigger()
+        return call
+
+    def cancel(self, key):
+        """
+        Cancel the waiting call with this key, if there is one.
+        """
+        call = self.pending.pop(key, None)
+        if call is not None:
+            call.cancel()
+
+    def _next_call(self):
+        # The oldest call of the highest priority, or None.
+        for priority in sorted(self.queues):
+            queue = self.queues[priority]
+            while queue:
+                call = queue.popleft()
+                self.count -= 1
+                if not call.cancelled():
+                    return call
+                if call.key is not None and self.pending.get(call.key) is call:
+                    del self.pending[call.key]
+        return None
+
+    def _run(self, call):
+        if call.key is not None and self.pending.get(call.key) is call:
+            del self.pending[call.key]
+        call.run()
+
+    def run_frame(self, dt=0):
+        """
+        Run queued calls until the budget for this frame is spent. The Clock calls this;
+        you can call it yourself to make progress without waiting for a frame.
+        """
+        start = default_timer()
+        ran = 0
+        while ran == 0 or default_timer() - start < self.budget:
+            call = self._next_call()
+            if call is None:
+                break
+            self._run(call)
+            ran += 1
+        if self.count:
+            self._trigger()
+
+    def run_all(self):
+        """
+        Run everything that is queued, now, whatever the budget.
+        """
+        call = self._next_call()
+        while call is not None:
+            self._run(call)
+            call = self._next_call()
+
+
+def call_or_post(scheduled, func, args, priority=PRIORITY_NORMAL, key=None, annihilates=None):
+    """
+    For the library's own callbacks: if scheduled, post func(*args) to frame_scheduler
+    (see FrameScheduler.post), otherwise call it now.
+    If hooks are enabled, the call is timed (see hooks.py): key is (widget, kind),
+    and hooks.CALLBACK_KINDS gives the hook's name for the kind.
+    """
+    if stats.enabled:
+        stats.count("callbacks_dispatched")
+    if hooks.enabled and key is not None:
+        (widget, kind) = key
+        args = (hooks.CALLBACK_KINDS.get(kind, kind), widget, func) + tuple(args)
+        func = hooks.call_hook
+    if not scheduled:
+        func(*args)
+        return
+    frame_scheduler.post(func, args, priority, key, annihilates)
+
+
+frame_scheduler = FrameScheduler()
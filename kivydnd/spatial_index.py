@@ -0,0 +1,363 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: spatial_index.py
+#       A uniform grid over Window coordinates, so that "what is near this point?"
+#       looks at a handful of cells instead of every DropDestination.
+#
+#       SpatialGrid is plain geometry: keys and rects. DestinationIndex keeps a
+#       SpatialGrid in step with a set of widgets: it binds to their pos and size, and
+#       to those of their ancestors (a RelativeLayout or ScrollView moving moves
+#       everything in it), marks them dirty when they change, and re-reads only the
+#       dirty ones before the next query. If geometry.invalidate_geometry() has been
+#       called since the last query, all of them are re-read. For what no binding sees
+#       (a Scatter's transform, say), queries made to resolve a drop ask for
+#       revalidate=True: the widgets they find are re-read, and the query is run again
+#       if any had moved. That can't find a widget that has moved to where the query
+#       looks from somewhere else, as a ScrollView's scroll moves its content without
+#       changing any pos; rescan() re-reads every widget, for a drop that found
+#       nothing.
+#
+#       With the "array" backend, DestinationIndex also keeps every rect in a RectArray
+#       (see rect_array.py) and answers point and rect queries from it, in one
+#       vectorized pass instead of cell by cell. Segment and nearest queries always
+#       use the grid.
+from __future__ import print_function
+
+from kivydnd.geometry import (
+    window_rect, rect_contains, rect_distance, rects_intersect, segment_rect_intersection,
+    geometry_generation)
+from kivydnd.rect_array import RectArray
+
+DEFAULT_CELL_SIZE = 100
+# Values for DestinationIndex.set_backend().
+BACKENDS = ["grid", "array"]
+
+
+class SpatialGrid(object):
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        # dictionary[(column, row)][key] = True
+        self.cells = {}
+        # dictionary[key] = rect
+        self.rects = {}
+        # dictionary[key] = list of (column, row)
+        self.key_cells = {}
+
+    def __len__(self):
+        return len(self.rects)
+
+    def __contains__(self, key):
+        return key in self.rects
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        for column in range(int(x0 // size), int(x1 // size) + 1):
+            for row in range(int(y0 // size), int(y1 // size) + 1):
+                yield (column, row)
+
+    def insert(self, key, rect):
+        """
+        Add key with the given rect, or move it there if it's already in the grid.
+        """
+        if key in self.rects:
+            self.remove(key)
+        self.rects[key] = rect
+        cells = list(self._cell_range(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3]))
+        self.key_cells[key] = cells
+        for cell in cells:
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                bucket = self.cells[cell] = {}
+            bucket[key] = True
+
+    def remove(self, key):
+        if key not in self.rects:
+            return
+        for cell in self.key_cells.pop(key):
+            bucket = self.cells[cell]
+            del bucket[key]
+            if not bucket:
+                del self.cells[cell]
+        del self.rects[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.rects.clear()
+        self.key_cells.clear()
+
+    def _keys_in_cells(self, x0, y0, x1, y1):
+        found = {}
+        for cell in self._cell_range(x0, y0, x1, y1):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def query_point(self, x, y):
+        """
+        :return: list of the keys whose rect contains the point
+        """
+        bucket = self.cells.get((int(x // self.cell_size), int(y // self.cell_size)))
+        if not bucket:
+            return []
+        return [key for key in bucket if rect_contains(self.rects[key], x, y)]
+
+    def query_rect(self, rect):
+        """
+        :return: list of the keys whose rect intersects the given rect
+        """
+        found = self._keys_in_cells(rect[0], rect[1], rect[0] + rect[2], rect[1] + rect[3])
+        return [key for key in found if rects_intersect(self.rects[key], rect)]
+
+    def query_segment(self, x0, y0, x1, y1):
+        """
+        :return: list of (key, t_enter, t_exit) for each key whose rect the segment from
+        (x0, y0) to (x1, y1) passes through. See geometry.segment_rect_intersection.
+        """
+        found = self._keys_in_cells(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1))
+        crossed = []
+        for key in found:
+            hit = segment_rect_intersection(x0, y0, x1, y1, self.rects[key])
+            if hit is not None:
+                crossed.append((key, hit[0], hit[1]))
+        return crossed
+
+    def nearest(self, x, y, radius, accept=None):
+        """
+        :param x: x of the point, Window coordinates
+        :param y: y of the point, Window coordinates
+        :param radius: don't look further than this
+        :param accept: optional function of one argument, the key. Keys for which it
+        returns False are skipped.
+        :return: (key, distance) of the key whose rect is nearest the point (distance
+        0 if the point is inside it), or None if there is none within radius.
+        """
+        found = self._keys_in_cells(x - radius, y - radius, x + radius, y + radius)
+        candidates = []
+        for key in found:
+            distance = rect_distance(self.rects[key], x, y)
+            if distance <= radius:
+                candidates.append((distance, key))
+        # Only run accept() on as many keys as needed, nearest first.
+        candidates.sort(key=lambda candidate: candidate[0])
+        for distance, key in candidates:
+            if accept is None or accept(key):
+                return (key, distance)
+        return None
+
+
+class DestinationIndex(object):
+    """
+    A SpatialGrid of widgets, keyed by the widget, holding each widget's rect in
+    Window coordinates.
+    """
+    def __init__(self, cell_size=DEFAULT_CELL_SIZE):
+        self.grid = SpatialGrid(cell_size)
+        # dictionary[widget] = True
+        self.widgets = {}
+        self.dirty = {}
+        # dictionary[ancestor] = dictionary[widget] = True, for the widgets under it
+        self.ancestors = {}
+        # dictionary[widget] = list of the ancestors it's listed under
+        self.chains = {}
+        self._generation = geometry_generation()
+        self.backend = "grid"
+        self.array = None
+
+    def __len__(self):
+        return len(self.widgets)
+
+    def __contains__(self, widget):
+        return widget in self.widgets
+
+    def add(self, widget):
+        if widget in self.widgets:
+            return
+        self.widgets[widget] = True
+        self.dirty[widget] = True
+        widget.bind(pos=self.mark_dirty, size=self.mark_dirty, parent=self.reparented)
+        self._track_ancestors(widget)
+
+    def remove(self, widget):
+        if widget not in self.widgets:
+            return
+        widget.unbind(pos=self.mark_dirty, size=self.mark_dirty, parent=self.reparented)
+        self._untrack_ancestors(widget)
+        del self.widgets[widget]
+        if widget in self.dirty:
+            del self.dirty[widget]
+        self.grid.remove(widget)
+        if self.array is not None:
+            self.array.remove(widget)
+
+    def mark_dirty(self, widget, *args):
+        self.dirty[widget] = True
+
+    def reparented(self, widget, *args):
+        self.dirty[widget] = True
+        self._untrack_ancestors(widget)
+        self._track_ancestors(widget)
+
+    def _track_ancestors(self, widget):
+        chain = []
+        ancestor = widget.parent
+        # The window at the top doesn't move.
+        while ancestor is not None and getattr(ancestor, "parent", None) is not None:
+            under = self.ancestors.get(ancestor)
+            if under is None:
+                under = self.ancestors[ancestor] = {}
+                ancestor.bind(pos=self.ancestor_moved, size=self.ancestor_moved,
+                              parent=self.ancestor_reparented)
+            under[widget] = True
+            chain.append(ancestor)
+            ancestor = ancestor.parent
+        self.chains[widget] = chain
+
+    def _untrack_ancestors(self, widget):
+        for ancestor in self.chains.pop(widget, ()):
+            under = self.ancestors[ancestor]
+            del under[widget]
+            if not under:
+                ancestor.unbind(pos=self.ancestor_moved, size=self.ancestor_moved,
+                                parent=self.ancestor_reparented)
+                del self.ancestors[ancestor]
+
+    def ancestor_moved(self, ancestor, *args):
+        for widget in self.ancestors.get(ancestor, ()):
+            self.dirty[widget] = True
+
+    def ancestor_reparented(self, ancestor, *args):
+        for widget in list(self.ancestors.get(ancestor, ())):
+            self.reparented(widget)
+
+    def set_backend(self, backend, use_numpy=True):
+        """
+        :param backend: "grid" to answer point and rect queries from the grid cells, or
+        "array" to test all rects at once. "array" pays off with thousands of
+        destinations, and needs NumPy to be fast; without it, it scans a list.
+        :param use_numpy: for "array", set False to use plain Python even if NumPy is
+        installed
+        """
+        if backend not in BACKENDS:
+            raise ValueError("backend must be one of %s, not %r" % (BACKENDS, backend))
+        self.backend = backend
+        if backend == "array":
+            self.array = RectArray(max(len(self.widgets), 1), use_numpy)
+            for widget in self.widgets:
+                self.dirty[widget] = True
+        else:
+            self.array = None
+
+    def rebuild(self, cell_size=None):
+        """
+        Start over, optionally with a new cell size. Every widget is re-read before
+        the next query.
+        """
+        if cell_size is not None:
+            self.grid = SpatialGrid(cell_size)
+        else:
+            self.grid.clear()
+        if self.array is not None:
+            self.array.clear()
+        for widget in self.widgets:
+            self.dirty[widget] = True
+
+    def refresh(self):
+        generation = geometry_generation()
+        if generation != self._generation:
+            self._generation = generation
+            for widget in self.widgets:
+                self.dirty[widget] = True
+        if not self.dirty:
+            return
+        array = self.array
+        for widget in self.dirty:
+            rect = window_rect(widget)
+            self.grid.insert(widget, rect)
+            if array is not None:
+                array.set(widget, rect)
+        self.dirty.clear()
+
+    def revalidate(self, widgets):
+        """
+        Re-read the rects of these widgets now, whatever their bindings say.
+        :return: True if any of them had moved
+        """
+        moved = False
+        array = self.array
+        for widget in widgets:
+            rect = window_rect(widget)
+            if self.grid.rects.get(widget) != rect:
+                moved = True
+                self.grid.insert(widget, rect)
+                if array is not None:
+                    array.set(widget, rect)
+        return moved
+
+    def rescan(self):
+        """
+        Re-read the rects of all the widgets now, whatever their bindings say.
+        :return: True if any of them had moved
+        """
+        return self.revalidate(list(self.widgets))
+
+    def rect(self, widget):
+        self.refresh()
+        return self.grid.rects[widget]
+
+    def query_point(self, x, y, revalidate=False):
+        """
+        :param revalidate: re-read the rects of the widgets found (see revalidate())
+        """
+        self.refresh()
+        found = self._query_point(x, y)
+        if revalidate and self.revalidate(found):
+            found = self._query_point(x, y)
+        return found
+
+    def _query_point(self, x, y):
+        if self.array is not None:
+            return self.array.query_point(x, y)
+        return self.grid.query_point(x, y)
+
+    def query_rect(self, rect, revalidate=False):
+        """
+        :param revalidate: re-read the rects of the widgets found (see revalidate())
+        """
+        self.refresh()
+        found = self._query_rect(rect)
+        if revalidate and self.revalidate(found):
+            found = self._query_rect(rect)
+        return found
+
+    def _query_rect(self, rect):
+        if self.array is not None:
+            return self.array.query_rect(rect)
+        return self.grid.query_rect(rect)
+
+    def query_segment(self, x0, y0, x1, y1):
+        self.refresh()
+        return self.grid.query_segment(x0, y0, x1, y1)
+
+    def nearest(self, x, y, radius, accept=None, revalidate=False):
+        """
+        :param revalidate: re-read the rect of the widget found (see revalidate())
+        """
+        self.refresh()
+        found = self.grid.nearest(x, y, radius, accept)
+        if revalidate and found is not None and self.revalidate([found[0]]):
+            found = self.grid.nearest(x, y, radius, accept)
+        return found
@@ -0,0 +1,117 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: stats.py
+#       Counters and timings for the drag path, to see where the time goes.
+#
+#       Off by default. The library checks stats.enabled before counting anything,
+#       so when it's off each counting site costs one attribute lookup and a test.
+#
+#           from kivydnd import stats
+#           stats.enable()
+#           ...drag things around...
+#           print(stats.snapshot())
+#           stats.reset()
+#
+#       Counters:
+#       - collision_tests: point-in-widget tests, for hover and for drops
+#       - to_window_calls: conversions of a widget's position to Window coordinates
+#       - candidates_examined: destinations looked at as possible drop recipients,
+#         or by a motion sweep
+#       - callbacks_dispatched: calls of app functions (drop_func, motion_..._func,
+#         while_dragging_func and the like)
+#       Timings: on_touch_move (of the widget that was touched, not every widget
+#       Kivy hands the move to) and on_drag_finish.
+from __future__ import print_function
+
+from functools import wraps
+from timeit import default_timer
+
+COUNTERS = ["collision_tests", "to_window_calls", "candidates_examined", "callbacks_dispatched"]
+
+enabled = False
+# dictionary[name] = count
+counters = dict((name, 0) for name in COUNTERS)
+# dictionary[name] = [calls, total seconds, longest seconds]
+timings = {}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def count(name, n=1):
+    """
+    Add n to a counter. Callers check stats.enabled first.
+    """
+    counters[name] = counters.get(name, 0) + n
+
+
+def add_time(name, seconds):
+    timing = timings.get(name)
+    if timing is None:
+        timings[name] = [1, seconds, seconds]
+        return
+    timing[0] += 1
+    timing[1] += seconds
+    if seconds > timing[2]:
+        timing[2] = seconds
+
+
+def timed(name):
+    """
+    Decorator: while stats are enabled, add the time of each call to the timing called
+    name. When they're not, the function is just called.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_time(name, default_timer() - start)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """
+    :return: dictionary with "counters" (name: count) and "timings" (name: dictionary of
+    calls, total_ms, mean_us and max_us). Copies, so later counting doesn't change it.
+    """
+    result_timings = {}
+    for (name, (calls, total, longest)) in timings.items():
+        result_timings[name] = {
+            "calls": calls,
+            "total_ms": total * 1e3,
+            "mean_us": total / calls * 1e6,
+            "max_us": longest * 1e6,
+        }
+    return {"counters": dict(counters), "timings": result_timings}
+
+
+def reset():
+    for name in counters:
+        counters[name] = 0
+    timings.clear()
@@ -0,0 +1,215 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: testing.py
+#       Running drags without a display, for tests and profiling.
+#
+#       FakeWindow stands in for Kivy's Window (see window_provider.py) at the root of
+#       the widget tree. It has the parts of Kivy's Window that the library uses: a
+#       mouse_pos Property, children, and coordinate methods that change nothing. Kivy
+#       won't make a Widget until it has a window, so use_fake_window() also hands the
+#       FakeWindow to Kivy's EventLoop. Where Kivy can't open a window of its own it
+#       logs that it couldn't, and carries on with the FakeWindow. Its touch
+#       handlers are events, as on Kivy's Window, so they can be bound to (see
+#       recording.py).
+#       SyntheticTouch has the parts of a Kivy MotionEvent that the library uses.
+#       TouchDriver sends touches through the widgets' real on_touch_down,
+#       on_touch_move and on_touch_up, moving the window's mouse_pos along with them
+#       so that the on_motion bindings run too. It works with Kivy's Window as well.
+#       Its clock only moves when it does, so a run is the same every time.
+#
+#           from kivydnd.testing import use_fake_window, TouchDriver
+#           window = use_fake_window()      # before any drag-n-drop widgets exist
+#           window.add_widget(my_root)
+#           driver = TouchDriver(window)
+#           driver.drag(my_draggable, [(10, 10), (200, 150), (400, 300)])
+from __future__ import print_function
+
+from kivy.base import EventLoop
+from kivy.event import EventDispatcher
+from kivy.properties import ListProperty, NumericProperty, ObjectProperty, ReferenceListProperty
+
+from kivydnd.window_provider import set_window
+
+FAKE_WINDOW_SIZE = (800, 600)
+
+
+class FakeWindow(EventDispatcher):
+    __events__ = ("on_touch_down", "on_touch_move", "on_touch_up")
+
+    # The pointer, in Window coordinates, as on Kivy's Window.
+    mouse_pos = ObjectProperty((0, 0))
+    width = NumericProperty(FAKE_WINDOW_SIZE[0])
+    height = NumericProperty(FAKE_WINDOW_SIZE[1])
+    size = ReferenceListProperty(width, height)
+    children = ListProperty([])
+    # The window has no parent, like Kivy's.
+    parent = None
+
+    def add_widget(self, widget, index=0):
+        if widget.parent is not None:
+            raise ValueError("Cannot add %r to the window, it already has a parent %r" %
+                             (widget, widget.parent))
+        widget.parent = self
+        self.children.insert(index, widget)
+
+    def remove_widget(self, widget):
+        if widget not in self.children:
+            return
+        self.children.remove(widget)
+        widget.parent = None
+
+    def get_root_window(self):
+        return self
+
+    def get_parent_window(self):
+        return self
+
+    def to_widget(self, x, y, initial=True, relative=False):
+        return (x, y)
+
+    def to_window(self, x, y, initial=True, relative=False):
+        return (x, y)
+
+    def to_local(self, x, y, relative=False):
+        return (x, y)
+
+    def to_parent(self, x, y, relative=False):
+        return (x, y)
+
+    def on_touch_down(self, touch):
+        for widget in self.children[:]:
+            if widget.dispatch("on_touch_down", touch):
+                return True
+        return False
+
+    def on_touch_move(self, touch):
+        for widget in self.children[:]:
+            if widget.dispatch("on_touch_move", touch):
+                return True
+        return False
+
+    def on_touch_up(self, touch):
+        for widget in self.children[:]:
+            if widget.dispatch("on_touch_up", touch):
+                return True
+        return False
+
+
+def use_fake_window(**kwargs):
+    """
+    Make a FakeWindow and have the library, and Kivy's EventLoop, use it.
+    :return: the FakeWindow
+    """
+    window = FakeWindow(**kwargs)
+    EventLoop.set_window(window)
+    set_window(window)
+    return window
+
+
+class SyntheticTouch(object):
+    """
+    Just enough of a kivy MotionEvent for the DragNDropWidget handlers. time_end stays
+    -1, as it does for a touch that is still held, until up() is called.
+    """
+    def __init__(self, x, y, time_start, is_double_tap=False):
+        self.x = x
+        self.y = y
+        self.pos = (x, y)
+        self.time_start = time_start
+        self.time_update = time_start
+        self.time_end = -1
+        self.is_double_tap = is_double_tap
+        self.ud = {}
+
+    def move(self, x, y, time_update):
+        self.x = x
+        self.y = y
+        self.pos = (x, y)
+        self.time_update = time_update
+
+    def up(self, time_end):
+        self.time_update = time_end
+        self.time_end = time_end
+
+    # Layouts with coordinates of their own, such as RelativeLayout and ScrollView,
+    # move the touch into them and back out again.
+    def push(self, attrs=None):
+        if not hasattr(self, "_stack"):
+            self._stack = []
+        self._stack.append((self.x, self.y))
+
+    def pop(self):
+        (self.x, self.y) = self._stack.pop()
+        self.pos = (self.x, self.y)
+
+    def apply_transform_2d(self, transform):
+        (self.x, self.y) = transform(self.x, self.y)
+        self.pos = (self.x, self.y)
+
+
+class TouchDriver(object):
+    # Seconds between the touches the driver makes, and between their moves.
+    TOUCH_INTERVAL = 1.0
+    MOVE_INTERVAL = 0.01
+
+    def __init__(self, window=None):
+        """
+        :param window: the window whose mouse_pos follows the touches, or None to
+        leave the pointer alone
+        """
+        self.window = window
+        self.clock = 0.0
+
+    def down(self, widget, x, y, is_double_tap=False):
+        """
+        :param widget: the widget to send the touch to; the window, to send it down
+        the whole tree
+        :param x: x of the touch, in the widget's parent's coordinates
+        :param y: y of the touch, in the widget's parent's coordinates. mouse_pos is
+        set to the same point, which is only right if no ancestor of the widget (such
+        as a RelativeLayout) has coordinates of its own.
+        :return: the SyntheticTouch
+        """
+        self.clock += self.TOUCH_INTERVAL
+        touch = SyntheticTouch(x, y, self.clock, is_double_tap)
+        if self.window is not None:
+            self.window.mouse_pos = (x, y)
+        widget.dispatch("on_touch_down", touch)
+        return touch
+
+    def move(self, widget, touch, x, y):
+        self.clock += self.MOVE_INTERVAL
+        touch.move(x, y, self.clock)
+        if self.window is not None:
+            self.window.mouse_pos = (x, y)
+        widget.dispatch("on_touch_move", touch)
+
+    def up(self, widget, touch):
+        self.clock += self.MOVE_INTERVAL
+        touch.up(self.clock)
+        widget.dispatch("on_touch_up", touch)
+
+    def drag(self, widget, points):
+        """
+        Touch down at the first point, move through the rest, and let go.
+        :param points: list of (x, y)
+        :return: the SyntheticTouch
+        """
+        touch = self.down(widget, points[0][0], points[0][1])
+        for (x, y) in points[1:]:
+            self.move(widget, touch, x, y)
+        self.up(widget, touch)
+        return touch
@@ -0,0 +1,161 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: tracing.py
+#       A record of what happened in each drag, and when, for a trace viewer.
+#
+#       While tracing is enabled the library records events into a ring buffer: the
+#       touch down, the drag start, each move, the hit test and drop resolution, the
+#       drop dispatch, the end-of-drop animation and the post-drop cleanup. Once the
+#       buffer is full the oldest events are dropped. chrome_trace() returns the
+#       events in the Chrome trace event format, and export() writes them to a file
+#       that chrome://tracing or https://ui.perfetto.dev can open.
+#
+#           from kivydnd import tracing
+#           tracing.enable()
+#           ...do the slow drag...
+#           tracing.export("drag.json")
+#
+#       Like stats.py, it's off by default, and each tracing site checks
+#       tracing.enabled before doing anything else.
+from __future__ import print_function
+
+import json
+import os
+import threading
+from collections import deque
+from functools import wraps
+from timeit import default_timer
+
+DEFAULT_CAPACITY = 10000
+# Chrome trace events are grouped into categories, which the viewer can filter on.
+CATEGORY = "kivydnd"
+
+enabled = False
+events = deque(maxlen=DEFAULT_CAPACITY)
+_origin = default_timer()
+
+
+def enable(capacity=None):
+    """
+    :param capacity: events to keep; if given, the buffer is cleared and resized
+    """
+    global enabled, events
+    if capacity is not None:
+        events = deque(maxlen=capacity)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def clear():
+    events.clear()
+
+
+def now_us():
+    """
+    :return: microseconds since the module was imported
+    """
+    return (default_timer() - _origin) * 1e6
+
+
+def widget_label(widget):
+    return "%s at 0x%x" % (widget.__class__.__name__, id(widget))
+
+
+def _event(name, phase, timestamp, args):
+    event = {
+        "name": name,
+        "cat": CATEGORY,
+        "ph": phase,
+        "ts": timestamp,
+        "pid": os.getpid(),
+        "tid": threading.current_thread().ident,
+    }
+    if args:
+        event["args"] = args
+    return event
+
+
+def instant(name, args=None):
+    """
+    Record something that happened at a point in time.
+    """
+    event = _event(name, "i", now_us(), args)
+    event["s"] = "t"
+    events.append(event)
+
+
+def complete(name, start_us, args=None):
+    """
+    Record a span that started at start_us (from now_us()) and ends now.
+    """
+    end = now_us()
+    event = _event(name, "X", start_us, args)
+    event["dur"] = end - start_us
+    events.append(event)
+
+
+def begin_async(name, span_id, args=None):
+    """
+    Start a span that ends in some later call, such as an Animation. span_id ties the
+    beginning to the end_async() call with the same name.
+    """
+    event = _event(name, "b", now_us(), args)
+    event["id"] = span_id
+    events.append(event)
+
+
+def end_async(name, span_id, args=None):
+    event = _event(name, "e", now_us(), args)
+    event["id"] = span_id
+    events.append(event)
+
+
+def traced(name):
+    """
+    Decorator for widget methods: while tracing is enabled, record each call as a span
+    with the widget's label. When it's not, the method is just called.
+    """
+    def decorate(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not enabled:
+                return func(self, *args, **kwargs)
+            start = now_us()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                complete(name, start, {"widget": widget_label(self)})
+        return wrapper
+    return decorate
+
+
+def chrome_trace():
+    """
+    :return: the recorded events as a Chrome trace (a dictionary ready for json.dump)
+    """
+    return {"traceEvents": list(events), "displayTimeUnit": "ms"}
+
+
+def export(path):
+    """
+    Write the recorded events to path as a Chrome trace JSON file.
+    """
+    with open(path, "w") as trace_file:
+        json.dump(chrome_trace(), trace_file)
@@ -0,0 +1,52 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: window_provider.py
+#       The window the library reads the pointer from and binds mouse_pos on.
+#
+#       By default this is Kivy's Window, which is imported the first time it's asked
+#       for rather than when kivydnd is imported. Importing kivy.core.window starts a
+#       window provider, which needs a display. set_window() puts something else in
+#       its place, such as the FakeWindow in testing.py, so that drags can be run on a
+#       machine with no display.
+#
+#       Set the window before any DragNDropWidget or DropDestination binds to it: a
+#       widget bound to one window is unbound from whatever window is current at the
+#       time.
+from __future__ import print_function
+
+_window = [None]
+
+
+def get_window():
+    """
+    :return: the window set with set_window(), or else Kivy's Window
+    """
+    if _window[0] is None:
+        from kivy.core.window import Window
+        if Window is None:
+            raise RuntimeError("kivydnd: Kivy could not create a Window; "
+                               "use kivydnd.window_provider.set_window()")
+        _window[0] = Window
+    return _window[0]
+
+
+def set_window(window):
+    """
+    :param window: an object with a mouse_pos Kivy Property and add_widget(),
+    remove_widget(), to_window() and to_widget() methods, like Kivy's Window. None
+    goes back to Kivy's Window.
+    """
+    _window[0] = window
@@ -17,6 +17,9 @@ setup(
     license='Apache License 2.0',
     keywords='kivy drag-n-drop',
     packages=find_packages(exclude=[]),
+    extras_require={
+        'numpy': ['numpy'],
+    },
     data_files=[('share/kivydnd-examples',
         [
             'examples/dndexample1.py',
@@ -0,0 +1,87 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: conftest.py
+#       Fixtures for the tests. Every test runs in the one FakeWindow (see
+#       kivydnd/testing.py), under a fresh root widget. The widgets a test makes with
+#       the make fixture are closed after it, so the library's registries are empty
+#       again for the next one.
+#           PYTHONPATH=. python -m pytest tests
+from __future__ import print_function
+
+import os
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+import pytest
+
+from kivy.uix.widget import Widget
+
+from kivydnd.dragndropwidget import DragNDropWidget
+from kivydnd.dropdestination import DropDestination
+from kivydnd.scheduler import frame_scheduler
+from kivydnd.testing import TouchDriver, use_fake_window
+
+
+class Draggable(DragNDropWidget):
+    # The library's debug output asks for it.
+    text = "draggable"
+
+
+@pytest.fixture(scope="session")
+def window():
+    return use_fake_window()
+
+
+@pytest.fixture
+def root(window):
+    root = Widget(pos=(0, 0), size=window.size)
+    window.add_widget(root)
+    yield root
+    window.remove_widget(root)
+    for child in window.children[:]:
+        window.remove_widget(child)
+
+
+@pytest.fixture
+def driver(window):
+    return TouchDriver(window)
+
+
+@pytest.fixture
+def make(root):
+    """
+    make(kind, pos, size, **properties) puts a draggable or a destination (kind
+    "draggable" or "destination") in the root widget. Draggables don't animate, as
+    the Clock doesn't tick during a test.
+    """
+    made = []
+
+    def make(kind, pos, size, **properties):
+        if kind == "draggable":
+            widget = Draggable(pos=pos, size=size, size_hint=(None, None))
+            widget.drop_ok_do_animation = False
+            widget.not_drop_ok_do_animation = False
+        else:
+            widget = DropDestination(pos=pos, size=size, size_hint=(None, None))
+        for (name, value) in properties.items():
+            setattr(widget, name, value)
+        root.add_widget(widget)
+        made.append(widget)
+        return widget
+
+    yield make
+    frame_scheduler.run_all()
+    for widget in made:
+        widget.close()
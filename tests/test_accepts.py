@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_accepts.py
+#       DropDestination.accepts(), and the answers it remembers per kind of draggable.
+from __future__ import print_function
+
+
+def counting_accept_func(asked, answer):
+    def accept_func(destination, draggable):
+        asked.append(draggable.drag_type_key())
+        return answer(draggable)
+    return accept_func
+
+
+def test_accept_func_runs_once_per_kind(make):
+    asked = []
+    destination = make("destination", (300, 300), (100, 100), drop_group="g",
+                       accept_func=counting_accept_func(asked, lambda d: d.drag_kind == "card"))
+    cards = [make("draggable", (0, 0), (40, 40), drag_kind="card") for i in range(3)]
+    chip = make("draggable", (0, 0), (40, 40), drag_kind="chip")
+    assert all(destination.accepts(card) for card in cards)
+    assert not destination.accepts(chip)
+    assert not destination.accepts(chip)
+    assert asked == ["card", "chip"]
+
+
+def test_drag_type_key_defaults_to_the_class(make):
+    draggable = make("draggable", (0, 0), (40, 40))
+    assert draggable.drag_type_key() is draggable.__class__
+    draggable.drag_kind = "card"
+    assert draggable.drag_type_key() == "card"
+
+
+def test_changing_accept_func_or_eligibility_forgets_answers(make):
+    asked = []
+    destination = make("destination", (300, 300), (100, 100), drop_group="g",
+                       accept_func=counting_accept_func(asked, lambda d: True))
+    draggable = make("draggable", (0, 0), (40, 40))
+    assert destination.accepts(draggable)
+    destination.is_drop_eligible = False
+    assert not destination.accepts(draggable)
+    destination.is_drop_eligible = True
+    assert destination.accepts(draggable)
+    assert len(asked) == 2
+    destination.accept_func = counting_accept_func(asked, lambda d: False)
+    assert not destination.accepts(draggable)
+    assert len(asked) == 3
+
+
+def test_invalidate_accepts_cache_asks_again(make):
+    asked = []
+    room = [True]
+    destination = make("destination", (300, 300), (100, 100), drop_group="g",
+                       accept_func=counting_accept_func(asked, lambda d: room[0]))
+    draggable = make("draggable", (0, 0), (40, 40))
+    assert destination.accepts(draggable)
+    room[0] = False
+    assert destination.accepts(draggable)
+    destination.invalidate_accepts_cache()
+    assert not destination.accepts(draggable)
+
+
+def test_refused_drop_fails(make, driver, window, root):
+    failed = []
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         accept_func=lambda destination, draggable: False)
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     failed_drop_func=lambda widget: failed.append(widget))
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert failed == [draggable]
+    assert draggable.parent is root
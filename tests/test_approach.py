@@ -0,0 +1,100 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_approach.py
+#       approach_horizon: destinations hear that a drag is heading for them.
+from __future__ import print_function
+
+import pytest
+
+
+def approach_recorder(approaches):
+    def drag_approach_func(destination, draggable, eta, args):
+        approaches.append((destination, eta))
+    return drag_approach_func
+
+
+def move_right(driver, window, touch, x, y, steps, step_x=10):
+    # step_x pixels every TouchDriver.MOVE_INTERVAL: 1000 pixels a second by default.
+    for i in range(1, steps + 1):
+        driver.move(window, touch, x + i * step_x, y)
+    return x + steps * step_x
+
+
+def test_destination_ahead_hears_once_with_an_eta(make, driver, window):
+    approaches = []
+    ahead = make("destination", (400, 280), (40, 40), drop_group="g",
+                 drag_approach_func=approach_recorder(approaches))
+    make("draggable", (0, 280), (40, 40), drop_group="g", approach_horizon=0.5)
+    touch = driver.down(window, 20, 300)
+    x = move_right(driver, window, touch, 20, 300, 10)
+    assert len(approaches) == 1
+    (destination, eta) = approaches[0]
+    assert destination is ahead
+    # Told as soon as it came within half a second at 1000 pixels a second.
+    assert 0 < eta <= 0.5
+    move_right(driver, window, touch, x, 300, 5)
+    assert len(approaches) == 1
+    driver.up(window, touch)
+
+
+def test_eta_follows_the_velocity(make, driver, window):
+    approaches = []
+    make("destination", (400, 280), (40, 40), drop_group="g",
+         drag_approach_func=approach_recorder(approaches))
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", approach_horizon=1.0)
+    touch = driver.down(window, 20, 300)
+    move_right(driver, window, touch, 20, 300, 4)
+    (vx, vy) = draggable.pointer_history.velocity()
+    (t, x, y) = draggable.pointer_history.latest()
+    assert approaches[0][1] == pytest.approx((400 - x) / vx, rel=0.1)
+    driver.up(window, touch)
+
+
+def test_other_groups_and_destinations_behind_are_not_told(make, driver, window):
+    approaches = []
+    make("destination", (400, 280), (40, 40), drop_group="other",
+         drag_approach_func=approach_recorder(approaches))
+    make("destination", (0, 400), (40, 40), drop_group="g",
+         drag_approach_func=approach_recorder(approaches))
+    make("draggable", (0, 280), (40, 40), drop_group="g", approach_horizon=0.5)
+    touch = driver.down(window, 20, 300)
+    move_right(driver, window, touch, 20, 300, 10)
+    assert approaches == []
+    driver.up(window, touch)
+
+
+def test_turning_away_and_back_tells_again(make, driver, window):
+    approaches = []
+    ahead = make("destination", (400, 280), (40, 40), drop_group="g",
+                 drag_approach_func=approach_recorder(approaches))
+    make("draggable", (0, 280), (40, 40), drop_group="g", approach_horizon=0.5)
+    touch = driver.down(window, 20, 300)
+    x = move_right(driver, window, touch, 20, 300, 10)
+    x = move_right(driver, window, touch, x, 300, 15, step_x=-10)
+    move_right(driver, window, touch, x, 300, 15)
+    assert [destination for (destination, eta) in approaches] == [ahead, ahead]
+    driver.up(window, touch)
+
+
+def test_no_horizon_no_prediction(make, driver, window):
+    approaches = []
+    make("destination", (400, 280), (40, 40), drop_group="g",
+         drag_approach_func=approach_recorder(approaches))
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    move_right(driver, window, touch, 20, 300, 10)
+    assert approaches == []
+    driver.up(window, touch)
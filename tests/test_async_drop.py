@@ -0,0 +1,184 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_async_drop.py
+#       Drop handlers that finish later: the pending state, and rollback.
+from __future__ import print_function
+
+import threading
+from concurrent.futures import Future
+
+from kivy.clock import Clock
+
+from kivydnd.async_drop import is_deferred
+
+
+def wait_for(condition, timeout=5.0):
+    # Tick the Clock until condition() holds, for handlers finishing on other threads.
+    event = threading.Event()
+    for i in range(int(timeout / 0.01)):
+        Clock.tick()
+        if condition():
+            return True
+        event.wait(0.01)
+    return False
+
+
+def test_is_deferred():
+    assert is_deferred(Future())
+    assert not is_deferred(None)
+    assert not is_deferred(False)
+    assert not is_deferred(True)
+
+
+def test_failed_async_drop_rolls_back(make, driver, window, root):
+    result = Future()
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_func=lambda widget: result,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert draggable.drop_pending
+    assert failed == []
+    result.set_result(False)
+    # The Future's callback comes back to Kivy's thread through the Clock.
+    Clock.tick()
+    assert not draggable.drop_pending
+    assert failed == [draggable]
+    assert draggable.parent is root
+
+
+def test_raising_async_drop_rolls_back(make, driver, window, root):
+    result = Future()
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_func=lambda widget: result,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    result.set_exception(ValueError("no room"))
+    Clock.tick()
+    assert failed == [draggable]
+    assert draggable.parent is root
+
+
+def test_async_drop_goes_ahead_when_it_succeeds(make, driver, window):
+    result = Future()
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_func=lambda widget: result,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    result.set_result(True)
+    Clock.tick()
+    assert failed == []
+    assert not draggable.drop_pending
+    assert draggable.parent is None
+
+
+def test_pending_drop_ignores_new_touches(make, driver, window):
+    result = Future()
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_func=lambda widget: result)
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert draggable.drop_pending
+    assert draggable.opacity == draggable.drop_pending_opacity
+    pos = list(draggable.pos)
+    driver.drag(window, [(350, 350), (300, 300), (100, 100)])
+    assert draggable.pos == pos
+    assert draggable.drop_pending
+    result.set_result(None)
+    Clock.tick()
+    assert not draggable.drop_pending
+
+
+def test_drop_in_thread_runs_off_the_main_thread(make, driver, window):
+    threads = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g", drop_in_thread=True,
+                     drop_func=lambda widget: threads.append(threading.current_thread()))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert wait_for(lambda: not draggable.drop_pending)
+    assert threads and threads[0] is not threading.current_thread()
+    assert draggable.parent is None
+
+
+def test_drop_in_thread_returning_false_rolls_back(make, driver, window, root):
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g", drop_in_thread=True,
+                     drop_func=lambda widget: False,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert wait_for(lambda: failed)
+    assert draggable.parent is root
+
+
+def test_coroutine_drop_func(make, driver, window, root):
+    failed = []
+
+    async def refuse(widget):
+        return False
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_func=refuse,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert wait_for(lambda: failed)
+    assert draggable.parent is root
+
+
+def two_recipients(make, calls, results):
+    """
+    Two overlapping destinations at (300, 300), whose drop_funcs return results[0] and
+    results[1]. calls gets ("drop", i), ("rolled back", i) and ("failed", draggable).
+    :return: the draggable
+    """
+    for (i, result) in enumerate(results):
+        destination = make("destination", (300, 300), (100, 100), drop_group="g")
+        destination.drop_func = lambda widget, i=i, result=result: \
+            calls.append(("drop", i)) or result
+        destination.drop_rolled_back_func = lambda widget, i=i: calls.append(("rolled back", i))
+    return make("draggable", (0, 0), (40, 40), drop_group="g",
+                failed_drop_func=lambda widget: calls.append(("failed", widget)))
+
+
+def test_recipients_that_took_the_drop_hear_it_was_rolled_back(make, driver, window):
+    calls = []
+    draggable = two_recipients(make, calls, [None, False])
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert sorted(calls[:2]) == [("drop", 0), ("drop", 1)]
+    assert calls[2:] == [("rolled back", 0), ("failed", draggable)]
+
+
+def test_recipients_hear_of_a_rollback_by_a_deferred_handler(make, driver, window):
+    calls = []
+    results = [Future(), Future()]
+    draggable = two_recipients(make, calls, results)
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    results[0].set_result(True)
+    results[1].set_exception(ValueError("no room"))
+    Clock.tick()
+    assert calls[2:] == [("rolled back", 0), ("failed", draggable)]
+
+
+def test_no_rollback_when_the_drop_goes_through(make, driver, window):
+    calls = []
+    two_recipients(make, calls, [None, True])
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert sorted(calls) == [("drop", 0), ("drop", 1)]
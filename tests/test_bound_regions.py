@@ -0,0 +1,98 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_bound_regions.py
+#       Where bound_zone_objects and bound_polygons let a widget be dragged.
+from __future__ import print_function
+
+from kivy.uix.widget import Widget
+
+from kivydnd.bound_regions import union_rects
+from kivydnd.geometry import polygon_contains
+
+
+def zone(root, pos, size):
+    widget = Widget(pos=pos, size=size, size_hint=(None, None))
+    root.add_widget(widget)
+    return widget
+
+
+def drag_to(driver, window, touch_points):
+    touch = driver.down(window, *touch_points[0])
+    for (x, y) in touch_points[1:]:
+        driver.move(window, touch, x, y)
+    return touch
+
+
+def test_union_rects_adds_the_straddling_rects():
+    rects = union_rects([(0, 0, 100, 50), (50, 0, 100, 50)])
+    assert (0, 0, 150, 50) in rects
+    # Both halves are inside the merged rect, so they are dropped.
+    assert rects == [(0, 0, 150, 50)]
+    assert union_rects([(0, 0, 10, 10), (100, 100, 10, 10)]) == \
+        [(0, 0, 10, 10), (100, 100, 10, 10)]
+
+
+def test_drag_stays_in_the_bound_zone(make, driver, window, root):
+    area = zone(root, (0, 0), (200, 200))
+    draggable = make("draggable", (0, 0), (40, 40), bound_zone_objects=[area])
+    touch = drag_to(driver, window, [(20, 20), (100, 100), (500, 150)])
+    assert draggable.pos == [160, 130]
+    driver.up(window, touch)
+
+
+def test_bounds_follow_a_moved_zone(make, driver, window, root):
+    area = zone(root, (0, 0), (200, 200))
+    draggable = make("draggable", (0, 0), (40, 40), bound_zone_objects=[area])
+    touch = drag_to(driver, window, [(20, 20), (100, 100), (500, 150)])
+    assert draggable.x == 160
+    # Moving the zone mid-drag is seen at once, without invalidate_bounds().
+    area.x = 300
+    driver.move(window, touch, 510, 150)
+    assert draggable.x == 460
+    driver.up(window, touch)
+
+
+def test_union_keeps_out_of_the_gap(make, driver, window, root):
+    # An L: a bar along the bottom and a column up the left.
+    bottom = zone(root, (0, 0), (400, 100))
+    left = zone(root, (0, 0), (100, 400))
+    draggable = make("draggable", (0, 0), (40, 40), bound_zone_objects=[bottom, left],
+                     bound_zone_mode="union")
+    touch = drag_to(driver, window, [(20, 20), (30, 30), (300, 300)])
+    (x, y) = draggable.pos
+    inside_bottom = x + 40 <= 400 and y + 40 <= 100
+    inside_left = x + 40 <= 100 and y + 40 <= 400
+    assert inside_bottom or inside_left
+    driver.up(window, touch)
+
+
+def test_bounding_box_lets_the_gap_in(make, driver, window, root):
+    bottom = zone(root, (0, 0), (400, 100))
+    left = zone(root, (0, 0), (100, 400))
+    draggable = make("draggable", (0, 0), (40, 40), bound_zone_objects=[bottom, left])
+    touch = drag_to(driver, window, [(20, 20), (30, 30), (300, 300)])
+    assert draggable.pos == [280, 280]
+    driver.up(window, touch)
+
+
+def test_center_stays_in_a_bound_polygon(make, driver, window):
+    triangle = [0, 0, 400, 0, 0, 400]
+    draggable = make("draggable", (0, 0), (40, 40), bound_polygons=[triangle])
+    touch = drag_to(driver, window, [(20, 20), (30, 30), (350, 350)])
+    (center_x, center_y) = draggable.center
+    assert polygon_contains(triangle, center_x - 0.01, center_y - 0.01)
+    assert center_x + center_y > 390
+    driver.up(window, touch)
@@ -0,0 +1,75 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_debug_print.py
+#       Debug output: what it looks like, and that it costs nothing when it's off.
+from __future__ import print_function
+
+import io
+
+from kivydnd.debug_print import Debug, lazy
+
+
+def debug_to(output, *args, **kwargs):
+    debug = Debug(*args, **kwargs)
+    debug.out_fp = output
+    debug.err_fp = output
+    return debug
+
+
+def print_something(debug, *args, **kwargs):
+    debug.print(*args, **kwargs)
+
+
+def test_output_is_where_method_and_values():
+    output = io.StringIO()
+    debug = debug_to(output, True)
+    print_something(debug, "value:", 3)
+    (where, method, text) = output.getvalue().split(None, 2)
+    assert where.startswith("test_debug_print.py:")
+    assert method == "print_something()"
+    assert text == "value: 3\n"
+
+
+def test_lazy_arguments_are_only_worked_out_when_printed():
+    output = io.StringIO()
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "worked out"
+    debug = debug_to(output, False)
+    assert not debug.active
+    debug.print("off:", lazy(expensive))
+    assert calls == []
+    assert output.getvalue() == ""
+    debug.debug_flag = True
+    debug.print("on:", lazy(expensive))
+    assert calls == [1]
+    assert output.getvalue().endswith("on: worked out\n")
+
+
+def test_levels_are_and_ed_with_the_register():
+    output = io.StringIO()
+    debug = debug_to(output, False, register=0x02)
+    assert debug.enabled(0x02)
+    assert not debug.enabled(0x01)
+    debug.print("one", level=0x01)
+    debug.print("two", level=0x02)
+    debug.err_print("definitely", definitely=True)
+    assert [line.split()[-1] for line in output.getvalue().splitlines()] == \
+        ["two", "definitely"]
+    debug.register = 0x00
+    assert not debug.active
@@ -0,0 +1,83 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_deferred_drop.py
+#       defer_drop_dispatch, and a drop_func returning False with and without it.
+from __future__ import print_function
+
+import pytest
+
+from kivy.clock import Clock
+
+from kivydnd.scheduler import frame_scheduler
+
+
+def finish_frames():
+    # Run what the drop queued on the frame scheduler, then let its when_done
+    # callbacks come back through the Clock.
+    frame_scheduler.run_all()
+    Clock.tick()
+
+
+def test_deferred_drop_dispatch_lands_on_a_later_frame(make, driver, window):
+    drops = []
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         drop_func=lambda draggable: drops.append(draggable))
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     defer_drop_dispatch=True)
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert draggable.drop_pending
+    assert drops == []
+    frame_scheduler.run_all()
+    assert drops == [draggable]
+    # The drop_func ran on the frame scheduler too; hearing that it's done takes
+    # one more turn of the Clock.
+    Clock.tick()
+    assert not draggable.drop_pending
+    assert draggable.parent is None
+
+
+@pytest.mark.parametrize("defer", [False, True])
+@pytest.mark.parametrize("owner", ["draggable", "destination"])
+def test_drop_func_returning_false_fails_the_drop(make, driver, window, root, defer, owner):
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     defer_drop_dispatch=defer,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    destination = make("destination", (300, 300), (100, 100), drop_group="g")
+    refuse = lambda widget: False
+    if owner == "draggable":
+        draggable.drop_func = refuse
+    else:
+        destination.drop_func = refuse
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    finish_frames()
+    assert failed == [draggable]
+    assert not draggable.drop_pending
+    assert draggable.parent is root
+
+
+@pytest.mark.parametrize("defer", [False, True])
+@pytest.mark.parametrize("returned", [None, True, 0])
+def test_drop_func_returning_anything_else_succeeds(make, driver, window, defer, returned):
+    failed = []
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     defer_drop_dispatch=defer, drop_func=lambda widget: returned,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    finish_frames()
+    assert failed == []
+    assert draggable.parent is None
@@ -0,0 +1,83 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_drag_start.py
+#       drag_start_policy "long_press", "distance" and "immediate".
+from __future__ import print_function
+
+from kivydnd.dnd_storage_singletons import active_draggables
+from kivydnd.testing import SyntheticTouch
+
+
+def test_distance_waits_for_drag_start_distance(make, driver, window):
+    starts = []
+    draggable = make("draggable", (0, 0), (40, 40), drag_start_policy="distance",
+                     drag_start_distance=10,
+                     drag_start_func=lambda *args: starts.append(args))
+    touch = driver.down(window, 20, 20)
+    driver.move(window, touch, 26, 26)
+    assert draggable not in active_draggables
+    assert draggable.pos == [0, 0]
+    driver.move(window, touch, 28, 28)
+    assert draggable in active_draggables
+    # No lag: the widget keeps the touch where it took hold of it.
+    assert draggable.pos == [8, 8]
+    driver.move(window, touch, 50, 30)
+    assert len(starts) == 1
+    driver.up(window, touch)
+
+
+def test_distance_tap_is_not_a_drag(make, driver, window, root):
+    draggable = make("draggable", (0, 0), (40, 40), drag_start_policy="distance")
+    driver.drag(window, [(20, 20), (22, 21)])
+    assert draggable.parent is root
+    assert draggable.pos == [0, 0]
+    assert not active_draggables
+
+
+def test_immediate_starts_on_the_first_move(make, driver, window):
+    draggable = make("draggable", (0, 0), (40, 40), drag_start_policy="immediate")
+    touch = driver.down(window, 20, 20)
+    driver.move(window, touch, 21, 20)
+    assert draggable in active_draggables
+    assert draggable.pos == [1, 0]
+    driver.up(window, touch)
+
+
+def test_long_press_ignores_a_quick_tap(make, window):
+    draggable = make("draggable", (0, 0), (40, 40), drag_start_delay=0.2)
+    touch = SyntheticTouch(20, 20, 10.0)
+    # Kivy held the down event back until the touch came up, 0.1 s later.
+    touch.time_end = 10.1
+    window.dispatch("on_touch_down", touch)
+    assert not draggable.am_touched
+
+
+def test_long_press_drags_a_held_touch(make, driver, window):
+    draggable = make("draggable", (0, 0), (40, 40))
+    touch = driver.down(window, 20, 20)
+    assert draggable.am_touched
+    driver.move(window, touch, 22, 20)
+    assert draggable in active_draggables
+    driver.up(window, touch)
+
+
+def test_touch_elsewhere_is_ignored(make, driver, window):
+    draggable = make("draggable", (0, 0), (40, 40), drag_start_policy="immediate")
+    touch = driver.down(window, 200, 200)
+    driver.move(window, touch, 300, 300)
+    assert not draggable.am_touched
+    assert draggable.pos == [0, 0]
+    driver.up(window, touch)
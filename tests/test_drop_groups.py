@@ -0,0 +1,105 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_drop_groups.py
+#       Drop group bitmasks, and which destinations a drag can reach through them.
+from __future__ import print_function
+
+from kivydnd.dnd_storage_singletons import drag_destinations_dict
+from kivydnd.drop_groups import (
+    group_bit, group_mask, group_names, register_in_groups, unregister_from_groups)
+
+
+def destination(make, drops, pos, **properties):
+    widget = make("destination", pos, (100, 100), **properties)
+    widget.drop_func = lambda draggable: drops.append(widget)
+    return widget
+
+
+def test_each_name_gets_its_own_lasting_bit():
+    bit = group_bit("test-groups-a")
+    assert bit & (bit - 1) == 0
+    assert group_bit("test-groups-b") != bit
+    assert group_bit("test-groups-a") == bit
+    assert group_mask(["test-groups-a", "test-groups-b"]) == bit | group_bit("test-groups-b")
+    assert group_mask([]) == 0
+
+
+def test_group_names_puts_drop_group_first_without_duplicates(make):
+    widget = make("destination", (0, 0), (10, 10), drop_group="a", drop_groups=["b", "a", "c"])
+    assert group_names(widget) == ["a", "b", "c"]
+    assert widget.drop_group_mask == group_mask(["a", "b", "c"])
+
+
+def test_register_in_groups_leaves_groups_dropped():
+    registry = {}
+    widget = object()
+    register_in_groups(registry, widget, ["a", "b"])
+    assert set(name for name in registry if widget in registry[name]) == set(["a", "b"])
+    register_in_groups(registry, widget, ["b", "c"])
+    assert set(name for name in registry if widget in registry[name]) == set(["b", "c"])
+    unregister_from_groups(registry, widget)
+    assert not any(widget in registry[name] for name in registry)
+
+
+def test_changing_groups_moves_the_destination(make):
+    widget = make("destination", (0, 0), (10, 10), drop_group="a")
+    assert widget in drag_destinations_dict["a"]
+    widget.drop_groups = ["b"]
+    assert widget in drag_destinations_dict["b"]
+    widget.drop_group = "c"
+    assert widget not in drag_destinations_dict["a"]
+    assert widget.drop_group_mask == group_mask(["c", "b"])
+
+
+def test_drop_group_mask_keeps_other_groups_out(make, driver, window):
+    drops = []
+    destination(make, drops, (300, 300), drop_group="other")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert drops == []
+    assert draggable.parent is not None
+
+
+def test_drop_groups_list_reaches_each_group(make, driver, window):
+    drops = []
+    second = destination(make, drops, (300, 300), drop_group="b")
+    destination(make, drops, (500, 300), drop_group="c")
+    draggable = make("draggable", (0, 0), (40, 40), drop_groups=["a", "b"])
+    assert draggable.drop_group_mask & second.drop_group_mask
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert drops == [second]
+
+
+def test_destination_in_several_groups_takes_each(make, driver, window):
+    drops = []
+    shared = destination(make, drops, (300, 300), drop_group="a", drop_groups=["b"])
+    for group in ("a", "b"):
+        draggable = make("draggable", (0, 0), (40, 40), drop_group=group)
+        driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+        assert draggable.parent is None
+    assert drops == [shared, shared]
+
+
+def test_drop_group_mask_limits_while_dragging(make, driver, window):
+    seen = []
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         while_dragging_func=lambda widget, event: seen.append("g"))
+    make("destination", (300, 300), (100, 100), drop_group="other",
+         while_dragging_func=lambda widget, event: seen.append("other"))
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert seen
+    assert set(seen) == set(["g"])
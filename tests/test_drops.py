@@ -0,0 +1,56 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_drops.py
+#       Drags sent through the window with TouchDriver, and where they land.
+from __future__ import print_function
+
+
+def drop_recorder(drops):
+    """
+    :return: a drop_func for a destination, which adds the destination to drops
+    """
+    def drop_func(draggable):
+        drops.append(drop_func.destination)
+    return drop_func
+
+
+def destination(make, drops, pos, **properties):
+    widget = make("destination", pos, (100, 100), drop_func=drop_recorder(drops),
+                  **properties)
+    widget.drop_func.destination = widget
+    return widget
+
+
+def test_point_drop_lands_under_the_touch(make, driver, window):
+    drops = []
+    hit = destination(make, drops, (300, 300), drop_group="g")
+    destination(make, drops, (500, 300), drop_group="g")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert drops == [hit]
+    assert draggable.parent is None
+
+
+def test_point_drop_outside_every_destination_fails(make, driver, window, root):
+    drops = []
+    failed = []
+    destination(make, drops, (300, 300), drop_group="g")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     failed_drop_func=lambda widget: failed.append(widget))
+    driver.drag(window, [(20, 20), (200, 200), (600, 100)])
+    assert drops == []
+    assert failed == [draggable]
+    assert draggable.parent is root
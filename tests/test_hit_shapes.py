@@ -0,0 +1,88 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_hit_shapes.py
+#       Circle, polygon and custom hit shapes for DropDestinations.
+from __future__ import print_function
+
+
+def shaped(make, drops, **properties):
+    widget = make("destination", (300, 300), (100, 100), drop_group="g", **properties)
+    widget.drop_func = lambda draggable: drops.append(widget)
+    return widget
+
+
+def test_circle_fills_the_box_by_default(make):
+    circle = make("destination", (300, 300), (100, 100), hit_shape="circle")
+    assert circle.hit_test(50, 50)
+    assert circle.hit_test(50, 99)
+    assert not circle.hit_test(5, 5)
+    circle.hit_radius = 20
+    assert not circle.hit_test(50, 75)
+    assert circle.hit_test(50, 65)
+
+
+def test_polygon(make):
+    triangle = make("destination", (300, 300), (100, 100), hit_shape="polygon",
+                    hit_polygon=[0, 0, 100, 0, 0, 100])
+    assert triangle.hit_test(10, 10)
+    assert not triangle.hit_test(90, 90)
+    assert triangle.absolute_collide_point(310, 310)
+    assert not triangle.absolute_collide_point(390, 390)
+
+
+def test_hit_test_func_decides(make):
+    asked = []
+
+    def left_half(destination, x, y):
+        asked.append((x, y))
+        return x < 50
+    custom = make("destination", (300, 300), (100, 100), hit_test_func=left_half)
+    assert not custom.hit_is_rect()
+    assert custom.absolute_collide_point(310, 350)
+    assert not custom.absolute_collide_point(390, 350)
+    # Outside the bounding box, the function isn't asked.
+    assert not custom.absolute_collide_point(500, 350)
+    assert asked == [(10, 50), (90, 50)]
+
+
+def test_drop_in_a_circles_corner_misses(make, driver, window, root):
+    drops = []
+    shaped(make, drops, hit_shape="circle")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (305, 305)])
+    assert drops == []
+    assert draggable.parent is root
+
+
+def test_drop_in_a_circles_middle_lands(make, driver, window):
+    drops = []
+    circle = shaped(make, drops, hit_shape="circle")
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert drops == [circle]
+
+
+def test_hover_follows_the_shape(make, window):
+    events = []
+    circle = make("destination", (300, 300), (100, 100), hit_shape="circle")
+    circle.motion_over_widget_func = lambda widget, args: events.append("over")
+    circle.motion_flee_widget_func = lambda widget, args: events.append("flee")
+    window.mouse_pos = (0, 0)
+    window.mouse_pos = (305, 305)
+    assert events == []
+    window.mouse_pos = (350, 350)
+    window.mouse_pos = (395, 395)
+    assert events == ["over", "flee"]
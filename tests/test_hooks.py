@@ -0,0 +1,106 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_hooks.py
+#       Timing the app's callbacks, and reporting the slow ones.
+from __future__ import print_function
+
+import threading
+
+import pytest
+
+from kivydnd import hooks
+
+
+@pytest.fixture
+def timing():
+    hooks.reset()
+    hooks.enable(threshold=hooks.DEFAULT_THRESHOLD)
+    yield
+    hooks.disable()
+    hooks.reset()
+
+
+def test_nothing_is_timed_while_disabled(make, driver, window):
+    hooks.reset()
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         drop_func=lambda draggable: None)
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert hooks.snapshot() == {}
+
+
+def test_a_drag_times_each_hook(timing, make, driver, window):
+    seen = []
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         drop_func=lambda draggable: seen.append("drop"),
+         motion_over_widget_func=lambda widget, args: seen.append("over"))
+    make("draggable", (0, 0), (40, 40), drop_group="g",
+         drag_start_func=lambda *args: seen.append("start"))
+    window.mouse_pos = (1, 1)
+    window.mouse_pos = (350, 350)
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert "drop" in seen and "over" in seen and "start" in seen
+    snapshot = hooks.snapshot()
+    for hook in ("drop_func", "motion_over_widget_func", "drag_start_func"):
+        assert snapshot[hook]["calls"] >= 1
+        assert snapshot[hook]["slow"] == 0
+        assert sum(count for (bound, count) in snapshot[hook]["buckets"]) == \
+            snapshot[hook]["calls"]
+
+
+def test_a_slow_call_is_reported(timing):
+    reported = []
+    listener = reported.append
+    hooks.add_listener(listener)
+    try:
+        hooks.record("drop_func", "widget", test_a_slow_call_is_reported, 0.05)
+        hooks.record("drop_func", "widget", test_a_slow_call_is_reported, 0.001)
+    finally:
+        hooks.remove_listener(listener)
+    assert [call["ms"] for call in reported] == [pytest.approx(50)]
+    assert reported[0]["func"].endswith("test_a_slow_call_is_reported")
+    assert list(hooks.slow_calls) == reported
+    snapshot = hooks.snapshot()["drop_func"]
+    assert snapshot["calls"] == 2
+    assert snapshot["slow"] == 1
+    assert snapshot["max_ms"] == pytest.approx(50)
+    # 1 ms goes in the "up to 1 ms" bucket, 50 ms in "up to 64 ms".
+    buckets = dict((bound, count) for (bound, count) in snapshot["buckets"] if count)
+    assert buckets == {1: 1, 64: 1}
+
+
+def test_call_hook_returns_and_raises_what_the_hook_does(timing):
+    assert hooks.call_hook("drop_func", None, lambda x: x + 1, 1) == 2
+
+    def fail():
+        raise ValueError("no")
+    with pytest.raises(ValueError):
+        hooks.call_hook("drop_func", None, fail)
+    assert hooks.snapshot()["drop_func"]["calls"] == 2
+
+
+def test_calls_recorded_from_several_threads_are_all_counted(timing):
+    def record_many():
+        for i in range(2000):
+            hooks.record("drop_func", None, record_many, 0.0001)
+    threads = [threading.Thread(target=record_many) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = hooks.snapshot()["drop_func"]
+    assert snapshot["calls"] == 8000
+    assert sum(count for (bound, count) in snapshot["buckets"]) == 8000
@@ -0,0 +1,127 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_inertia.py
+#       inertial_release: flicks glide on, and releases held still don't.
+from __future__ import print_function
+
+from conftest import Draggable
+
+FRAME = 1 / 60.0
+
+
+def flick(driver, window, touch, x, y, steps, step_x):
+    # Moves of step_x pixels every TouchDriver.MOVE_INTERVAL seconds.
+    for i in range(1, steps + 1):
+        driver.move(window, touch, x + i * step_x, y)
+    return x + steps * step_x
+
+
+def glide(draggable, frames=1000):
+    """
+    Step the glide a frame at a time, rather than waiting on the Clock.
+    :return: the number of frames it took to come to rest
+    """
+    for frame in range(frames):
+        if draggable._inertia_event is None:
+            return frame
+        draggable.inertia_step(FRAME)
+    raise AssertionError("the glide never came to rest")
+
+
+def test_flick_glides_and_drops_where_it_rests(make, driver, window):
+    drops = []
+    destination = make("destination", (300, 250), (300, 100), drop_group="g")
+    destination.drop_func = lambda draggable: drops.append(draggable)
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", inertial_release=True)
+    touch = driver.down(window, 20, 300)
+    released_x = flick(driver, window, touch, 20, 300, 10, 10)
+    driver.up(window, touch)
+    # The touch came up short of the destination; the glide carries it there.
+    assert released_x < destination.x
+    assert draggable._inertia_event is not None
+    assert drops == []
+    assert glide(draggable) > 0
+    assert draggable._inertia_velocity == (0.0, 0.0)
+    assert destination.x <= draggable.touch_x <= destination.right
+    assert drops == [draggable]
+
+
+def test_flick_that_rests_short_of_a_destination_fails(make, driver, window, root):
+    failed = []
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", inertial_release=True,
+                     failed_drop_func=lambda widget: failed.append(widget))
+    touch = driver.down(window, 20, 300)
+    released_x = flick(driver, window, touch, 20, 300, 10, 10)
+    driver.up(window, touch)
+    glide(draggable)
+    assert draggable.touch_x > released_x
+    assert failed == [draggable]
+    assert draggable.parent is root
+
+
+def test_release_after_holding_still_does_not_glide(make, driver, window):
+    drops = []
+    destination = make("destination", (300, 250), (300, 100), drop_group="g")
+    destination.drop_func = lambda draggable: drops.append(draggable)
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", inertial_release=True)
+    touch = driver.down(window, 20, 300)
+    flick(driver, window, touch, 20, 300, 32, 10)
+    # Hold still for two seconds before letting go.
+    driver.clock += 2.0
+    driver.up(window, touch)
+    assert draggable._inertia_event is None
+    assert drops == [draggable]
+    assert draggable.touch_x == 340
+
+
+def test_glide_stops_at_the_window_edge(make, driver, window):
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", inertial_release=True)
+    touch = driver.down(window, 20, 300)
+    flick(driver, window, touch, 20, 300, 10, 60)
+    driver.up(window, touch)
+    glide(draggable)
+    assert draggable.right == window.width
+
+
+def test_inertia_capture_stops_on_the_first_destination(make, driver, window):
+    drops = []
+    near = make("destination", (250, 250), (60, 100), drop_group="g")
+    near.drop_func = lambda draggable: drops.append(near)
+    far = make("destination", (330, 250), (300, 100), drop_group="g")
+    far.drop_func = lambda draggable: drops.append(far)
+    draggable = make("draggable", (0, 280), (40, 40), drop_group="g", inertial_release=True,
+                     inertia_capture=True)
+    touch = driver.down(window, 20, 300)
+    flick(driver, window, touch, 20, 300, 10, 10)
+    driver.up(window, touch)
+    glide(draggable)
+    assert drops == [near]
+
+
+def test_closing_mid_glide_stops_without_a_drop(root, driver, window):
+    failed = []
+    # Not made with make(): closed here, and it can only be closed once.
+    draggable = Draggable(pos=(0, 280), size=(40, 40), size_hint=(None, None),
+                          drop_group="g", inertial_release=True,
+                          failed_drop_func=lambda widget: failed.append(widget))
+    root.add_widget(draggable)
+    touch = driver.down(window, 20, 300)
+    flick(driver, window, touch, 20, 300, 10, 10)
+    driver.up(window, touch)
+    assert draggable._inertia_event is not None
+    draggable.close()
+    assert draggable._inertia_event is None
+    assert failed == []
@@ -0,0 +1,51 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_lazy_imports.py
+#       Importing kivydnd doesn't create a window or import NumPy.
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+
+from kivydnd import window_provider
+
+# Imports every module that a program using kivydnd would, and reports which of the
+# slow modules came along.
+IMPORT_EVERYTHING = """
+import sys
+import kivydnd.dragndropwidget, kivydnd.dropdestination, kivydnd.rect_array
+import kivydnd.recording, kivydnd.leak_audit, kivydnd.tracing
+print("kivy.core.window" in sys.modules, "numpy" in sys.modules)
+"""
+
+
+def test_importing_kivydnd_creates_no_window_and_skips_numpy():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, KIVY_NO_ARGS="1", PYTHONPATH=here)
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_EVERYTHING],
+                                     env=env, cwd=here)
+    assert output.decode().split()[-2:] == ["False", "False"]
+
+
+def test_set_window_replaces_the_window(window):
+    stand_in = object()
+    window_provider.set_window(stand_in)
+    try:
+        assert window_provider.get_window() is stand_in
+    finally:
+        window_provider.set_window(window)
+    assert window_provider.get_window() is window
@@ -0,0 +1,92 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_leak_audit.py
+#       Finding drag-n-drop widgets that were taken off the screen without close().
+from __future__ import print_function
+
+from kivydnd.dropdestination import DropDestination
+from kivydnd.leak_audit import LeakAuditor, audit, format_report
+from kivydnd.tracing import widget_label
+
+from conftest import Draggable
+
+
+def leaked_destination(root):
+    """
+    :return: a destination that tracks the pointer, taken out of root without close()
+    """
+    destination = DropDestination(pos=(300, 300), size=(100, 100), size_hint=(None, None))
+    destination.drop_group = "g"
+    destination.motion_over_widget_func = lambda widget, args: None
+    root.add_widget(destination)
+    root.remove_widget(destination)
+    return destination
+
+
+def test_nothing_is_left_after_closing(root, driver, window):
+    destination = DropDestination(pos=(300, 300), size=(100, 100), size_hint=(None, None))
+    destination.drop_group = "g"
+    draggable = Draggable(pos=(0, 0), size=(40, 40), size_hint=(None, None))
+    draggable.drop_group = "g"
+    draggable.drop_ok_do_animation = False
+    root.add_widget(destination)
+    root.add_widget(draggable)
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    # The drop leaves the draggable without a parent, for the app to put somewhere
+    # or close.
+    report = audit(window)
+    assert report["detached"] == [(widget_label(draggable), ["draggables_dict"])]
+    assert report["registries"]["drop_destinations"] == 1
+    draggable.close()
+    destination.close()
+    report = audit(window)
+    assert report["detached"] == []
+    assert report["dangling_bindings"] == []
+    assert report["registries"]["drop_destinations"] == 0
+
+
+def test_a_widget_removed_without_close_is_reported(root, window):
+    destination = leaked_destination(root)
+    try:
+        report = audit(window)
+        label = widget_label(destination)
+        assert [name for (name, registries) in report["detached"]] == [label]
+        assert (label, "not in the window") in report["dangling_bindings"]
+    finally:
+        destination.close()
+    assert audit(window)["detached"] == []
+
+
+def test_auditor_counts_checks_a_widget_stays_detached(root, window):
+    auditor = LeakAuditor(window, trace_memory=False)
+    first = auditor.check()
+    assert first["check"] == 1
+    assert first["memory_growth_bytes"] is None
+    destination = leaked_destination(root)
+    label = widget_label(destination)
+    try:
+        second = auditor.check()
+        assert second["growth"]["drop_destinations"] == 1
+        assert second["detached_checks"] == {label: 1}
+        assert auditor.check()["detached_checks"] == {label: 2}
+        # Back in the window: no longer detached, and forgotten.
+        root.add_widget(destination)
+        report = auditor.check()
+        assert report["detached_checks"] == {}
+        assert report["growth_since_last"]["drop_destinations"] == 0
+        assert label in format_report(second)
+    finally:
+        destination.close()
@@ -0,0 +1,156 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_motion_sweep.py
+#       A fast drag across small destinations, with and without motion_sweep.
+from __future__ import print_function
+
+from kivydnd.motion_sweep import sweep_hub
+from kivydnd.scheduler import frame_scheduler
+
+
+def event_recorder(events, name):
+    def record(destination, args):
+        events.append((name, destination))
+    return record
+
+
+def small_destination(make, events, pos, **properties):
+    destination = make("destination", pos, (10, 10), drop_group="g",
+                       motion_tracking="drag", **properties)
+    destination.motion_over_widget_func = event_recorder(events, "over")
+    destination.motion_flee_widget_func = event_recorder(events, "flee")
+    return destination
+
+
+def start_sweeping(driver, window, touch):
+    # The hub is bound once the drag starts, and sweeps from the next sample on.
+    driver.move(window, touch, 40, 305)
+    driver.move(window, touch, 50, 305)
+
+
+def test_sweep_sees_a_destination_jumped_over(make, driver, window):
+    events = []
+    destination = small_destination(make, events, (400, 300), motion_sweep=True)
+    assert destination in sweep_hub.index
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    start_sweeping(driver, window, touch)
+    driver.move(window, touch, 780, 305)
+    assert events == [("over", destination), ("flee", destination)]
+    assert not destination.in_me
+    driver.up(window, touch)
+
+
+def test_sweep_enters_and_leaves_in_the_order_crossed(make, driver, window):
+    events = []
+    near = small_destination(make, events, (300, 300), motion_sweep=True)
+    far = small_destination(make, events, (500, 300), motion_sweep=True)
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    start_sweeping(driver, window, touch)
+    driver.move(window, touch, 780, 305)
+    assert events == [("over", near), ("flee", near), ("over", far), ("flee", far)]
+    driver.up(window, touch)
+
+
+def test_sweep_leaves_where_the_pointer_stops(make, driver, window):
+    events = []
+    destination = small_destination(make, events, (400, 300), motion_sweep=True)
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    start_sweeping(driver, window, touch)
+    driver.move(window, touch, 405, 305)
+    assert events == [("over", destination)]
+    assert destination.in_me
+    driver.move(window, touch, 780, 305)
+    assert events == [("over", destination), ("flee", destination)]
+    driver.up(window, touch)
+
+
+def test_without_sweep_the_jump_goes_unseen(make, driver, window):
+    events = []
+    small_destination(make, events, (400, 300))
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 300), (40, 305), (780, 305)])
+    assert events == []
+
+
+def test_scheduled_pass_through_annihilates(make, driver, window):
+    events = []
+    destination = small_destination(make, events, (400, 300), motion_sweep=True,
+                                    schedule_callbacks=True)
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    start_sweeping(driver, window, touch)
+    driver.move(window, touch, 780, 305)
+    # Over and flee in the same frame cancel out.
+    frame_scheduler.run_all()
+    assert events == []
+    driver.move(window, touch, 405, 305)
+    frame_scheduler.run_all()
+    assert events == [("over", destination)]
+    driver.up(window, touch)
+    frame_scheduler.run_all()
+
+
+def test_outside_listeners_follow_the_outside_func(make):
+    destination = make("destination", (400, 300), (10, 10), motion_sweep=True)
+    destination.motion_outside_widget_func = lambda widget, args: None
+    assert destination in sweep_hub.outside_listeners
+    destination.motion_outside_widget_func = None
+    destination.motion_over_widget_func = lambda widget, args: None
+    assert destination in sweep_hub.index
+    assert destination not in sweep_hub.outside_listeners
+
+
+def test_turning_sweep_off_hands_tracking_back(make, window):
+    events = []
+    destination = small_destination(make, events, (400, 300), motion_sweep=True)
+    destination.motion_tracking = "always"
+    destination.motion_sweep = False
+    assert destination not in sweep_hub.index
+    assert destination.motion_is_bound_to_window
+    window.mouse_pos = (10, 10)
+    window.mouse_pos = (405, 305)
+    window.mouse_pos = (10, 10)
+    assert events == [("over", destination), ("flee", destination)]
+
+
+def test_sweep_through_a_circles_corner_is_a_miss(make, driver, window):
+    events = []
+    destination = small_destination(make, events, (400, 300), motion_sweep=True,
+                                    hit_shape="circle")
+    make("draggable", (0, 280), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 300)
+    start_sweeping(driver, window, touch)
+    # Crosses the bounding box only near its top corners, outside the circle.
+    driver.move(window, touch, 780, 309.9)
+    assert events == []
+    assert not destination.in_me
+    driver.up(window, touch)
+
+
+def test_unsetting_every_motion_func_stops_tracking(make):
+    destination = make("destination", (400, 300), (10, 10), motion_sweep=True)
+    destination.motion_over_widget_func = lambda widget, args: None
+    assert destination in sweep_hub.index
+    destination.motion_over_widget_func = None
+    assert destination not in sweep_hub.index
+    destination.motion_sweep = False
+    destination.motion_over_widget_func = lambda widget, args: None
+    assert destination.motion_is_bound_to_window
+    destination.motion_over_widget_func = None
+    assert not destination.motion_is_bound_to_window
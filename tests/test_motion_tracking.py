@@ -0,0 +1,93 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_motion_tracking.py
+#       motion_tracking "always" and "drag": when destinations hear the pointer.
+from __future__ import print_function
+
+from kivydnd.dnd_storage_singletons import active_draggables, drag_motion_listeners
+from kivydnd.dropdestination import DropDestination
+
+
+def hover_destination(make, events, **properties):
+    destination = make("destination", (300, 300), (100, 100), drop_group="g", **properties)
+    destination.motion_over_widget_func = lambda widget, args: events.append("over")
+    destination.motion_flee_widget_func = lambda widget, args: events.append("flee")
+    return destination
+
+
+def test_always_tracks_the_pointer_without_a_drag(make, window):
+    events = []
+    destination = hover_destination(make, events)
+    assert destination.motion_is_bound_to_window
+    window.mouse_pos = (350, 350)
+    window.mouse_pos = (10, 10)
+    assert events == ["over", "flee"]
+
+
+def test_drag_mode_ignores_the_pointer_when_idle(make, window):
+    events = []
+    destination = hover_destination(make, events, motion_tracking="drag")
+    assert destination in drag_motion_listeners
+    assert not destination.motion_is_bound_to_window
+    window.mouse_pos = (350, 350)
+    window.mouse_pos = (10, 10)
+    assert events == []
+
+
+def test_drag_mode_tracks_only_during_a_drag(make, driver, window):
+    events = []
+    destination = hover_destination(make, events, motion_tracking="drag")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g")
+    touch = driver.down(window, 20, 20)
+    driver.move(window, touch, 200, 200)
+    assert draggable in active_draggables
+    assert destination.motion_is_bound_to_window
+    driver.move(window, touch, 350, 350)
+    assert events == ["over"]
+    driver.move(window, touch, 500, 350)
+    assert events == ["over", "flee"]
+    driver.up(window, touch)
+    assert not active_draggables
+    assert not destination.motion_is_bound_to_window
+
+
+def test_drag_mode_flees_when_the_drag_ends_inside(make, driver, window):
+    events = []
+    destination = hover_destination(make, events, motion_tracking="drag")
+    make("draggable", (0, 0), (40, 40), drop_group="other")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    # Tracking stopped with the pointer still inside; it would never see it leave.
+    assert events == ["over", "flee"]
+    assert not destination.in_me
+
+
+def test_switching_to_drag_mode_unbinds(make, window):
+    events = []
+    destination = hover_destination(make, events)
+    destination.motion_tracking = "drag"
+    assert not destination.motion_is_bound_to_window
+    destination.motion_tracking = "always"
+    assert destination.motion_is_bound_to_window
+    assert destination not in drag_motion_listeners
+
+
+def test_close_stops_tracking(window):
+    destination = DropDestination(motion_tracking="drag")
+    destination.motion_over_widget_func = lambda widget, args: None
+    assert destination in drag_motion_listeners
+    destination.close()
+    assert destination not in drag_motion_listeners
+    assert not destination.motion_is_bound_to_window
@@ -0,0 +1,91 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_overlap.py
+#       drop_resolution "overlap", and the overlap areas behind it.
+from __future__ import print_function
+
+import random
+
+import pytest
+
+from kivydnd.geometry import NUMPY_MIN_BATCH, overlap_area, overlap_areas
+
+
+def destination(make, drops, pos, **properties):
+    widget = make("destination", pos, (100, 100), **properties)
+    widget.drop_func = lambda draggable: drops.append(widget)
+    return widget
+
+
+def test_overlap_area():
+    assert overlap_area((0, 0, 10, 10), (5, 5, 10, 10)) == 25
+    assert overlap_area((0, 0, 10, 10), (2, 2, 3, 3)) == 9
+    # Touching edges share no area.
+    assert overlap_area((0, 0, 10, 10), (10, 0, 10, 10)) == 0
+    assert overlap_area((0, 0, 10, 10), (20, 20, 5, 5)) == 0
+
+
+def test_overlap_areas_batch_matches_one_by_one():
+    pytest.importorskip("numpy")
+    generator = random.Random(29)
+    rect = (100, 100, 80, 60)
+    rects = [(generator.uniform(0, 300), generator.uniform(0, 300),
+              generator.uniform(1, 100), generator.uniform(1, 100))
+             for i in range(NUMPY_MIN_BATCH * 4)]
+    areas = overlap_areas(rect, rects)
+    assert len(areas) == len(rects)
+    for (area, other) in zip(areas, rects):
+        assert area == pytest.approx(overlap_area(rect, other))
+    assert any(areas)
+    assert overlap_areas(rect, rects[:3]) == [overlap_area(rect, other) for other in rects[:3]]
+
+
+def test_overlap_drop_picks_the_most_covered(make, driver, window):
+    drops = []
+    destination(make, drops, (300, 300), drop_group="g")
+    most = destination(make, drops, (400, 300), drop_group="g")
+    make("draggable", (0, 0), (60, 60), drop_group="g", drop_resolution="overlap")
+    # The touch comes up over the left destination, but the draggable, held near its
+    # lower left corner, covers more of the right one.
+    driver.drag(window, [(10, 10), (200, 200), (390, 350)])
+    assert drops == [most]
+
+
+def test_overlap_drop_falls_back_to_the_next_most_covered(make, driver, window):
+    drops = []
+    less = destination(make, drops, (300, 300), drop_group="g")
+    destination(make, drops, (400, 300), drop_group="g", is_drop_eligible=False)
+    make("draggable", (0, 0), (60, 60), drop_group="g", drop_resolution="overlap")
+    driver.drag(window, [(10, 10), (200, 200), (390, 350)])
+    assert drops == [less]
+
+
+def test_overlap_drop_lands_even_with_the_touch_outside(make, driver, window):
+    drops = []
+    covered = destination(make, drops, (300, 300), drop_group="g")
+    make("draggable", (0, 0), (60, 60), drop_group="g", drop_resolution="overlap")
+    # Held by its lower left corner, just below and left of the destination.
+    driver.drag(window, [(2, 2), (200, 200), (295, 295)])
+    assert drops == [covered]
+
+
+def test_overlap_drop_covering_nothing_fails(make, driver, window, root):
+    drops = []
+    destination(make, drops, (300, 300), drop_group="g")
+    draggable = make("draggable", (0, 0), (60, 60), drop_group="g", drop_resolution="overlap")
+    driver.drag(window, [(10, 10), (200, 200), (600, 100)])
+    assert drops == []
+    assert draggable.parent is root
@@ -0,0 +1,108 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_pointer_history.py
+#       The pointer history ring buffer, and the velocity taken from it.
+from __future__ import print_function
+
+import pytest
+
+from kivydnd.pointer_history import VELOCITY_SPAN, PointerHistory
+
+
+def steady(history, vx, vy, count, interval=0.01, start=(0.0, 0.0, 0.0)):
+    (t, x, y) = start
+    for i in range(count):
+        history.append(t + i * interval, x + vx * i * interval, y + vy * i * interval)
+
+
+def test_empty_history():
+    history = PointerHistory()
+    assert len(history) == 0
+    assert history.latest() is None
+    assert history.velocity() == (0.0, 0.0)
+    assert history.acceleration() == (0.0, 0.0)
+
+
+def test_ring_keeps_the_newest_samples():
+    history = PointerHistory(4)
+    for i in range(6):
+        history.append(float(i), i * 10.0, 0.0)
+    assert len(history) == 4
+    assert history.samples() == [(2.0, 20.0, 0.0), (3.0, 30.0, 0.0), (4.0, 40.0, 0.0),
+                                 (5.0, 50.0, 0.0)]
+    assert history.latest() == (5.0, 50.0, 0.0)
+    history.clear()
+    assert len(history) == 0
+
+
+def test_size_is_at_least_two():
+    assert PointerHistory(0).size == 2
+
+
+def test_velocity_of_steady_motion():
+    history = PointerHistory()
+    steady(history, 300.0, -120.0, 8)
+    (vx, vy) = history.velocity()
+    assert vx == pytest.approx(300.0)
+    assert vy == pytest.approx(-120.0)
+    assert history.speed() == pytest.approx((300.0 ** 2 + 120.0 ** 2) ** 0.5)
+
+
+def test_velocity_smooths_jitter():
+    history = PointerHistory()
+    for i in range(10):
+        jitter = 2.0 if i % 2 else -2.0
+        history.append(i * 0.01, i * 5.0 + jitter, 0.0)
+    (vx, vy) = history.velocity()
+    assert vx == pytest.approx(500.0, rel=0.2)
+
+
+def test_velocity_only_counts_recent_samples():
+    history = PointerHistory()
+    steady(history, 1000.0, 0.0, 5)
+    # Still for longer than VELOCITY_SPAN: the old motion is forgotten.
+    history.append(0.04 + VELOCITY_SPAN * 2, 40.0, 0.0)
+    assert history.velocity() == (0.0, 0.0)
+
+
+def test_acceleration():
+    history = PointerHistory()
+    # x = 0.5 * a * t^2 with a = 2000
+    for i in range(10):
+        t = i * 0.01
+        history.append(t, 1000.0 * t * t, 0.0)
+    (ax, ay) = history.acceleration()
+    assert ax == pytest.approx(2000.0, rel=0.05)
+    assert ay == 0.0
+
+
+def test_drag_fills_the_history(make, driver, window):
+    draggable = make("draggable", (0, 0), (40, 40))
+    touch = driver.down(window, 20, 20)
+    for i in range(1, 6):
+        driver.move(window, touch, 20 + i * 10, 20)
+    # The first move starts the drag; each one after is a sample.
+    assert len(draggable.pointer_history) >= 4
+    (vx, vy) = draggable.pointer_history.velocity()
+    assert vx == pytest.approx(10 / driver.MOVE_INTERVAL)
+    driver.up(window, touch)
+
+
+def test_pointer_history_size_takes_effect_at_the_next_drag(make, driver, window):
+    draggable = make("draggable", (0, 0), (40, 40), pointer_history_size=4)
+    driver.drag(window, [(20, 20)] + [(20 + i * 10, 20) for i in range(1, 10)])
+    assert draggable.pointer_history.size == 4
+    assert len(draggable.pointer_history) == 4
@@ -0,0 +1,90 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_recording.py
+#       Recording a drag, and replaying it.
+from __future__ import print_function
+
+import io
+
+import pytest
+
+from kivydnd.dropdestination import DropDestination
+from kivydnd.recording import FORMAT_VERSION, Recorder, Replayer, load
+
+from conftest import Draggable
+
+
+class CountingDestination(DropDestination):
+    drops = []
+
+    def drop_func(self, draggable):
+        CountingDestination.drops.append(self.pos[:])
+
+
+def record_a_drag(root, driver, window):
+    """
+    :return: the recording, as text. The widgets it was made with are closed again.
+    """
+    destination = DropDestination(pos=(300, 300), size=(100, 100), size_hint=(None, None))
+    destination.drop_group = "g"
+    draggable = Draggable(pos=(0, 0), size=(40, 40), size_hint=(None, None))
+    draggable.drop_group = "g"
+    draggable.drop_ok_do_animation = False
+    root.add_widget(destination)
+    root.add_widget(draggable)
+    recording = io.StringIO()
+    recorder = Recorder(recording)
+    recorder.start(window)
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    recorder.stop()
+    destination.close()
+    draggable.close()
+    return recording.getvalue()
+
+
+def test_recording_has_the_scene_then_the_events(root, driver, window):
+    (scene, events) = load(io.StringIO(record_a_drag(root, driver, window)))
+    assert scene["kivydnd_recording"] == FORMAT_VERSION
+    assert scene["window"] == list(window.size)
+    rects = dict((widget["kind"], widget["rect"]) for widget in scene["widgets"])
+    assert rects == {"draggable": [0, 0, 40, 40], "destination": [300, 300, 100, 100]}
+    assert [widget["properties"]["drop_group"] for widget in scene["widgets"]] == ["g", "g"]
+    touch_events = [event[1:] for event in events if event[1] != "pos"]
+    assert touch_events == [["down", 0, 20, 20, False], ["move", 0, 200, 200],
+                            ["move", 0, 350, 350], ["up", 0, 350, 350]]
+    times = [event[0] for event in events]
+    assert times == sorted(times)
+
+
+def test_replay_drops_where_the_recording_did(root, driver, window):
+    recording = record_a_drag(root, driver, window)
+    del CountingDestination.drops[:]
+    replayer = Replayer(io.StringIO(recording), window=window,
+                        destination_class=CountingDestination)
+    try:
+        (draggable, destination) = sorted(replayer.widgets,
+                                          key=lambda widget: isinstance(widget, DropDestination))
+        assert not draggable.drop_ok_do_animation and not draggable.inertial_release
+        assert replayer.play() == len(replayer.events)
+        assert CountingDestination.drops == [[300, 300]]
+        assert draggable.parent is None
+    finally:
+        replayer.close()
+
+
+def test_load_refuses_what_is_not_a_recording():
+    with pytest.raises(ValueError):
+        load(io.StringIO('{"something": "else"}\n'))
@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_rect_array.py
+#       The rect array, with and without NumPy, and the "array" index backend.
+from __future__ import print_function
+
+import random
+
+import pytest
+
+from kivydnd.dnd_storage_singletons import destination_index
+from kivydnd.rect_array import RectArray
+
+USE_NUMPY = [False, pytest.param(True, marks=pytest.mark.skipif(
+    RectArray(use_numpy=True).numpy is None, reason="NumPy is not installed"))]
+
+
+@pytest.fixture
+def array_backend():
+    destination_index.set_backend("array")
+    yield destination_index
+    destination_index.set_backend("grid")
+
+
+def random_rects(count, seed=38):
+    generator = random.Random(seed)
+    return dict((key, (generator.uniform(0, 500), generator.uniform(0, 500),
+                       generator.uniform(1, 80), generator.uniform(1, 80)))
+                for key in range(count))
+
+
+def contains(rect, x, y):
+    return rect[0] <= x <= rect[0] + rect[2] and rect[1] <= y <= rect[1] + rect[3]
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_queries_match_a_plain_scan(use_numpy):
+    rects = random_rects(300)
+    # Start small, so the array has to grow.
+    array = RectArray(capacity=4, use_numpy=use_numpy)
+    for (key, rect) in rects.items():
+        array.set(key, rect)
+    assert len(array) == len(rects)
+    generator = random.Random(1)
+    for i in range(50):
+        (x, y) = (generator.uniform(0, 580), generator.uniform(0, 580))
+        expected = set(key for (key, rect) in rects.items() if contains(rect, x, y))
+        assert set(array.query_point(x, y)) == expected
+    found = set(array.query_rect((100, 100, 50, 50)))
+    expected = set(key for (key, rect) in rects.items()
+                   if rect[0] <= 150 and 100 <= rect[0] + rect[2] and
+                   rect[1] <= 150 and 100 <= rect[1] + rect[3])
+    assert found == expected
+
+
+@pytest.mark.parametrize("use_numpy", USE_NUMPY)
+def test_move_and_remove_keep_rows_straight(use_numpy):
+    array = RectArray(use_numpy=use_numpy)
+    for key in "abcd":
+        array.set(key, (0, 0, 10, 10))
+    array.set("b", (100, 100, 10, 10))
+    assert array.rect("b") == (100.0, 100.0, 10.0, 10.0)
+    array.remove("a")
+    assert "a" not in array
+    assert len(array) == 3
+    assert sorted(array.query_point(5, 5)) == ["c", "d"]
+    assert array.query_point(105, 105) == ["b"]
+    array.remove("a")
+    array.clear()
+    assert len(array) == 0
+    assert array.query_point(5, 5) == []
+
+
+def test_unknown_backend_is_refused():
+    with pytest.raises(ValueError):
+        destination_index.set_backend("quadtree")
+
+
+def test_drops_land_with_the_array_backend(make, driver, window, array_backend):
+    drops = []
+    destinations = [make("destination", (100 * i, 300), (90, 90), drop_group="g")
+                    for i in range(6)]
+    for destination in destinations:
+        destination.drop_func = lambda draggable, destination=destination: \
+            drops.append(destination)
+    assert array_backend.array is not None
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert drops == [destinations[3]]
+
+
+def test_array_backend_sees_a_moved_destination(make, driver, window, array_backend):
+    drops = []
+    destination = make("destination", (300, 300), (90, 90), drop_group="g")
+    destination.drop_func = lambda draggable: drops.append(destination)
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    destination.pos = (500, 100)
+    driver.drag(window, [(20, 20), (200, 200), (540, 140)])
+    assert drops == [destination]
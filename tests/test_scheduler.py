@@ -0,0 +1,142 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_scheduler.py
+#       The frame scheduler, on its own and under drags.
+from __future__ import print_function
+
+import pytest
+
+from kivydnd.scheduler import PRIORITY_HIGH, FrameScheduler, frame_scheduler
+
+
+def test_a_frame_runs_at_least_one_call():
+    # With no budget at all, each frame still makes progress.
+    scheduler = FrameScheduler(budget=0)
+    calls = []
+    for i in range(3):
+        scheduler.schedule(calls.append, i)
+    scheduler.run_frame()
+    assert calls == [0]
+    assert len(scheduler) == 2
+    scheduler.run_frame()
+    scheduler.run_frame()
+    assert calls == [0, 1, 2]
+    assert len(scheduler) == 0
+
+
+def test_a_frame_stops_when_the_budget_is_spent():
+    scheduler = FrameScheduler(budget=60)
+    calls = []
+    for i in range(3):
+        scheduler.schedule(calls.append, i)
+    scheduler.run_frame()
+    assert calls == [0, 1, 2]
+
+
+def test_scheduled_call_gives_its_result_like_a_future():
+    scheduler = FrameScheduler()
+    call = scheduler.schedule(lambda x: x * 2, 21)
+    done = []
+    call.add_done_callback(done.append)
+    assert not call.done()
+    scheduler.run_all()
+    assert call.done()
+    assert call.result() == 42
+    assert done == [call]
+    # Already done: the callback is called at once.
+    call.add_done_callback(done.append)
+    assert done == [call, call]
+
+
+def test_scheduled_call_raises_what_it_raised():
+    scheduler = FrameScheduler()
+
+    def fail():
+        raise ValueError("no")
+    call = scheduler.schedule(fail)
+    call.add_done_callback(lambda call: None)
+    scheduler.run_all()
+    with pytest.raises(ValueError):
+        call.result()
+
+
+def test_cancel_by_key():
+    scheduler = FrameScheduler()
+    calls = []
+    call = scheduler.post(calls.append, (1,), key="k")
+    scheduler.cancel("k")
+    assert call.cancelled()
+    assert not call.cancel()
+    scheduler.run_all()
+    assert calls == []
+    assert len(scheduler) == 0
+
+
+def test_same_key_coalesces_to_the_latest_args():
+    scheduler = FrameScheduler()
+    calls = []
+    first = scheduler.post(calls.append, (1,), key="k")
+    second = scheduler.post(calls.append, (2,), key="k")
+    assert first is second
+    assert len(scheduler) == 1
+    scheduler.run_all()
+    assert calls == [2]
+    assert scheduler.pending == {}
+
+
+def test_annihilating_call_cancels_both():
+    scheduler = FrameScheduler()
+    calls = []
+    over = scheduler.post(calls.append, ("over",), key="over")
+    assert scheduler.post(calls.append, ("flee",), key="flee", annihilates="over") is None
+    assert over.cancelled()
+    scheduler.run_all()
+    assert calls == []
+
+
+def test_annihilates_nothing_once_the_other_has_run():
+    scheduler = FrameScheduler()
+    calls = []
+    scheduler.post(calls.append, ("over",), key="over")
+    scheduler.run_all()
+    scheduler.post(calls.append, ("flee",), key="flee", annihilates="over")
+    scheduler.run_all()
+    assert calls == ["over", "flee"]
+
+
+def test_higher_priority_runs_first():
+    scheduler = FrameScheduler()
+    calls = []
+    scheduler.post(calls.append, ("normal",))
+    scheduler.post(calls.append, ("high",), priority=PRIORITY_HIGH)
+    scheduler.run_all()
+    assert calls == ["high", "normal"]
+
+
+def test_scheduled_while_dragging_runs_once_per_frame(make, driver, window):
+    seen = []
+    make("destination", (300, 300), (200, 200), drop_group="g",
+         while_dragging_func=lambda widget, event: seen.append(event.x))
+    make("draggable", (0, 0), (40, 40), drop_group="g", schedule_callbacks=True)
+    touch = driver.down(window, 20, 20)
+    for x in (200, 320, 340, 360):
+        driver.move(window, touch, x, 350)
+    # Four moves, one frame: the callback runs once, with the last move.
+    frame_scheduler.run_all()
+    assert seen == [360]
+    driver.up(window, touch)
+    frame_scheduler.run_all()
+
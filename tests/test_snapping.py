@@ -0,0 +1,101 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_snapping.py
+#       drop_resolution "nearest", and magnetic_snap.
+from __future__ import print_function
+
+from kivy.uix.relativelayout import RelativeLayout
+
+
+def destination(make, drops, pos, **properties):
+    widget = make("destination", pos, (100, 100), **properties)
+    widget.drop_func = lambda draggable: drops.append(widget)
+    return widget
+
+
+def test_nearest_drop_snaps_within_snap_radius(make, driver, window):
+    drops = []
+    near = destination(make, drops, (300, 300), drop_group="g")
+    destination(make, drops, (500, 300), drop_group="g")
+    make("draggable", (0, 0), (40, 40), drop_group="g", drop_resolution="nearest",
+         snap_radius=30)
+    driver.drag(window, [(20, 20), (200, 200), (420, 350)])
+    assert drops == [near]
+
+
+def test_nearest_drop_beyond_snap_radius_fails(make, driver, window):
+    drops = []
+    destination(make, drops, (300, 300), drop_group="g")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g",
+                     drop_resolution="nearest", snap_radius=30)
+    driver.drag(window, [(20, 20), (200, 200), (450, 350)])
+    assert drops == []
+    assert draggable.parent is not None
+
+
+def test_nearest_drop_skips_a_destination_that_refuses(make, driver, window):
+    drops = []
+    destination(make, drops, (300, 300), drop_group="g", is_drop_eligible=False)
+    farther = destination(make, drops, (300, 420), drop_group="g")
+    make("draggable", (0, 0), (40, 40), drop_group="g", drop_resolution="nearest",
+         snap_radius=30)
+    # 5 pixels from the refusing destination, 15 from the other.
+    driver.drag(window, [(20, 20), (200, 200), (350, 405)])
+    assert drops == [farther]
+
+
+def test_magnetic_snap_centers_on_the_target(make, driver, window):
+    target = make("destination", (300, 300), (100, 100), drop_group="g")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g", magnetic_snap=True)
+    touch = driver.down(window, 20, 20)
+    driver.move(window, touch, 200, 200)
+    assert draggable.snap_target is None
+    # The draggable's center is 10 pixels left of the target.
+    driver.move(window, touch, 290, 350)
+    assert draggable.snap_target is target
+    assert draggable.center == target.center
+    # Out of snap_radius, it follows the touch again.
+    driver.move(window, touch, 250, 350)
+    assert draggable.snap_target is None
+    assert draggable.center == [250, 350]
+    driver.up(window, touch)
+
+
+def test_snapped_widget_drops_onto_its_target(make, driver, window):
+    drops = []
+    target = destination(make, drops, (300, 300), drop_group="g")
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g", magnetic_snap=True)
+    # The touch comes up outside the target, but the widget sits on it.
+    driver.drag(window, [(20, 20), (200, 200), (290, 350)])
+    assert drops == [target]
+    assert draggable.parent is None
+
+
+def test_snapping_inside_a_relative_layout(make, driver, window, root):
+    layout = RelativeLayout(pos=(200, 200), size=(300, 300), size_hint=(None, None))
+    root.add_widget(layout)
+    target = make("destination", (0, 0), (100, 100), drop_group="g")
+    root.remove_widget(target)
+    layout.add_widget(target)
+    draggable = make("draggable", (0, 0), (40, 40), drop_group="g", magnetic_snap=True)
+    # The layout moves after the target was indexed.
+    layout.pos = (300, 300)
+    touch = driver.down(window, 20, 20)
+    driver.move(window, touch, 200, 200)
+    driver.move(window, touch, 290, 350)
+    assert draggable.snap_target is target
+    assert draggable.center == [350, 350]
+    driver.up(window, touch)
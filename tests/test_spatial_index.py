@@ -0,0 +1,77 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_spatial_index.py
+#       The destination index, and destinations that move without telling it.
+from __future__ import print_function
+
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.widget import Widget
+
+from kivydnd.dnd_storage_singletons import destination_index
+from kivydnd.dropdestination import DropDestination
+
+
+def scrolled_destination(root, drops):
+    """
+    A destination near the top of a ScrollView's content, with the content scrolled
+    to the bottom, so the destination is out of sight.
+    :return: (scroll_view, destination)
+    """
+    scroll_view = ScrollView(pos=(300, 0), size=(200, 200), size_hint=(None, None),
+                             do_scroll_x=False)
+    content = Widget(size=(200, 1000), size_hint=(None, None))
+    destination = DropDestination(pos=(0, 800), size=(200, 100), size_hint=(None, None))
+    destination.drop_group = "g"
+    destination.drop_func = lambda draggable: drops.append(destination)
+    content.add_widget(destination)
+    scroll_view.add_widget(content)
+    root.add_widget(scroll_view)
+    scroll(scroll_view, 0)
+    return (scroll_view, destination)
+
+
+def scroll(scroll_view, scroll_y):
+    scroll_view.scroll_y = scroll_y
+    # ScrollView updates on a Clock trigger, and the Clock doesn't tick in a test.
+    scroll_view.update_from_scroll()
+
+
+def test_rescan_finds_what_moved_without_telling(root):
+    (scroll_view, destination) = scrolled_destination(root, [])
+    try:
+        assert destination_index.rect(destination)[1] == 800
+        # Scrolling moves the content with a canvas translation: no pos changes.
+        scroll(scroll_view, 1)
+        assert destination_index.query_point(350, 50, revalidate=True) == []
+        assert destination_index.rescan()
+        assert destination_index.query_point(350, 50) == [destination]
+        assert not destination_index.rescan()
+    finally:
+        destination.close()
+
+
+def test_point_drop_lands_in_a_scrolled_scroll_view(make, driver, window, root):
+    drops = []
+    (scroll_view, destination) = scrolled_destination(root, drops)
+    try:
+        destination_index.rect(destination)
+        scroll(scroll_view, 1)
+        draggable = make("draggable", (0, 0), (40, 40), drop_group="g")
+        driver.drag(window, [(20, 20), (200, 100), (350, 50)])
+        assert drops == [destination]
+        assert draggable.parent is None
+    finally:
+        destination.close()
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_stats.py
+#       The drag path counters and timings.
+from __future__ import print_function
+
+import pytest
+
+from kivydnd import stats
+
+
+@pytest.fixture
+def counting():
+    stats.reset()
+    stats.enable()
+    yield
+    stats.disable()
+    stats.reset()
+
+
+def test_nothing_is_counted_while_disabled(make, driver, window):
+    stats.reset()
+    make("destination", (300, 300), (100, 100), drop_group="g")
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    assert stats.snapshot() == {"counters": dict((name, 0) for name in stats.COUNTERS),
+                                "timings": {}}
+
+
+def test_a_drag_is_counted_and_timed(counting, make, driver, window):
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         drop_func=lambda draggable: None)
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+    snapshot = stats.snapshot()
+    assert snapshot["counters"]["collision_tests"] > 0
+    assert snapshot["counters"]["candidates_examined"] > 0
+    assert snapshot["counters"]["callbacks_dispatched"] > 0
+    assert snapshot["timings"]["on_touch_move"]["calls"] == 2
+    assert snapshot["timings"]["on_drag_finish"]["calls"] == 1
+
+
+def test_timed_keeps_calls_total_and_longest(counting):
+    stats.add_time("t", 0.002)
+    stats.add_time("t", 0.004)
+    timing = stats.snapshot()["timings"]["t"]
+    assert timing["calls"] == 2
+    assert timing["total_ms"] == pytest.approx(6)
+    assert timing["mean_us"] == pytest.approx(3000)
+    assert timing["max_us"] == pytest.approx(4000)
+
+
+def test_snapshot_is_a_copy(counting):
+    stats.count("collision_tests")
+    snapshot = stats.snapshot()
+    stats.count("collision_tests", 5)
+    assert snapshot["counters"]["collision_tests"] == 1
+    stats.reset()
+    assert stats.snapshot()["counters"]["collision_tests"] == 0
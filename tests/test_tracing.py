@@ -0,0 +1,84 @@
+# -*- coding: UTF-8 -*-
+#    Copyright 2017, 2018 Michael Schwager
+
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+# File: test_tracing.py
+#       Drag events recorded for a trace viewer.
+from __future__ import print_function
+
+import json
+
+import pytest
+
+from kivydnd import tracing
+
+
+@pytest.fixture
+def trace():
+    tracing.enable(capacity=tracing.DEFAULT_CAPACITY)
+    yield
+    tracing.disable()
+    tracing.clear()
+
+
+def drag_onto_a_destination(make, driver, window):
+    make("destination", (300, 300), (100, 100), drop_group="g",
+         drop_func=lambda draggable: None)
+    make("draggable", (0, 0), (40, 40), drop_group="g")
+    driver.drag(window, [(20, 20), (200, 200), (350, 350)])
+
+
+def test_nothing_is_recorded_while_disabled(make, driver, window):
+    tracing.clear()
+    drag_onto_a_destination(make, driver, window)
+    assert len(tracing.events) == 0
+
+
+def test_a_drag_records_each_phase_in_order(trace, make, driver, window):
+    drag_onto_a_destination(make, driver, window)
+    # A span is recorded when it ends, so spans that enclose others come after them;
+    # order by start time. The drag starts during the first move.
+    started = dict((event["name"], event["ts"]) for event in reversed(tracing.events))
+    for name in ("touch_down", "drag_start", "move", "hit_test", "drop_resolution",
+                 "drop_dispatch", "post_drop"):
+        assert name in started
+    assert started["touch_down"] <= started["move"] <= started["drag_start"]
+    assert started["drop_resolution"] <= started["drop_dispatch"]
+    spans = [event for event in tracing.events if event["ph"] == "X"]
+    assert all(event["dur"] >= 0 for event in spans)
+    assert all(event["cat"] == tracing.CATEGORY for event in tracing.events)
+
+
+def test_the_buffer_keeps_the_newest_events():
+    tracing.enable(capacity=3)
+    try:
+        for i in range(5):
+            tracing.instant("event", {"i": i})
+        assert [event["args"]["i"] for event in tracing.events] == [2, 3, 4]
+    finally:
+        tracing.disable()
+        tracing.enable(capacity=tracing.DEFAULT_CAPACITY)
+        tracing.disable()
+
+
+def test_export_writes_a_chrome_trace(trace, tmp_path):
+    tracing.begin_async("animation", 1)
+    tracing.end_async("animation", 1)
+    path = tmp_path / "drag.json"
+    tracing.export(str(path))
+    with open(str(path)) as trace_file:
+        exported = json.load(trace_file)
+    assert exported["displayTimeUnit"] == "ms"
+    assert [(event["ph"], event["id"]) for event in exported["traceEvents"]] == \
+        [("b", 1), ("e", 1)]